@@ -1,23 +1,168 @@
 import os
 import json
+import time
 import joblib
+import numpy as np
+import scipy.sparse as sp
 
-from sklearn.model_selection import train_test_split
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone
+from sklearn.model_selection import check_cv, train_test_split
 from sklearn.metrics import root_mean_squared_error, accuracy_score
 
 from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, Ridge, LogisticRegression
+from sklearn.linear_model import SGDClassifier, SGDRegressor
 from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
 from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
 from sklearn.neighbors import KNeighborsRegressor, KNeighborsClassifier
 from sklearn.neural_network import MLPRegressor, MLPClassifier
 from xgboost import XGBRegressor, XGBClassifier
 
+from agents.automl.tuning import HyperparameterTuner, SEARCH_SPACES
+from mlops.instrumentation import annotate, instrumented, recorder, timed_fit
+
+
+# Candidates that already spread their own fit over several threads
+# through an ``n_jobs`` parameter.
+MULTITHREADED_MODELS = {"RandomForest", "ExtraTrees", "XGBoost"}
+
+# Estimators that train on CSR input natively. Everything else (trees,
+# boosting, KNN, MLP) gets a dense copy made once per matrix.
+SPARSE_NATIVE_ESTIMATORS = (
+    LinearRegression, Ridge, Lasso, ElasticNet, LogisticRegression,
+    SGDRegressor, SGDClassifier, XGBRegressor, XGBClassifier,
+)
+
+
+def accepts_sparse(model):
+    return isinstance(model, SPARSE_NATIVE_ESTIMATORS)
+
+
+class FeatureMatrix:
+    """A CSR feature matrix plus, built on first use, its dense copy.
+
+    Sparse-native candidates are fed ``csr``; the others share ``dense``,
+    so a wide one-hot matrix is densified once on purpose rather than
+    by every estimator (or every fold) that needs it.
+    """
+
+    def __init__(self, csr, dense=None):
+        self.csr = csr
+        self._dense = dense
+
+    @property
+    def shape(self):
+        return self.csr.shape
+
+    def __len__(self):
+        return self.csr.shape[0]
+
+    @property
+    def dense(self):
+        if self._dense is None:
+            self._dense = self.csr.toarray()
+        return self._dense
+
+    def __getitem__(self, rows):
+        dense = self._dense[rows] if self._dense is not None else None
+        return FeatureMatrix(self.csr[rows], dense)
+
+    def for_model(self, model):
+        return self.csr if accepts_sparse(model) else self.dense
+
+
+def _as_input(X, model):
+    """The matrix ``model`` should be fit/scored on."""
+    return X.for_model(model) if isinstance(X, FeatureMatrix) else X
+
+
+def _score(task_type, y_true, y_pred):
+    # float() because a float32/int8 target (compacted by cleaning) makes
+    # sklearn return numpy float32 scores, which json cannot serialise.
+    if task_type == "regression":
+        return float(root_mean_squared_error(y_true, y_pred))
+    return float(accuracy_score(y_true, y_pred))
+
+
+def _fit_candidate(name, model, X_train, y_train, X_val, y_val, task_type):
+    # Module-level so it can be pickled and shipped to worker processes.
+    preds, timing = timed_fit(model, X_train, y_train, X_val)
+    return name, model, _score(task_type, y_val, preds), timing
+
+
+def _with_threads(name, model, threads):
+    """A copy of ``model`` fitting on at most ``threads`` cores, for pooled
+    fits; the candidate itself keeps its own n_jobs."""
+    if name not in MULTITHREADED_MODELS:
+        return model
+    return clone(model).set_params(n_jobs=threads)
+
+
+def _fit_fold(name, fold, model, X, y, train_idx, test_idx, task_type):
+    preds, timing = timed_fit(model, X[train_idx], y[train_idx], X[test_idx])
+    return name, fold, preds, _score(task_type, y[test_idx], preds), timing
+
 
 class AutoMLAgent:
-    def __init__(self, task_type="regression"):
+    def __init__(
+        self,
+        task_type="regression",
+        n_jobs=1,
+        backend="loky",
+        search="full",
+        time_budget=None,
+        budget_clock="wall",
+        eta=3,
+        min_samples=None,
+        tune=False,
+        n_trials=20,
+        tuning_budget=None,
+        tune_top_k=1,
+        validation="holdout",
+        cv=5,
+        online_models=False,
+    ):
         print(f"🤖 AutoMLAgent initialized ({task_type})")
         self.task_type = task_type
 
+        # n_jobs=1 keeps the original one-model-at-a-time loop; any other
+        # value (-1 for all cores) fits candidates concurrently on a joblib pool.
+        self.n_jobs = n_jobs
+        self.backend = backend
+
+        # search="halving" scores every candidate on small row subsamples and
+        # only gives the top 1/eta more data, until time_budget seconds
+        # (wall or CPU clock) run out.
+        if search not in ("full", "halving"):
+            raise ValueError(f"Unsupported search strategy: {search}")
+        if budget_clock not in ("wall", "cpu"):
+            raise ValueError(f"Unsupported budget clock: {budget_clock}")
+        self.search = search
+        self.time_budget = time_budget
+        self.budget_clock = budget_clock
+        self.eta = eta
+        self.min_samples = min_samples
+
+        # tune=True runs a sampled, early-stopped search over the best
+        # tune_top_k tunable families (trees and boosters) after selection.
+        self.tune = tune
+        self.n_trials = n_trials
+        self.tuning_budget = tuning_budget
+        self.tune_top_k = tune_top_k
+
+        # validation="cv" scores every candidate with k-fold CV once and keeps
+        # the per-fold scores and out-of-fold predictions for EvaluationAgent.
+        if validation not in ("holdout", "cv"):
+            raise ValueError(f"Unsupported validation strategy: {validation}")
+        if validation == "cv" and search == "halving":
+            raise ValueError("Successive halving only supports holdout validation")
+        self.validation = validation
+        self.cv = cv
+
+        # online_models=True adds SGD candidates, which incremental
+        # retraining can keep updating with partial_fit.
+        self.online_models = online_models
+
         if self.task_type == "regression":
             self.metric_name = "rmse"
             self.models = {
@@ -25,55 +170,437 @@ class AutoMLAgent:
                 "Ridge": Ridge(alpha=1.0),
                 "Lasso": Lasso(alpha=0.01),
                 "ElasticNet": ElasticNet(),
-                "RandomForest": RandomForestRegressor(),
-                "ExtraTrees": ExtraTreesRegressor(),
-                "GradientBoosting": GradientBoostingRegressor(),
-                "XGBoost": XGBRegressor(),
+                "RandomForest": RandomForestRegressor(random_state=42),
+                "ExtraTrees": ExtraTreesRegressor(random_state=42),
+                "GradientBoosting": GradientBoostingRegressor(random_state=42),
+                "XGBoost": XGBRegressor(random_state=42),
                 "KNN": KNeighborsRegressor(),
-                "MLP": MLPRegressor(max_iter=500)
+                "MLP": MLPRegressor(max_iter=500, random_state=42)
             }
         elif self.task_type == "classification":
             self.metric_name = "accuracy"
             self.models = {
                 "LogisticRegression": LogisticRegression(max_iter=1000),
-                "RandomForest": RandomForestClassifier(),
-                "ExtraTrees": ExtraTreesClassifier(),
-                "GradientBoosting": GradientBoostingClassifier(),
-                "XGBoost": XGBClassifier(),
+                "RandomForest": RandomForestClassifier(random_state=42),
+                "ExtraTrees": ExtraTreesClassifier(random_state=42),
+                "GradientBoosting": GradientBoostingClassifier(random_state=42),
+                "XGBoost": XGBClassifier(random_state=42),
                 "KNN": KNeighborsClassifier(),
-                "MLP": MLPClassifier(max_iter=500)
+                "MLP": MLPClassifier(max_iter=500, random_state=42)
             }
         else:
             raise ValueError(f"Unsupported task type: {task_type}")
 
+        if online_models:
+            if self.task_type == "regression":
+                self.models["SGD"] = SGDRegressor(random_state=42)
+            else:
+                self.models["SGD"] = SGDClassifier(random_state=42)
+
+    # -----------------------------
+    # Candidate fitting
+    # -----------------------------
+    def _pool(self, n_tasks):
+        """(Parallel, threads per worker) for ``n_tasks`` fits.
+
+        Multithreaded candidates should be fit through ``_with_threads`` so
+        that RandomForest/XGBoost do not each grab every core on top of the
+        pool (oversubscription).
+        """
+        n_workers = min(effective_n_jobs(self.n_jobs), n_tasks)
+        threads_per_worker = max(1, os.cpu_count() // n_workers)
+
+        print(f"Running {n_tasks} fits on {n_workers} workers "
+              f"({threads_per_worker} threads for multithreaded models)")
+
+        # Arrays above max_nbytes are dumped once to a shared memmap that every
+        # worker opens read-only, instead of being pickled into each task.
+        pool = Parallel(
+            n_jobs=n_workers,
+            backend=self.backend,
+            max_nbytes="1M",
+            mmap_mode="r",
+        )
+        return pool, threads_per_worker
+
+    def _fit_candidates(self, candidates, X_train, y_train, X_val, y_val):
+        """Fit every estimator in ``candidates`` and return name -> (model, score)."""
+        if self.n_jobs == 1 or len(candidates) == 1:
+            fitted = [
+                _fit_candidate(
+                    name, model, _as_input(X_train, model), y_train,
+                    _as_input(X_val, model), y_val, self.task_type
+                )
+                for name, model in candidates.items()
+            ]
+        else:
+            pool, threads = self._pool(len(candidates))
+            fitted = pool(
+                delayed(_fit_candidate)(
+                    name, _with_threads(name, model, threads), _as_input(X_train, model),
+                    y_train, _as_input(X_val, model), y_val, self.task_type
+                )
+                for name, model in candidates.items()
+            )
+            # The thread cap was for sharing the pool; fitted models go on
+            # (and get deployed) with the candidate's own n_jobs.
+            for name, model, _, _ in fitted:
+                if name in MULTITHREADED_MODELS:
+                    model.set_params(n_jobs=candidates[name].get_params()["n_jobs"])
+
+        for name, _, score, timing in fitted:
+            recorder.record("automl.fit", model=name, phase="holdout", score=score, **timing)
+
+        # Workers return fitted copies rather than fitting ``candidates`` in place.
+        return {name: (model, score) for name, model, score, _ in fitted}
+
+    # -----------------------------
+    # Successive halving search
+    # -----------------------------
+    def _clock(self):
+        # "cpu" only counts this process, so it is meant for n_jobs=1 runs.
+        if self.budget_clock == "cpu":
+            return time.process_time()
+        return time.perf_counter()
+
+    def _subsample_order(self, y_train):
+        """Random row order whose prefixes are nested subsamples.
+
+        For classification the first occurrence of every class is moved to
+        the front, so even the smallest rung sees all labels (XGBoost refuses
+        non-contiguous class ids).
+        """
+        rng = np.random.RandomState(42)
+        order = rng.permutation(len(y_train))
+
+        if self.task_type == "classification":
+            labels = np.asarray(y_train)[order]
+            _, first = np.unique(labels, return_index=True)
+            head = order[np.sort(first)]
+            order = np.concatenate([head, np.delete(order, first)])
+
+        return order
+
+    def _successive_halving(self, X_train, y_train, X_val, y_val):
+        n_train = X_train.shape[0]
+        names = list(self.models)
+
+        # Number of rungs needed to cut the field down to a single model.
+        n_rungs = 1
+        remaining = len(names)
+        while remaining > 1:
+            remaining = int(np.ceil(remaining / self.eta))
+            n_rungs += 1
+
+        min_samples = self.min_samples or 100
+        sizes = [
+            min(n_train, max(min_samples, n_train // self.eta ** (n_rungs - 1 - i)))
+            for i in range(n_rungs)
+        ]
+
+        order = self._subsample_order(y_train)
+        y_array = np.asarray(y_train)
+
+        start = self._clock()
+        rungs = []
+        scores = {}
+        n_used = {}
+        stopped_reason = "completed"
+        last_cost = None
+
+        for rung, n_samples in enumerate(sizes):
+            elapsed = self._clock() - start
+
+            if self.time_budget is not None:
+                remaining_budget = self.time_budget - elapsed
+                if remaining_budget <= 0:
+                    stopped_reason = "budget_exhausted"
+                    break
+                # Skip a rung that the previous one says cannot finish in time.
+                if last_cost is not None:
+                    estimate = last_cost * (n_samples / rungs[-1]["n_samples"]) \
+                        * (len(names) / len(rungs[-1]["candidates"]))
+                    if estimate > remaining_budget:
+                        stopped_reason = "budget_exhausted"
+                        break
+
+            idx = order[:n_samples]
+            candidates = {name: clone(self.models[name]) for name in names}
+
+            rung_start = self._clock()
+            fitted = self._fit_candidates(
+                candidates, X_train[idx], y_array[idx], X_val, y_val
+            )
+            last_cost = self._clock() - rung_start
+
+            rung_scores = {name: fitted[name][1] for name in names}
+            for name in names:
+                self.models[name] = fitted[name][0]
+                scores[name] = rung_scores[name]
+                n_used[name] = int(n_samples)
+
+            ranked = sorted(
+                names,
+                key=lambda n: rung_scores[n],
+                reverse=self.task_type != "regression",
+            )
+            keep = max(1, int(np.ceil(len(names) / self.eta)))
+            promoted = ranked[:keep] if rung < n_rungs - 1 else ranked[:1]
+
+            rungs.append({
+                "rung": rung,
+                "n_samples": int(n_samples),
+                "candidates": names,
+                "scores": {n: float(s) for n, s in rung_scores.items()},
+                "promoted": promoted,
+                "eliminated": [n for n in names if n not in promoted],
+                "elapsed_seconds": last_cost,
+            })
+            print(f"Rung {rung}: {len(names)} candidates on {n_samples} rows, "
+                  f"promoted {promoted}")
+
+            names = promoted
+
+        if not rungs:
+            raise ValueError(
+                f"time_budget={self.time_budget} is too small to score any candidate"
+            )
+
+        # Leader of the deepest rung that finished (promoted is ranked).
+        best_model_name = rungs[-1]["promoted"][0]
+
+        # The deployed model should see the whole training split.
+        final_refit = n_used[best_model_name] < n_train
+        if final_refit:
+            model, score = self._fit_candidates(
+                {best_model_name: clone(self.models[best_model_name])},
+                X_train, y_train, X_val, y_val,
+            )[best_model_name]
+            self.models[best_model_name] = model
+            scores[best_model_name] = score
+            n_used[best_model_name] = int(n_train)
+
+        search_report = {
+            "strategy": "successive_halving",
+            "eta": self.eta,
+            "budget_seconds": self.time_budget,
+            "budget_clock": self.budget_clock,
+            "elapsed_seconds": self._clock() - start,
+            "stopped_reason": stopped_reason,
+            "schedule": [int(n) for n in sizes],
+            "rungs": rungs,
+            "final_refit": final_refit,
+        }
+        return scores, n_used, best_model_name, search_report
+
+    # -----------------------------
+    # K-fold search-and-evaluate
+    # -----------------------------
+    def _cross_validate(self, candidates, X, y):
+        """Score ``candidates`` with k-fold CV; return name -> fold scores and OOF predictions.
+
+        Uses the same splitter as ``cross_val_score`` so EvaluationAgent can
+        report these folds instead of refitting the winner.
+        """
+        y_array = np.asarray(y)
+        n_folds = min(self.cv, X.shape[0])
+        splitter = check_cv(n_folds, y_array, classifier=self.task_type == "classification")
+        folds = list(splitter.split(X, y_array))
+
+        tasks = [
+            (name, fold, clone(model), train_idx, test_idx)
+            for name, model in candidates.items()
+            for fold, (train_idx, test_idx) in enumerate(folds)
+        ]
+
+        if self.n_jobs == 1:
+            outputs = [
+                _fit_fold(
+                    name, fold, model, _as_input(X, model), y_array,
+                    train_idx, test_idx, self.task_type
+                )
+                for name, fold, model, train_idx, test_idx in tasks
+            ]
+        else:
+            pool, threads = self._pool(len(tasks))
+            outputs = pool(
+                delayed(_fit_fold)(
+                    name, fold, _with_threads(name, model, threads), _as_input(X, model), y_array,
+                    train_idx, test_idx, self.task_type
+                )
+                for name, fold, model, train_idx, test_idx in tasks
+            )
+
+        cv_results = {
+            name: {
+                "fold_scores": [None] * len(folds),
+                "oof": np.empty(
+                    len(y_array),
+                    dtype=np.float64 if self.task_type == "regression" else y_array.dtype,
+                ),
+            }
+            for name in candidates
+        }
+        for name, fold, preds, score, timing in outputs:
+            cv_results[name]["fold_scores"][fold] = float(score)
+            cv_results[name]["oof"][folds[fold][1]] = preds
+            recorder.record("automl.fit", model=name, phase="cv", fold=fold, score=float(score), **timing)
+
+        return cv_results, n_folds
+
+    def _select_best(self, results, names=None):
+        names = list(results) if names is None else names
+        if self.task_type == "regression":
+            return min(names, key=lambda x: results[x][self.metric_name])
+        return max(names, key=lambda x: results[x][self.metric_name])
+
+    # -----------------------------
+    # Hyperparameter tuning
+    # -----------------------------
+    def _tune_leaders(self, results, X_train, y_train, X_val, y_val, X=None, y=None, cv_results=None):
+        ranked = sorted(
+            results,
+            key=lambda n: results[n][self.metric_name],
+            reverse=self.task_type != "regression",
+        )
+        families = [n for n in ranked if n in SEARCH_SPACES][: self.tune_top_k]
+
+        tuner = HyperparameterTuner(
+            task_type=self.task_type,
+            n_trials=self.n_trials,
+            time_budget=self.tuning_budget,
+            n_jobs=self.n_jobs,
+        )
+
+        tuning_reports = {}
+        for name in families:
+            base_model = self.models[name]
+            model, score, tuning_report = tuner.tune(
+                name, base_model, _as_input(X_train, base_model), y_train,
+                _as_input(X_val, base_model), y_val
+            )
+
+            # In CV mode the baseline is a k-fold mean, so score the tuned
+            # settings on the same folds before comparing.
+            if model is not None and cv_results is not None:
+                tuned_cv, _ = self._cross_validate({name: model}, X, y)
+                score = float(np.mean(tuned_cv[name]["fold_scores"]))
+            baseline = results[name][self.metric_name]
+            improved = score is not None and (
+                score < baseline if self.task_type == "regression" else score > baseline
+            )
+
+            tuning_report["baseline_score"] = float(baseline)
+            tuning_report["improved"] = bool(improved)
+            tuning_reports[name] = tuning_report
+
+            if improved:
+                self.models[name] = model
+                results[name][self.metric_name] = score
+                results[name]["tuned"] = True
+                if cv_results is not None:
+                    cv_results[name] = tuned_cv[name]
+                    results[name]["fold_scores"] = tuned_cv[name]["fold_scores"]
+
+        return tuning_reports
+
+    @instrumented("automl.run")
     def run(self, X, y):
         print("Training models...")
+        annotate(rows=int(X.shape[0]), columns=int(X.shape[1]))
 
         X_train, X_val, y_train, y_val = train_test_split(
             X, y, test_size=0.2, random_state=42
         )
 
-        results = {}
+        input_formats = None
+        if sp.issparse(X):
+            # Keep CSR for the sparse-native candidates; the others get one
+            # dense copy per split, made lazily by FeatureMatrix.
+            X, X_train, X_val = (
+                FeatureMatrix(sp.csr_matrix(m)) for m in (X, X_train, X_val)
+            )
+            input_formats = {
+                name: "csr" if accepts_sparse(model) else "dense"
+                for name, model in self.models.items()
+            }
 
-        for name, model in self.models.items():
-            model.fit(X_train, y_train)
-            preds = model.predict(X_val)
+        search_report = None
+        cv_results = None
 
-            if self.task_type == "regression":
-                score = root_mean_squared_error(y_val, preds)
-            else:
-                score = accuracy_score(y_val, preds)
+        if self.validation == "cv":
+            cv_results, n_folds = self._cross_validate(dict(self.models), X, y)
+            results = {
+                name: {
+                    self.metric_name: float(np.mean(cv_results[name]["fold_scores"])),
+                    "fold_scores": cv_results[name]["fold_scores"],
+                }
+                for name in self.models
+            }
+            best_model_name = self._select_best(results)
+        elif self.search == "halving":
+            scores, n_used, best_model_name, search_report = self._successive_halving(
+                X_train, y_train, X_val, y_val
+            )
+            # Eliminated candidates keep the score of the last rung they ran in.
+            results = {
+                name: {self.metric_name: scores[name], "n_samples": n_used[name]}
+                for name in self.models
+            }
+        else:
+            fitted = self._fit_candidates(
+                dict(self.models), X_train, y_train, X_val, y_val
+            )
+            for name, (model, _) in fitted.items():
+                self.models[name] = model
 
-            results[name] = {self.metric_name: score}
+            # Build results in candidate order so both paths produce the same
+            # dict and resolve ties the same way.
+            results = {name: {self.metric_name: fitted[name][1]} for name in self.models}
+            best_model_name = self._select_best(results)
 
-        if self.task_type == "regression":
-            best_model_name = min(results, key=lambda x: results[x][self.metric_name])
-        else:
-            best_model_name = max(results, key=lambda x: results[x][self.metric_name])
+        tuning_reports = None
+        if self.tune:
+            tuning_reports = self._tune_leaders(
+                results, X_train, y_train, X_val, y_val, X, y, cv_results
+            )
 
-        best_model = self.models[best_model_name]
+            # Subsample scores from eliminated halving candidates are not
+            # comparable, so only the halving winner competes with tuned models.
+            names = None
+            if self.search == "halving":
+                names = [best_model_name] + [
+                    n for n in results if results[n].get("tuned") and n != best_model_name
+                ]
+            best_model_name = self._select_best(results, names)
 
         os.makedirs("artifacts/model", exist_ok=True)
+        cv_results_path = "artifacts/model/cv_results.pkl"
+
+        if cv_results is not None:
+            # Fold models are throwaway; the deployed winner sees every row.
+            best_model = clone(self.models[best_model_name])
+            best_model.fit(_as_input(X, best_model), y)
+            self.models[best_model_name] = best_model
+
+            joblib.dump(
+                {
+                    "best_model": best_model_name,
+                    "metric": self.metric_name,
+                    "cv_folds": n_folds,
+                    "n_samples": X.shape[0],
+                    "y_hash": joblib.hash(np.asarray(y)),
+                    "fold_scores": {n: r["fold_scores"] for n, r in cv_results.items()},
+                    "oof_predictions": {n: r["oof"] for n, r in cv_results.items()},
+                },
+                cv_results_path,
+            )
+        else:
+            best_model = self.models[best_model_name]
+            # Clean up stale fold results so EvaluationAgent does not reuse them
+            if os.path.exists(cv_results_path):
+                os.remove(cv_results_path)
+
         joblib.dump(best_model, "artifacts/model/model.pkl")
 
         report = {
@@ -83,8 +610,17 @@ class AutoMLAgent:
             "best_model": best_model_name
         }
 
+        if input_formats is not None:
+            report["input_formats"] = input_formats
+        if cv_results is not None:
+            report["validation"] = {"strategy": "cv", "cv_folds": n_folds}
+        if search_report is not None:
+            report["search"] = search_report
+        if tuning_reports is not None:
+            report["tuning"] = tuning_reports
+
         with open("artifacts/model/training_report.json", "w") as f:
             json.dump(report, f, indent=4)
 
         print("✅ AutoML completed. Best model:", best_model_name)
-        return best_model, report
\ No newline at end of file
+        return best_model, report
@@ -0,0 +1,255 @@
+import time
+
+import numpy as np
+from scipy.stats import loguniform, randint, uniform
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, root_mean_squared_error
+from sklearn.model_selection import ParameterSampler, train_test_split
+from xgboost.callback import TrainingCallback
+
+
+# Sampled search spaces for the candidate families worth tuning.
+SEARCH_SPACES = {
+    "RandomForest": {
+        "n_estimators": [100, 200, 300, 400],
+        "max_depth": [None, 5, 10, 20, 30],
+        "min_samples_leaf": randint(1, 10),
+        "max_features": ["sqrt", 0.5, 1.0],
+    },
+    "ExtraTrees": {
+        "n_estimators": [100, 200, 300, 400],
+        "max_depth": [None, 5, 10, 20, 30],
+        "min_samples_leaf": randint(1, 10),
+        "max_features": ["sqrt", 0.5, 1.0],
+    },
+    "GradientBoosting": {
+        "n_estimators": [300, 600],
+        "learning_rate": loguniform(0.01, 0.3),
+        "max_depth": randint(2, 6),
+        "subsample": uniform(0.6, 0.4),
+        "min_samples_leaf": randint(1, 20),
+    },
+    "XGBoost": {
+        "learning_rate": loguniform(0.01, 0.3),
+        "max_depth": randint(3, 10),
+        "subsample": uniform(0.6, 0.4),
+        "colsample_bytree": uniform(0.5, 0.5),
+        "min_child_weight": loguniform(1, 10),
+        "reg_lambda": loguniform(0.1, 10),
+    },
+}
+
+# Families whose n_estimators is grown in stages with warm_start, so a
+# trial can be pruned before it pays for the full ensemble.
+STAGED_FAMILIES = {"RandomForest", "ExtraTrees", "GradientBoosting"}
+
+N_STAGES = 3
+XGB_MAX_ROUNDS = 1000
+XGB_EARLY_STOPPING_ROUNDS = 20
+XGB_REPORT_EVERY = 50
+
+
+def _to_builtin(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class MedianPruner:
+    """Prune a trial whose intermediate loss is worse than the median of the
+    completed trials at the same step (lower loss is better)."""
+
+    def __init__(self, n_startup_trials=3):
+        self.n_startup_trials = n_startup_trials
+        self._completed = {}
+        self._current = {}
+
+    def should_prune(self, step, loss):
+        self._current[step] = loss
+        history = self._completed.get(step, [])
+        if len(history) < self.n_startup_trials:
+            return False
+        return loss > np.median(history)
+
+    def complete(self):
+        for step, loss in self._current.items():
+            self._completed.setdefault(step, []).append(loss)
+        self._current = {}
+
+    def discard(self):
+        self._current = {}
+
+
+class _PruningCallback(TrainingCallback):
+    """Reports the XGBoost eval loss to the pruner every few rounds."""
+
+    def __init__(self, pruner):
+        super().__init__()
+        self.pruner = pruner
+        self.pruned = False
+
+    def after_iteration(self, model, epoch, evals_log):
+        if epoch == 0 or epoch % XGB_REPORT_EVERY:
+            return False
+        metric_log = next(iter(evals_log.values()))
+        loss = next(iter(metric_log.values()))[-1]
+        self.pruned = self.pruner.should_prune(epoch, loss)
+        return self.pruned
+
+
+class HyperparameterTuner:
+    """Random search with early stopping and median pruning for one family.
+
+    Trials are drawn from ``SEARCH_SPACES`` until ``n_trials`` or
+    ``time_budget`` seconds run out. Early stopping and pruning are scored on
+    an inner split carved from the training rows, so the validation split
+    stays untouched for comparing the tuned model with the untuned one.
+    """
+
+    def __init__(self, task_type="regression", n_trials=20, time_budget=None,
+                 n_jobs=1, random_state=42):
+        self.task_type = task_type
+        self.n_trials = n_trials
+        self.time_budget = time_budget
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def _loss(self, y_true, y_pred):
+        # Lower is better for the pruner, whatever the task metric is.
+        if self.task_type == "regression":
+            return root_mean_squared_error(y_true, y_pred)
+        return -accuracy_score(y_true, y_pred)
+
+    def _score(self, y_true, y_pred):
+        if self.task_type == "regression":
+            return root_mean_squared_error(y_true, y_pred)
+        return accuracy_score(y_true, y_pred)
+
+    def _is_better(self, a, b):
+        if b is None:
+            return True
+        return a < b if self.task_type == "regression" else a > b
+
+    # -----------------------------
+    # Single trials
+    # -----------------------------
+    def _run_staged_trial(self, model, X_fit, y_fit, X_es, y_es, pruner):
+        target = model.get_params()["n_estimators"]
+        model.set_params(warm_start=True)
+
+        for stage in range(1, N_STAGES + 1):
+            model.set_params(n_estimators=int(np.ceil(target * stage / N_STAGES)))
+            model.fit(X_fit, y_fit)
+
+            # GradientBoosting stopped itself through n_iter_no_change.
+            if getattr(model, "n_estimators_", model.n_estimators) < model.n_estimators:
+                break
+
+            if stage < N_STAGES:
+                loss = self._loss(y_es, model.predict(X_es))
+                if pruner.should_prune(stage, loss):
+                    return "pruned", {"stage": stage}
+
+        model.set_params(warm_start=False)
+        n_fitted = getattr(model, "n_estimators_", model.n_estimators)
+        return "complete", {"n_estimators": int(n_fitted)}
+
+    def _run_xgb_trial(self, model, X_fit, y_fit, X_es, y_es, pruner):
+        callback = _PruningCallback(pruner)
+        model.set_params(
+            n_estimators=XGB_MAX_ROUNDS,
+            early_stopping_rounds=XGB_EARLY_STOPPING_ROUNDS,
+            callbacks=[callback],
+        )
+        model.fit(X_fit, y_fit, eval_set=[(X_es, y_es)], verbose=False)
+
+        if callback.pruned:
+            return "pruned", {"rounds": int(model.get_booster().num_boosted_rounds())}
+        return "complete", {"n_estimators": int(model.best_iteration) + 1}
+
+    # -----------------------------
+    # Main entry
+    # -----------------------------
+    def tune(self, family, base_model, X_train, y_train, X_val, y_val):
+        if family not in SEARCH_SPACES:
+            raise ValueError(f"No search space for model family: {family}")
+
+        budget = f", {self.time_budget}s budget" if self.time_budget is not None else ""
+        print(f"🎛️ Tuning {family} ({self.n_trials} trials{budget})")
+
+        X_fit, X_es, y_fit, y_es = train_test_split(
+            X_train, y_train, test_size=0.1, random_state=self.random_state
+        )
+
+        sampler = ParameterSampler(
+            SEARCH_SPACES[family], n_iter=self.n_trials, random_state=self.random_state
+        )
+        pruner = MedianPruner()
+
+        trials = []
+        best = None
+        start = time.perf_counter()
+
+        for params in sampler:
+            if self.time_budget is not None and time.perf_counter() - start >= self.time_budget:
+                break
+
+            params = {k: _to_builtin(v) for k, v in params.items()}
+            model = clone(base_model).set_params(**params)
+            if family in ("RandomForest", "ExtraTrees", "XGBoost"):
+                model.set_params(n_jobs=self.n_jobs)
+            if family == "GradientBoosting":
+                model.set_params(n_iter_no_change=10, validation_fraction=0.1)
+
+            trial_start = time.perf_counter()
+            if family == "XGBoost":
+                status, info = self._run_xgb_trial(model, X_fit, y_fit, X_es, y_es, pruner)
+            else:
+                status, info = self._run_staged_trial(model, X_fit, y_fit, X_es, y_es, pruner)
+
+            trial = {"params": params, "status": status, **info}
+
+            if status == "complete":
+                pruner.complete()
+                score = self._score(y_val, model.predict(X_val))
+                trial["score"] = float(score)
+                if self._is_better(score, best and best["score"]):
+                    best = trial
+            else:
+                pruner.discard()
+
+            trial["seconds"] = time.perf_counter() - trial_start
+            trials.append(trial)
+
+        elapsed = time.perf_counter() - start
+
+        report = {
+            "family": family,
+            "trial_budget": self.n_trials,
+            "time_budget_seconds": self.time_budget,
+            "n_trials": len(trials),
+            "n_complete": sum(t["status"] == "complete" for t in trials),
+            "n_pruned": sum(t["status"] == "pruned" for t in trials),
+            "elapsed_seconds": elapsed,
+            "trials_per_second": len(trials) / elapsed if elapsed > 0 else None,
+            "best_params": None,
+            "trials": trials,
+        }
+
+        if best is None:
+            return None, None, report
+
+        # Refit the winning settings on the whole training split. Boosters
+        # are frozen at the early-stopped round count so the saved model no
+        # longer needs an eval_set (EvaluationAgent refits it in CV).
+        final_params = dict(best["params"])
+        if family in ("XGBoost", "RandomForest", "ExtraTrees"):
+            final_params["n_estimators"] = best["n_estimators"]
+        model = clone(base_model).set_params(**final_params)
+        if family == "GradientBoosting":
+            model.set_params(n_iter_no_change=10, validation_fraction=0.1)
+
+        model.fit(X_train, y_train)
+        score = self._score(y_val, model.predict(X_val))
+
+        report["best_params"] = final_params
+        report["best_score"] = float(score)
+        return model, score, report
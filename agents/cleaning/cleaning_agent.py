@@ -1,7 +1,80 @@
+import numpy as np
 import pandas as pd
 import json
 import os
-from typing import Dict, List
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+
+from mlops.sketches import (
+    FrequencySketch,
+    HyperLogLog,
+    QuantileSketch,
+    RowHashSet,
+)
+from mlops.instrumentation import annotate, instrumented
+from mlops.storage import FrameWriter, iter_frames, read_frame, write_frame
+
+
+def _fits_float32(values: pd.Series) -> bool:
+    """True when every value survives the float64 -> float32 round trip."""
+    values = values.astype(np.float64)
+    return bool(((values.astype(np.float32).astype(np.float64) == values) | values.isnull()).all())
+
+
+def _smallest_int_dtype(lo, hi):
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return np.int64
+
+
+def _casts_exactly(values: pd.Series, dtype) -> bool:
+    """True when ``values`` survive a round trip through ``dtype``."""
+    try:
+        back = values.astype(dtype).astype(values.dtype)
+    except (TypeError, ValueError, OverflowError):
+        return False
+    return bool(((back == values) | (back.isnull() & values.isnull())).all())
+
+
+def match_dtypes(df: pd.DataFrame, reference: pd.DataFrame):
+    """(df, reference) with every shared column on one dtype, so the two
+    concat without pandas widening compacted columns back to
+    int64/float64/object.
+
+    A column of ``df`` takes the reference dtype when its values fit it
+    exactly; otherwise both move to the narrowest type that holds both.
+    Categorical columns share the union of their categories.
+    """
+    df = df.copy()
+    reference = reference.copy(deep=False)
+
+    for col in df.columns.intersection(reference.columns):
+        values, target = df[col], reference[col].dtype
+
+        if isinstance(target, pd.CategoricalDtype):
+            new = pd.Index(values.dropna().unique()).difference(target.categories)
+            dtype = pd.CategoricalDtype(target.categories.append(new)) if len(new) else target
+        elif _casts_exactly(values, target):
+            dtype = target
+        elif pd.api.types.is_integer_dtype(target) and pd.api.types.is_integer_dtype(values):
+            dtype = np.promote_types(target, _smallest_int_dtype(values.min(), values.max()))
+        else:
+            try:
+                dtype = np.result_type(target, values.dtype)
+            except TypeError:
+                dtype = np.dtype(object)
+            # float32 when both sides survive it, as compaction would pick.
+            if dtype == np.float64 and _casts_exactly(values, np.float32) \
+                    and _casts_exactly(reference[col], np.float32):
+                dtype = np.dtype(np.float32)
+
+        df[col] = values.astype(dtype)
+        if dtype != target:
+            reference[col] = reference[col].astype(dtype)
+
+    return df, reference
 
 
 class CleaningAgent:
@@ -10,12 +83,22 @@ class CleaningAgent:
         max_missing_ratio: float = 0.4,
         max_unique_ratio: float = 0.95,
         outlier_iqr_multiplier: float = 1.5,
+        chunksize: Optional[int] = None,
+        compact_dtypes: bool = True,
+        max_category_ratio: float = 0.5,
     ):
         print("🧼 CleaningAgent initialized (v3 – production-grade)")
 
         self.max_missing_ratio = max_missing_ratio
         self.max_unique_ratio = max_unique_ratio
         self.outlier_iqr_multiplier = outlier_iqr_multiplier
+        # When set, the CSV is streamed in chunks of this many rows instead of
+        # being loaded whole (for files larger than memory).
+        self.chunksize = chunksize
+        # Downcast numbers and store low-cardinality text as category
+        # (at most max_category_ratio distinct values per row).
+        self.compact_dtypes = compact_dtypes
+        self.max_category_ratio = max_category_ratio
 
     # -----------------------------
     # Validation (fail fast)
@@ -30,13 +113,172 @@ class CleaningAgent:
         if df.isnull().all().any():
             raise ValueError("❌ One or more columns are fully null")
 
+    # -----------------------------
+    # Profiling
+    # -----------------------------
+    def _profile_fill_values(
+        self,
+        df: pd.DataFrame,
+        null_counts: pd.Series,
+        numerical_cols: List[str],
+        categorical_cols: List[str],
+    ) -> Dict:
+        """Medians and modes for all columns that need filling, in batched calls.
+
+        Only columns that actually contain nulls get a fill value, so the
+        median/mode work is skipped for complete columns.
+        """
+        has_nulls = null_counts[null_counts > 0].index
+
+        num_to_fill = [c for c in numerical_cols if c in has_nulls]
+        cat_to_fill = [c for c in categorical_cols if c in has_nulls]
+
+        fill_values = {}
+
+        if num_to_fill:
+            fill_values.update(df[num_to_fill].median().to_dict())
+
+        if cat_to_fill:
+            # DataFrame.mode pads columns with fewer modes with NaN; row 0 is
+            # the smallest mode, exactly what Series.mode()[0] returns.
+            modes = df[cat_to_fill].mode().iloc[0]
+            for col in cat_to_fill:
+                fill_values[col] = "unknown" if pd.isna(modes[col]) else modes[col]
+
+        return {
+            "missing_before": int(null_counts.sum()),
+            "fill_values": fill_values,
+        }
+
+    # -----------------------------
+    # Outliers
+    # -----------------------------
+    def outlier_bounds(self, df: pd.DataFrame, numerical_cols: List[str]):
+        """IQR capping bounds (lower, upper Series) of the numeric columns
+        whose IQR is positive."""
+        if not numerical_cols:
+            empty = pd.Series(dtype="float64")
+            return empty, empty
+
+        # Both quartiles for every numeric column in a single call.
+        quartiles = df[numerical_cols].quantile([0.25, 0.75])
+        Q1 = quartiles.loc[0.25]
+        Q3 = quartiles.loc[0.75]
+        IQR = Q3 - Q1
+
+        capped_cols = IQR[IQR > 0].index.tolist()
+
+        lower = Q1[capped_cols] - self.outlier_iqr_multiplier * IQR[capped_cols]
+        upper = Q3[capped_cols] + self.outlier_iqr_multiplier * IQR[capped_cols]
+        return lower, upper
+
+    @staticmethod
+    def cap_outliers(df: pd.DataFrame, lower: pd.Series, upper: pd.Series) -> Dict:
+        """Clip ``df`` in place to the bounds; returns the outliers per column."""
+        capped_cols = lower.index.tolist()
+        values = df[capped_cols]
+        outliers = (values.lt(lower, axis=1) | values.gt(upper, axis=1)).sum()
+
+        summary = {}
+        for col in capped_cols:
+            df[col] = values[col].clip(lower[col], upper[col])
+            summary[col] = int(outliers[col])
+        return summary
+
+    # -----------------------------
+    # Dtype compaction
+    # -----------------------------
+    @staticmethod
+    def _normalize_categorical(values: pd.Series) -> pd.Series:
+        """strip/lower a text column through its categories, not row by row.
+
+        Categories that collapse onto the same normalized string (" A" and
+        "a") are merged by remapping the codes.
+        """
+        categorical = values.astype("category")
+        normalized = categorical.cat.categories.astype(str).str.strip().str.lower()
+        inverse, categories = pd.factorize(normalized)
+
+        codes = categorical.cat.codes.to_numpy()
+        if (codes < 0).any():
+            # Missing values become "nan", as astype(str) would render them.
+            categories = categories.append(pd.Index(["nan"])).unique()
+            inverse = categories.get_indexer(normalized)
+            codes = np.where(codes < 0, categories.get_loc("nan"), inverse[codes])
+        else:
+            codes = inverse[codes]
+
+        return pd.Series(
+            pd.Categorical.from_codes(codes, categories=categories),
+            index=values.index,
+            name=values.name,
+        )
+
+    @staticmethod
+    def _downcast_numeric(values: pd.Series) -> pd.Series:
+        """Smallest integer width that holds the values; float32 only when
+        every value survives the float64 -> float32 round trip exactly."""
+        if pd.api.types.is_integer_dtype(values):
+            return pd.to_numeric(values, downcast="integer")
+
+        if values.dtype == np.float64 and _fits_float32(values):
+            return values.astype(np.float32)
+
+        return values
+
+    def _compact(self, df: pd.DataFrame, nunique: pd.Series) -> Dict:
+        """Steps 8a/8b: normalize text and shrink dtypes in place; returns the
+        per-column memory report."""
+        memory_before = df.memory_usage(index=False, deep=True)
+        dtypes_before = df.dtypes.astype(str)
+
+        for col in df.select_dtypes(include="object").columns:
+            if self.compact_dtypes and nunique[col] <= self.max_category_ratio * len(df):
+                df[col] = self._normalize_categorical(df[col])
+            else:
+                df[col] = df[col].astype(str).str.strip().str.lower()
+
+        if self.compact_dtypes:
+            for col in df.select_dtypes(include="number").columns:
+                df[col] = self._downcast_numeric(df[col])
+
+        memory_after = df.memory_usage(index=False, deep=True)
+
+        return {
+            "bytes_before": int(memory_before.sum()),
+            "bytes_after": int(memory_after.sum()),
+            "columns": {
+                col: {
+                    "dtype_before": dtypes_before[col],
+                    "dtype_after": str(df[col].dtype),
+                    "bytes_before": int(memory_before[col]),
+                    "bytes_after": int(memory_after[col]),
+                }
+                for col in df.columns
+            },
+        }
+
     # -----------------------------
     # Main entry
     # -----------------------------
-    def run(self, raw_data_path: str, output_path: str) -> str:
+    @instrumented("cleaning.run")
+    def run(
+        self,
+        raw_data_path: str,
+        output_path: str,
+        export_csv_path: Optional[str] = None,
+    ) -> str:
+        """Clean ``raw_data_path`` into ``output_path``.
+
+        The output format follows the extension (Parquet, Arrow IPC or CSV,
+        see mlops.storage); ``export_csv_path`` additionally writes a CSV copy.
+        """
+        if self.chunksize:
+            return self._run_chunked(raw_data_path, output_path, export_csv_path)
+
         print("🧹 Starting advanced data cleaning...")
 
-        df = pd.read_csv(raw_data_path)
+        df = read_frame(raw_data_path)
 
         self._validate_dataframe(df)
 
@@ -63,10 +305,12 @@ class CleaningAgent:
         # -----------------------------
         # 3. Drop high-missing columns
         # -----------------------------
-        high_missing_cols: List[str] = []
-        for col in df.columns:
-            if df[col].isnull().mean() > self.max_missing_ratio:
-                high_missing_cols.append(col)
+        # Null counts for every column in one pass; reused for step 4.
+        null_counts = df.isnull().sum()
+        null_ratio = null_counts / len(df)
+        high_missing_cols: List[str] = null_ratio[
+            null_ratio > self.max_missing_ratio
+        ].index.tolist()
 
         df = df.drop(columns=high_missing_cols)
         report["high_missing_columns_dropped"] = high_missing_cols
@@ -78,36 +322,33 @@ class CleaningAgent:
         # -----------------------------
         # 4. Handle missing values (column-aware)
         # -----------------------------
-        missing_before = int(df.isnull().sum().sum())
+        profile = self._profile_fill_values(
+            df, null_counts[df.columns], numerical_cols, categorical_cols
+        )
 
-        for col in numerical_cols:
-            df[col] = df[col].fillna(df[col].median())
+        report["missing_values_before"] = profile["missing_before"]
 
-        for col in categorical_cols:
-            mode = df[col].mode()
-            df[col] = df[col].fillna(mode[0] if not mode.empty else "unknown")
+        filled_cols = list(profile["fill_values"])
+        df = df.fillna(profile["fill_values"])
 
-        missing_after = int(df.isnull().sum().sum())
-        report["missing_values_before"] = missing_before
-        report["missing_values_after"] = missing_after
+        report["missing_values_after"] = int(df[filled_cols].isnull().sum().sum())
 
         # -----------------------------
         # 5. Remove constant columns
         # -----------------------------
-        constant_columns = [
-            col for col in df.columns if df[col].nunique(dropna=False) <= 1
-        ]
+        # One nunique pass serves both the constant and the ID-like checks:
+        # after filling there are no nulls left, so dropna makes no difference.
+        nunique = df.nunique(dropna=False)
+
+        constant_columns = nunique[nunique <= 1].index.tolist()
         df = df.drop(columns=constant_columns)
         report["constant_columns_removed"] = constant_columns
 
         # -----------------------------
         # 6. Detect & drop ID-like columns
         # -----------------------------
-        id_like_columns = []
-        for col in df.columns:
-            unique_ratio = df[col].nunique() / len(df)
-            if unique_ratio > self.max_unique_ratio:
-                id_like_columns.append(col)
+        unique_ratio = nunique[df.columns] / len(df)
+        id_like_columns = unique_ratio[unique_ratio > self.max_unique_ratio].index.tolist()
 
         df = df.drop(columns=id_like_columns)
         report["id_like_columns_removed"] = id_like_columns
@@ -118,31 +359,18 @@ class CleaningAgent:
         # -----------------------------
         # 7. Outlier capping (IQR)
         # -----------------------------
-        outlier_summary = {}
-
-        for col in numerical_cols:
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-
-            if IQR <= 0:
-                continue
-
-            lower = Q1 - self.outlier_iqr_multiplier * IQR
-            upper = Q3 + self.outlier_iqr_multiplier * IQR
-
-            outliers = int(((df[col] < lower) | (df[col] > upper)).sum())
-            df[col] = df[col].clip(lower, upper)
-
-            outlier_summary[col] = outliers
+        lower, upper = self.outlier_bounds(df, numerical_cols)
+        outlier_summary = self.cap_outliers(df, lower, upper)
 
         report["outliers_capped"] = outlier_summary
 
         # -----------------------------
-        # 8. Normalize categorical strings
+        # 8. Normalize categorical strings and compact dtypes
         # -----------------------------
-        for col in df.select_dtypes(include="object").columns:
-            df[col] = df[col].astype(str).str.strip().str.lower()
+        # Text is normalized through the categories of low-cardinality
+        # columns and row by row only for free-text ones; numbers are then
+        # downcast to the narrowest width that keeps every value.
+        report["memory"] = self._compact(df, nunique)
 
         # -----------------------------
         # 9. Final stats
@@ -154,13 +382,332 @@ class CleaningAgent:
         # -----------------------------
         # 10. Persist outputs
         # -----------------------------
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        os.makedirs("reports/cleaning", exist_ok=True)
+        write_frame(df, output_path)
+        if export_csv_path:
+            write_frame(df, export_csv_path)
+
+        self._save_report(report)
+        annotate(rows=report["rows_after"], columns=report["columns_after"])
 
-        df.to_csv(output_path, index=False)
+        print("✅ Advanced cleaning completed successfully")
+        return output_path
+
+    def _save_report(self, report: Dict):
+        os.makedirs("reports/cleaning", exist_ok=True)
 
         with open("reports/cleaning/cleaning_report.json", "w") as f:
             json.dump(report, f, indent=4)
 
-        print("✅ Advanced cleaning completed successfully")
+    # -----------------------------
+    # Out-of-core mode
+    # -----------------------------
+    def _collect_chunk_stats(self, raw_data_path: str) -> Dict:
+        """Pass 1: stream the CSV once and collect mergeable per-column stats.
+
+        Duplicate rows are found through a set of 64-bit row hashes (8 bytes
+        per distinct row) and excluded from the statistics, like the in-memory
+        path which profiles after drop_duplicates. Unlike the sketches, the
+        hash set and the list of duplicate positions (8 bytes per duplicate)
+        grow with the row count, so they bound how large an input fits in
+        memory: roughly 8 bytes per row.
+        """
+        stats: Dict = {
+            "columns": None,
+            "rows_before": 0,
+            "duplicate_positions": [],
+        }
+        row_hashes = RowHashSet()
+
+        for chunk in iter_frames(raw_data_path, self.chunksize):
+            if stats["columns"] is None:
+                columns = list(chunk.columns)
+                stats["columns"] = columns
+                stats["non_null_raw"] = pd.Series(0, index=columns)
+                stats["null_counts"] = pd.Series(0, index=columns)
+                stats["seen_numeric"] = set()
+                stats["seen_text"] = set()
+                stats["text_dtypes"] = {c: set() for c in columns}
+                stats["float_cols"] = set()
+                stats["inexact_float32"] = set()
+                stats["quantiles"] = {c: QuantileSketch() for c in columns}
+                stats["distinct"] = {c: HyperLogLog() for c in columns}
+                stats["frequencies"] = {c: FrequencySketch() for c in columns}
+
+            offset = stats["rows_before"]
+            stats["rows_before"] += len(chunk)
+            stats["non_null_raw"] += chunk.notnull().sum()
+
+            # Hash numbers as float64 and everything else as text, so an int
+            # chunk and a float chunk (or a bool chunk and an object chunk) of
+            # the same column still agree on duplicate rows.
+            numeric = chunk.select_dtypes(include=["number"]).columns
+            hashed_as = {c: "float64" if c in numeric else str for c in chunk.columns}
+            hashes = pd.util.hash_pandas_object(chunk.astype(hashed_as), index=False).to_numpy()
+            duplicate = row_hashes.add(hashes)
+            stats["duplicate_positions"].append(np.flatnonzero(duplicate) + offset)
+
+            chunk = chunk[~duplicate]
+            stats["null_counts"] += chunk.isnull().sum()
+
+            for col in stats["columns"]:
+                values = chunk[col].dropna()
+                if values.empty:
+                    # An all-null chunk says nothing about the column's type.
+                    continue
+
+                stats["distinct"][col].update(values)
+                if col in numeric:
+                    stats["seen_numeric"].add(col)
+                    stats["quantiles"][col].update(values)
+                    if pd.api.types.is_float_dtype(chunk[col]):
+                        stats["float_cols"].add(col)
+                    if col not in stats["inexact_float32"] and not _fits_float32(values):
+                        stats["inexact_float32"].add(col)
+                else:
+                    stats["seen_text"].add(col)
+                    stats["text_dtypes"][col].add(str(chunk[col].dtype))
+                    stats["frequencies"][col].update(values)
+
+        return stats
+
+    def _run_chunked(
+        self,
+        raw_data_path: str,
+        output_path: str,
+        export_csv_path: Optional[str] = None,
+    ) -> str:
+        """Two-pass streaming version of ``run`` with memory bounded by chunksize.
+
+        Pass 1 collects null counts, quantile sketches, HyperLogLog
+        cardinalities and row hashes; the cleaning rules are fitted from those
+        and pass 2 streams the chunks through them into ``output_path``.
+        Medians, quartiles and high cardinalities are approximate once a
+        column outgrows its sketch. Columns whose inferred type differs between
+        chunks are treated as text.
+
+        Memory is bounded by chunksize except for duplicate detection, whose
+        row hashes and duplicate positions take about 8 bytes per input row
+        (see ``_collect_chunk_stats``).
+        """
+        print(f"🧹 Starting chunked data cleaning ({self.chunksize} rows per chunk)...")
+
+        stats = self._collect_chunk_stats(raw_data_path)
+        columns = stats["columns"]
+
+        if not columns or stats["rows_before"] == 0:
+            raise ValueError("❌ Dataset is empty")
+
+        if len(columns) < 2:
+            raise ValueError("❌ Dataset must contain at least 2 columns")
+
+        if (stats["non_null_raw"] == 0).any():
+            raise ValueError("❌ One or more columns are fully null")
+
+        duplicate_positions = np.concatenate(stats["duplicate_positions"])
+        n_rows = stats["rows_before"] - len(duplicate_positions)
+
+        report: Dict = {}
+        report["rows_before"] = stats["rows_before"]
+        report["columns_before"] = len(columns)
+        report["duplicates_removed"] = int(len(duplicate_positions))
+
+        # Numbers in some chunks and text in others, or text read as bool in
+        # one chunk and object in another: all read back as strings.
+        mixed_cols = (stats["seen_numeric"] & stats["seen_text"]) | {
+            c for c, dtypes in stats["text_dtypes"].items() if len(dtypes) > 1
+        }
+        numerical_cols = [
+            c for c in columns if c in stats["seen_numeric"] and c not in mixed_cols
+        ]
+        categorical_cols = [c for c in columns if c not in numerical_cols]
+
+        report["numerical_columns"] = numerical_cols
+        report["categorical_columns"] = categorical_cols
+
+        # High-missing columns
+        null_counts = stats["null_counts"]
+        null_ratio = null_counts / n_rows
+        high_missing_cols = null_ratio[null_ratio > self.max_missing_ratio].index.tolist()
+        report["high_missing_columns_dropped"] = high_missing_cols
+
+        kept = [c for c in columns if c not in high_missing_cols]
+        numerical_cols = [c for c in numerical_cols if c in kept]
+
+        # Fill values
+        fill_values = {}
+        for col in kept:
+            if null_counts[col] == 0:
+                continue
+            if col in numerical_cols:
+                fill_values[col] = stats["quantiles"][col].quantile(0.5)
+            else:
+                mode = stats["frequencies"][col].mode()
+                if mode is None:
+                    fill_values[col] = "unknown"
+                else:
+                    fill_values[col] = str(mode) if col in mixed_cols else mode
+
+        report["missing_values_before"] = int(null_counts[kept].sum())
+
+        # Cardinality after filling: the fill value adds one distinct value
+        # unless it was already present.
+        nunique = {}
+        for col in kept:
+            count = stats["distinct"][col].count()
+            if col in fill_values and not stats["distinct"][col].contains(fill_values[col]):
+                count += 1
+            nunique[col] = count
+
+        constant_columns = [c for c in kept if nunique[c] <= 1]
+        kept = [c for c in kept if c not in constant_columns]
+
+        id_like_columns = [c for c in kept if nunique[c] / n_rows > self.max_unique_ratio]
+        kept = [c for c in kept if c not in id_like_columns]
+        numerical_cols = [c for c in numerical_cols if c in kept]
+
+        # IQR bounds from the filled distribution (fill value weighted by its
+        # null count).
+        bounds = {}
+        float_out = set()
+        for col in numerical_cols:
+            sketch = stats["quantiles"][col]
+            if col in fill_values:
+                sketch.add_weighted(fill_values[col], null_counts[col])
+
+            Q1, Q3 = sketch.quantile([0.25, 0.75])
+            IQR = Q3 - Q1
+
+            if col in stats["float_cols"] or stats["non_null_raw"][col] < stats["rows_before"]:
+                float_out.add(col)
+
+            if IQR <= 0:
+                continue
+
+            lower = Q1 - self.outlier_iqr_multiplier * IQR
+            upper = Q3 + self.outlier_iqr_multiplier * IQR
+            bounds[col] = (lower, upper)
+            # Series.clip only upcasts an int column when it actually writes a
+            # non-integral bound into it; keep the output dtype consistent
+            # across chunks by deciding that once from the global min/max.
+            if (sketch.min < lower and not float(lower).is_integer()) or (
+                sketch.max > upper and not float(upper).is_integer()
+            ):
+                float_out.add(col)
+
+        # Output dtypes are fixed up front so every chunk is written with the
+        # same schema: integers get the width of their global (clipped)
+        # range, floats go to float32 only if no value would change.
+        output_dtypes = {}
+        for col in numerical_cols:
+            sketch = stats["quantiles"][col]
+            if not self.compact_dtypes:
+                output_dtypes[col] = np.float64 if col in float_out else np.int64
+            elif col in float_out:
+                # Besides the raw values, the fill value and any bound that
+                # clipping writes end up in the column.
+                written = [fill_values[col]] if col in fill_values else []
+                if col in bounds:
+                    lower, upper = bounds[col]
+                    if sketch.min < lower:
+                        written.append(lower)
+                    if sketch.max > upper:
+                        written.append(upper)
+
+                exact = col not in stats["inexact_float32"] and _fits_float32(
+                    pd.Series(written, dtype="float64")
+                )
+                output_dtypes[col] = np.float32 if exact else np.float64
+            else:
+                lo, hi = sketch.min, sketch.max
+                if col in bounds:
+                    lo, hi = max(lo, bounds[col][0]), min(hi, bounds[col][1])
+                output_dtypes[col] = _smallest_int_dtype(lo, hi)
+
+        drop_cols = high_missing_cols + constant_columns + id_like_columns
+        filled_cols = [c for c in fill_values if c in kept]
+
+        # Pass 2: apply the rules chunk by chunk
+        outlier_counts = {col: 0 for col in bounds}
+        missing_after = 0
+        position = 0
+        memory_before = pd.Series(0, index=kept)
+        memory_after = pd.Series(0, index=kept)
+        dtypes_before = {}
+
+        with ExitStack() as stack:
+            writers = [stack.enter_context(FrameWriter(output_path))]
+            if export_csv_path:
+                writers.append(stack.enter_context(FrameWriter(export_csv_path)))
+
+            chunks = iter_frames(
+                raw_data_path, self.chunksize, dtype={c: str for c in mixed_cols}
+            )
+            for chunk in chunks:
+                start = position
+                position += len(chunk)
+
+                # duplicate_positions is sorted, so this chunk's duplicates
+                # are one slice of it.
+                first, last = np.searchsorted(duplicate_positions, [start, position])
+                if last > first:
+                    keep = np.ones(len(chunk), dtype=bool)
+                    keep[duplicate_positions[first:last] - start] = False
+                    chunk = chunk[keep]
+                chunk = chunk.drop(columns=drop_cols)
+                chunk = chunk.fillna({c: fill_values[c] for c in filled_cols})
+                missing_after += int(chunk[filled_cols].isnull().sum().sum())
+
+                for col in numerical_cols:
+                    chunk[col] = chunk[col].astype("float64" if col in float_out else "int64")
+
+                for col, (lower, upper) in bounds.items():
+                    values = chunk[col]
+                    outlier_counts[col] += int(((values < lower) | (values > upper)).sum())
+                    chunk[col] = values.clip(lower, upper)
+
+                memory_before += chunk.memory_usage(index=False, deep=True)
+                # Every dtype a column had across the chunks, in order seen.
+                for col, dtype in chunk.dtypes.astype(str).items():
+                    dtypes_before.setdefault(col, [])
+                    if dtype not in dtypes_before[col]:
+                        dtypes_before[col].append(dtype)
+
+                # Text stays object here: categories differ between chunks
+                # and Arrow IPC files cannot replace a dictionary mid-file.
+                for col in chunk.select_dtypes(include="object").columns:
+                    chunk[col] = chunk[col].astype(str).str.strip().str.lower()
+
+                chunk = chunk.astype(output_dtypes)
+                memory_after += chunk.memory_usage(index=False, deep=True)
+
+                for writer in writers:
+                    writer.write(chunk)
+
+        report["missing_values_after"] = missing_after
+        report["constant_columns_removed"] = constant_columns
+        report["id_like_columns_removed"] = id_like_columns
+        report["outliers_capped"] = outlier_counts
+        report["memory"] = {
+            "bytes_before": int(memory_before.sum()),
+            "bytes_after": int(memory_after.sum()),
+            "columns": {
+                col: {
+                    "dtype_before": " / ".join(dtypes_before[col]),
+                    "dtype_after": (
+                        np.dtype(output_dtypes[col]).name if col in output_dtypes else "object"
+                    ),
+                    "bytes_before": int(memory_before[col]),
+                    "bytes_after": int(memory_after[col]),
+                }
+                for col in kept
+            },
+        }
+        report["rows_after"] = int(n_rows)
+        report["columns_after"] = len(kept)
+        report["final_columns"] = kept
+
+        self._save_report(report)
+        annotate(rows=report["rows_after"], columns=report["columns_after"])
+
+        print("✅ Chunked cleaning completed successfully")
         return output_path
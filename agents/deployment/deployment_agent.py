@@ -1,56 +1,78 @@
 import os
-import shutil
 import json
 import joblib
 
+from mlops import flat_forest
+from mlops.instrumentation import instrumented
+from mlops.registry import ModelRegistry
+
 class DeploymentAgent:
-    def __init__(self):
+    def __init__(self, registry_root="models", keep_versions=None):
         print("📦 DeploymentAgent initialized")
-        self.deployment_dir = "models/latest"
+        self.registry = ModelRegistry(registry_root)
+        # Every version stays available for rollback unless this is set;
+        # then older versions beyond it are deleted after each deploy.
+        self.keep_versions = keep_versions
 
+    @instrumented("deployment.deploy")
     def deploy(self, model_path="artifacts/model/model.pkl", 
                pipeline_path="artifacts/feature_engineering/pipeline.pkl",
                metadata_path="artifacts/feature_engineering/metadata.json",
-               target_encoder_path="artifacts/feature_engineering/target_encoder.pkl"):
+               target_encoder_path="artifacts/feature_engineering/target_encoder.pkl",
+               training_data_path=None,
+               drift_profile_path=None):
         print("Starting deployment packaging...")
-        
-        # Ensure deployment directory exists
-        os.makedirs(self.deployment_dir, exist_ok=True)
-        
-        # Define target paths
-        target_model = os.path.join(self.deployment_dir, "model.pkl")
-        target_pipeline = os.path.join(self.deployment_dir, "pipeline.pkl")
-        target_metadata = os.path.join(self.deployment_dir, "metadata.json")
-        target_encoder = os.path.join(self.deployment_dir, "target_encoder.pkl")
-        
-        # Copy artifacts
+
+        files = {}
+        for name, path in [
+            ("model.pkl", model_path),
+            ("pipeline.pkl", pipeline_path),
+            ("metadata.json", metadata_path),
+        ]:
+            if os.path.exists(path):
+                files[name] = path
+            else:
+                print(f"Warning: {name} not found at {path}")
+
+        # Forests also ship as flat arrays the API can memory-map, so every
+        # worker shares one copy of the trees instead of unpickling its own.
         if os.path.exists(model_path):
-            shutil.copy2(model_path, target_model)
-            print(f"Copied model to {target_model}")
-        else:
-            print(f"Warning: Model not found at {model_path}")
-
-        if os.path.exists(pipeline_path):
-            shutil.copy2(pipeline_path, target_pipeline)
-            print(f"Copied pipeline to {target_pipeline}")
-        else:
-            print(f"Warning: Pipeline not found at {pipeline_path}")
-            
-        if os.path.exists(metadata_path):
-            shutil.copy2(metadata_path, target_metadata)
-            print(f"Copied metadata to {target_metadata}")
-        else:
-            print(f"Warning: Metadata not found at {metadata_path}")
-            
+            model = joblib.load(model_path)
+            if flat_forest.supports(model):
+                export_dir = os.path.dirname(model_path)
+                for path in flat_forest.FlatForest.from_estimator(model).save(export_dir):
+                    files[os.path.basename(path)] = path
+                print("Exported flat forest arrays for memory-mapped serving")
+
+        # Optional: only classification has a target encoder.
         if os.path.exists(target_encoder_path):
-            shutil.copy2(target_encoder_path, target_encoder)
-            print(f"Copied target encoder to {target_encoder}")
-        else:
-            if os.path.exists(target_encoder):
-                os.remove(target_encoder)
-
-        print("✅ Deployment bundle created successfully.")
-        return self.deployment_dir
+            files["target_encoder.pkl"] = target_encoder_path
+
+        # Cleaned training rows, kept next to the model so incremental
+        # retraining can fall back to a full refit on old + new data.
+        if training_data_path is not None and os.path.exists(training_data_path):
+            files["training_data" + os.path.splitext(training_data_path)[1]] = training_data_path
+
+        # Reference statistics the API compares live traffic against.
+        if drift_profile_path is not None and os.path.exists(drift_profile_path):
+            files["drift_profile.json"] = drift_profile_path
+
+        info = {}
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            info["target_column"] = metadata.get("target_column")
+
+        # A new immutable version; the API picks it up once CURRENT points at it.
+        # Identical files (a fully cached rerun) keep the live version.
+        version = self.registry.publish(files, info=info)
+        if self.keep_versions is not None:
+            removed = self.registry.prune(keep=self.keep_versions)
+            if removed:
+                print(f"Pruned old model versions: {removed}")
+
+        print(f"✅ Deployment bundle {version} created successfully.")
+        return self.registry.path(version)
 
 if __name__ == "__main__":
     agent = DeploymentAgent()
@@ -2,21 +2,46 @@ import os
 import json
 import joblib
 import numpy as np
+import scipy.sparse as sp
 
+from sklearn.metrics import root_mean_squared_error, accuracy_score
 from sklearn.model_selection import cross_val_score
 
+from agents.automl.automl_agent import accepts_sparse
+from mlops.instrumentation import annotate, instrumented
+
 
 class EvaluationAgent:
-    def __init__(self, task_type="regression"):
+    def __init__(self, task_type="regression", n_jobs=None):
         print(f"📊 EvaluationAgent initialized ({task_type})")
         self.task_type = task_type
+        # Folds that still have to be refit run on this many joblib workers.
+        self.n_jobs = n_jobs
+        self.cv_results_path = "artifacts/model/cv_results.pkl"
+
+    def _load_cv_results(self, y, n_samples, effective_cv):
+        """Fold scores AutoMLAgent stored for exactly this X/y, if any."""
+        if not os.path.exists(self.cv_results_path):
+            return None
+
+        cv_results = joblib.load(self.cv_results_path)
+
+        if (
+            cv_results["n_samples"] != n_samples
+            or cv_results["cv_folds"] != effective_cv
+            or cv_results["y_hash"] != joblib.hash(np.asarray(y))
+        ):
+            print("Stored AutoML folds do not match this data, refitting")
+            return None
+
+        return cv_results
 
+    @instrumented("evaluation.run")
     def run(self, X, y, cv=5):
         print("Running cross-validation...")
 
-        model = joblib.load("artifacts/model/model.pkl")
-
         n_samples = X.shape[0]
+        annotate(rows=int(n_samples), columns=int(X.shape[1]))
         effective_cv = min(cv, n_samples)
 
         if effective_cv < 2:
@@ -27,42 +52,78 @@ class EvaluationAgent:
         print(f"Using cv={effective_cv} for evaluation")
 
         if self.task_type == "regression":
-            scores = cross_val_score(
-                model,
-                X,
-                y,
-                cv=effective_cv,
-                scoring="neg_root_mean_squared_error"
-            )
-
-            metric_scores = -scores
             metric_name = "rmse"
         elif self.task_type == "classification":
-            scores = cross_val_score(
-                model,
-                X,
-                y,
-                cv=effective_cv,
-                scoring="accuracy"
-            )
-            metric_scores = scores
             metric_name = "accuracy"
         else:
             raise ValueError(f"Unsupported task type: {self.task_type}")
 
+        cv_results = self._load_cv_results(y, n_samples, effective_cv)
+
+        if cv_results is not None:
+            # AutoML already scored the winner on these folds; reuse them
+            # instead of refitting it effective_cv more times.
+            best_model_name = cv_results["best_model"]
+            metric_scores = np.asarray(cv_results["fold_scores"][best_model_name])
+            oof = cv_results["oof_predictions"][best_model_name]
+
+            if self.task_type == "regression":
+                oof_score = root_mean_squared_error(y, oof)
+            else:
+                oof_score = accuracy_score(y, oof)
+
+            source = "automl_cv"
+            print(f"Reusing AutoML out-of-fold results for {best_model_name}")
+        else:
+            model = joblib.load("artifacts/model/model.pkl")
+
+            # Same input policy as AutoML: densify once for estimators that
+            # do not train on CSR natively.
+            if sp.issparse(X) and not accepts_sparse(model):
+                X = X.toarray()
+
+            if self.task_type == "regression":
+                scores = cross_val_score(
+                    model,
+                    X,
+                    y,
+                    cv=effective_cv,
+                    scoring="neg_root_mean_squared_error",
+                    n_jobs=self.n_jobs
+                )
+
+                metric_scores = -scores
+            else:
+                scores = cross_val_score(
+                    model,
+                    X,
+                    y,
+                    cv=effective_cv,
+                    scoring="accuracy",
+                    n_jobs=self.n_jobs
+                )
+                metric_scores = scores
+
+            oof_score = None
+            source = "refit"
+
         report = {
             "metric": metric_name,
             "cv_folds": effective_cv,
             "n_samples": n_samples,
             f"mean_{metric_name}": float(np.mean(metric_scores)),
             f"std_{metric_name}": float(np.std(metric_scores)),
-            "all_scores": metric_scores.tolist()
+            "all_scores": metric_scores.tolist(),
+            "source": source
         }
 
+        if oof_score is not None:
+            report[f"oof_{metric_name}"] = float(oof_score)
+
         os.makedirs("artifacts/evaluation", exist_ok=True)
 
         with open("artifacts/evaluation/evaluation_report.json", "w") as f:
             json.dump(report, f, indent=4)
 
         print("✅ Evaluation completed")
-        return report
\ No newline at end of file
+        return report
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.preprocessing import OneHotEncoder, TargetEncoder
+
+# Encoders for columns above the one-hot cardinality cap.
+HIGH_CARDINALITY_ENCODERS = ("target", "hashing", "frequency", "onehot")
+
+
+def _as_frame(X):
+    return X if isinstance(X, pd.DataFrame) else pd.DataFrame(X)
+
+
+class HashingEncoder(BaseEstimator, TransformerMixin):
+    """Hash every ``column=value`` pair into ``n_buckets`` sparse columns.
+
+    The output width is fixed whatever the cardinality, and unseen values
+    need no special casing. Hashes come from ``pd.util.hash_array`` (fixed
+    key), so the bucket of a value is the same in every process.
+    """
+
+    def __init__(self, n_buckets=64):
+        self.n_buckets = n_buckets
+
+    def fit(self, X, y=None):
+        X = _as_frame(X)
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def transform(self, X):
+        X = _as_frame(X)
+        n_rows = len(X)
+
+        columns = []
+        for col in X.columns:
+            keys = f"{col}=" + X[col].astype(str)
+            hashes = pd.util.hash_array(keys.to_numpy(dtype=object))
+            columns.append((hashes % np.uint64(self.n_buckets)).astype(np.int64))
+
+        rows = np.tile(np.arange(n_rows), len(columns))
+        cols = np.concatenate(columns) if columns else np.empty(0, dtype=np.int64)
+        # Colliding pairs within a row add up, like sklearn's FeatureHasher
+        # with alternate_sign=False.
+        return sp.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(n_rows, self.n_buckets)
+        )
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray([f"hash_{i}" for i in range(self.n_buckets)], dtype=object)
+
+
+class FrequencyEncoder(BaseEstimator, TransformerMixin):
+    """Replace each category by its share of the training rows.
+
+    Categories seen fewer than ``min_frequency`` times (a count, or a
+    fraction of rows when < 1), or outside the ``max_categories`` most
+    frequent, are grouped into one rare bucket whose share is their total.
+    Unseen values at predict time fall into that bucket too.
+    """
+
+    def __init__(self, min_frequency=None, max_categories=None):
+        self.min_frequency = min_frequency
+        self.max_categories = max_categories
+
+    def fit(self, X, y=None):
+        X = _as_frame(X)
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = X.shape[1]
+
+        n_rows = len(X)
+        min_count = self.min_frequency or 0
+        if 0 < min_count < 1:
+            min_count = min_count * n_rows
+
+        self.frequencies_ = {}
+        self.rare_frequency_ = {}
+        for col in X.columns:
+            counts = X[col].astype(str).value_counts()
+            frequent = counts[counts >= min_count]
+            if self.max_categories is not None:
+                frequent = frequent.iloc[: self.max_categories]
+
+            self.frequencies_[col] = (frequent / n_rows).to_dict()
+            self.rare_frequency_[col] = float((counts.sum() - frequent.sum()) / n_rows)
+        return self
+
+    def transform(self, X):
+        X = _as_frame(X)
+        out = np.empty((len(X), X.shape[1]))
+        for i, col in enumerate(X.columns):
+            mapped = X[col].astype(str).map(self.frequencies_[col])
+            out[:, i] = mapped.astype(np.float64).fillna(self.rare_frequency_[col])
+        return out
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray([f"{col}_frequency" for col in self.feature_names_in_], dtype=object)
+
+
+def split_by_cardinality(X, categorical_cols, max_onehot_categories):
+    """(low, high, cardinality): columns that stay one-hot and those above the cap."""
+    cardinality = {col: int(X[col].nunique()) for col in categorical_cols}
+    low = [col for col in categorical_cols if cardinality[col] <= max_onehot_categories]
+    high = [col for col in categorical_cols if cardinality[col] > max_onehot_categories]
+    return low, high, cardinality
+
+
+def make_categorical_transformers(
+    low_cols,
+    high_cols,
+    high_cardinality_encoder="target",
+    hash_buckets=64,
+    min_frequency=None,
+    max_categories=None,
+    max_onehot_categories=20,
+    random_state=42,
+):
+    """ColumnTransformer entries for the categorical columns."""
+    if high_cardinality_encoder not in HIGH_CARDINALITY_ENCODERS:
+        raise ValueError(f"Unsupported high-cardinality encoder: {high_cardinality_encoder}")
+
+    transformers = []
+
+    if high_cardinality_encoder == "onehot":
+        # Uncapped one-hot on everything (the original behaviour).
+        low_cols, high_cols = low_cols + high_cols, []
+        onehot = OneHotEncoder(handle_unknown="ignore")
+    else:
+        onehot = OneHotEncoder(
+            handle_unknown="infrequent_if_exist",
+            min_frequency=min_frequency,
+            max_categories=max_onehot_categories,
+        )
+
+    if low_cols:
+        transformers.append(("cat", onehot, low_cols))
+
+    if high_cols:
+        if high_cardinality_encoder == "target":
+            # fit_transform cross-fits: each row is encoded by a model that
+            # never saw its own target (out-of-fold).
+            encoder = TargetEncoder(random_state=random_state)
+        elif high_cardinality_encoder == "hashing":
+            encoder = HashingEncoder(n_buckets=hash_buckets)
+        else:
+            encoder = FrequencyEncoder(
+                min_frequency=min_frequency, max_categories=max_categories
+            )
+        transformers.append((high_cardinality_encoder, encoder, high_cols))
+
+    return transformers
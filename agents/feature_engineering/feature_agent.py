@@ -2,27 +2,92 @@ import os
 import json
 import joblib
 import pandas as pd
+import scipy.sparse as sp
 
-from sklearn.preprocessing import StandardScaler, OneHotEncoder, LabelEncoder
+from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.compose import ColumnTransformer
 
+from agents.feature_engineering.encoders import (
+    HIGH_CARDINALITY_ENCODERS,
+    make_categorical_transformers,
+    split_by_cardinality,
+)
+from mlops.instrumentation import annotate, instrumented
+from mlops.storage import read_frame
+
+
+# Output formats the feature matrix can be forced into ("auto" decides by density).
+MATRIX_FORMATS = ("auto", "csr", "dense")
+
+
+def matrix_stats(X):
+    """Format, density and in-memory size of a feature matrix."""
+    n_cells = X.shape[0] * X.shape[1]
+    if sp.issparse(X):
+        nnz = X.nnz
+        nbytes = X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+        fmt = "csr"
+    else:
+        nnz = int((X != 0).sum())
+        nbytes = X.nbytes
+        fmt = "dense"
+
+    return {
+        "matrix_format": fmt,
+        "density": float(nnz / n_cells) if n_cells else 0.0,
+        "nbytes": int(nbytes),
+        "dense_nbytes": int(n_cells * X.dtype.itemsize),
+    }
+
 
 class FeatureEngineeringAgent:
-    def __init__(self, task_type="regression"):
+    def __init__(
+        self,
+        task_type="regression",
+        matrix_format="auto",
+        density_threshold=0.3,
+        max_onehot_categories=20,
+        high_cardinality_encoder="target",
+        hash_buckets=64,
+        min_frequency=None,
+        max_categories=None,
+    ):
         print(f"🧠 FeatureEngineeringAgent initialized ({task_type})")
         self.task_type = task_type
 
+        # "auto" returns CSR when the one-hot output leaves the matrix less
+        # than density_threshold full, "csr"/"dense" force one format.
+        if matrix_format not in MATRIX_FORMATS:
+            raise ValueError(f"Unsupported matrix format: {matrix_format}")
+        self.matrix_format = matrix_format
+        self.density_threshold = density_threshold
+
+        # Text columns with at most max_onehot_categories values are one-hot
+        # encoded; wider ones use high_cardinality_encoder ("target" =
+        # out-of-fold target encoding, "hashing" into hash_buckets columns,
+        # "frequency" with rare grouping, "onehot" = no cap). min_frequency
+        # groups rare categories in one-hot and frequency encoding,
+        # max_categories caps the categories frequency encoding keeps.
+        if high_cardinality_encoder not in HIGH_CARDINALITY_ENCODERS:
+            raise ValueError(f"Unsupported high-cardinality encoder: {high_cardinality_encoder}")
+        self.max_onehot_categories = max_onehot_categories
+        self.high_cardinality_encoder = high_cardinality_encoder
+        self.hash_buckets = hash_buckets
+        self.min_frequency = min_frequency
+        self.max_categories = max_categories
+
+    @instrumented("feature_engineering.transform")
     def transform(self, data_path, target_column):
         print("Starting feature engineering...")
 
-        # load cleaned data
-        df = pd.read_csv(data_path)
+        # load cleaned data (Parquet/Arrow keep the dtypes chosen by cleaning)
+        df = read_frame(data_path)
 
         if target_column not in df.columns:
             raise ValueError(f"Target column '{target_column}' not found in dataset.")
 
         # Check for regression on strings
-        if self.task_type == "regression" and df[target_column].dtype == 'object':
+        if self.task_type == "regression" and not pd.api.types.is_numeric_dtype(df[target_column]):
             raise ValueError(
                 f"Error: You selected Regression, but the target column '{target_column}' contains text data. "
                 "Regression algorithms only work on numbers. Please change the Task Type to Classification, or choose a numeric target column."
@@ -30,7 +95,9 @@ class FeatureEngineeringAgent:
 
         # split features & target
         X = df.drop(columns=[target_column])
-        y = df[target_column]
+        # copy: a column read zero-copy from Parquet/Arrow is a read-only
+        # buffer, and sklearn's target validation needs to own it
+        y = df[target_column].copy()
 
         # Process Target (y) if Classification
         label_encoder = None
@@ -49,23 +116,58 @@ class FeatureEngineeringAgent:
             if os.path.exists(encoder_path):
                 os.remove(encoder_path)
 
-        # identify column types
-        categorical_cols = X.select_dtypes(include=["object"]).columns.tolist()
-        numerical_cols = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
+        # identify column types (any width: cleaning downcasts to int8/float32
+        # and stores low-cardinality text as category)
+        categorical_cols = X.select_dtypes(include=["object", "category", "string"]).columns.tolist()
+        numerical_cols = X.select_dtypes(include=["number"]).columns.tolist()
 
         print("Categorical columns:", categorical_cols)
         print("Numerical columns:", numerical_cols)
 
+        low_cardinality_cols, high_cardinality_cols, cardinality = split_by_cardinality(
+            X, categorical_cols, self.max_onehot_categories
+        )
+        if high_cardinality_cols and self.high_cardinality_encoder != "onehot":
+            print(f"High-cardinality columns ({self.high_cardinality_encoder} encoding):",
+                  high_cardinality_cols)
+
         # define transformers
+        if self.matrix_format == "dense":
+            sparse_threshold = 0.0
+        elif self.matrix_format == "csr":
+            sparse_threshold = 1.0
+        else:
+            sparse_threshold = self.density_threshold
+
         preprocessor = ColumnTransformer(
             transformers=[
                 ("num", StandardScaler(), numerical_cols),
-                ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_cols),
-            ]
+                *make_categorical_transformers(
+                    low_cardinality_cols,
+                    high_cardinality_cols,
+                    high_cardinality_encoder=self.high_cardinality_encoder,
+                    hash_buckets=self.hash_buckets,
+                    min_frequency=self.min_frequency,
+                    max_categories=self.max_categories,
+                    max_onehot_categories=self.max_onehot_categories,
+                ),
+            ],
+            sparse_threshold=sparse_threshold,
         )
 
-        # fit & transform
-        X_transformed = preprocessor.fit_transform(X)
+        # fit & transform (y is needed by the target encoder)
+        X_transformed = preprocessor.fit_transform(X, y)
+
+        # ColumnTransformer only keeps sparse output when one of its parts is
+        # sparse; a forced "csr" with no categorical columns is converted here.
+        if self.matrix_format == "csr" and not sp.issparse(X_transformed):
+            X_transformed = sp.csr_matrix(X_transformed)
+
+        stats = matrix_stats(X_transformed)
+        print(
+            f"Feature matrix: {stats['matrix_format']}, density {stats['density']:.3f}, "
+            f"{stats['nbytes'] / 1024 ** 2:.1f} MiB"
+        )
 
         # ---- NEW: persist pipeline + metadata ----
         os.makedirs("artifacts/feature_engineering", exist_ok=True)
@@ -79,12 +181,23 @@ class FeatureEngineeringAgent:
             "categorical_columns": categorical_cols,
             "numerical_columns": numerical_cols,
             "target_column": target_column,
+            "categorical_encoding": {
+                col: (
+                    "onehot"
+                    if col in low_cardinality_cols or self.high_cardinality_encoder == "onehot"
+                    else self.high_cardinality_encoder
+                )
+                for col in categorical_cols
+            },
+            "cardinality": cardinality,
             "output_shape": X_transformed.shape,
+            **stats,
         }
 
         with open("artifacts/feature_engineering/metadata.json", "w") as f:
             json.dump(metadata, f, indent=4)
 
         print("Feature pipeline and metadata saved")
+        annotate(rows=int(X_transformed.shape[0]), columns=int(X_transformed.shape[1]))
 
         return X_transformed, y, metadata
@@ -0,0 +1,306 @@
+import os
+import glob
+import json
+import joblib
+import numpy as np
+import pandas as pd
+
+from sklearn.metrics import root_mean_squared_error, accuracy_score
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBModel
+
+from agents.cleaning.cleaning_agent import CleaningAgent, match_dtypes
+from mlops.instrumentation import instrumented
+from mlops.registry import ModelRegistry
+from mlops.storage import read_frame, write_frame
+
+
+class IncrementalTrainingAgent:
+    """Updates the live model version with a new batch of rows.
+
+    The fitted preprocessing stays frozen: the existing trees, stages and
+    coefficients were learned on its output, so moving the scaler or the
+    encoder frequencies under them would change what every feature means.
+    Only the model keeps training on the batch: ``partial_fit`` for online
+    estimators, extra boosting rounds on the existing booster for XGBoost,
+    extra trees/stages through ``warm_start`` for forests and
+    GradientBoosting.
+
+    ``run`` returns ``{"action": "full_refit", "reason": ...}`` instead when
+    the batch cannot be absorbed: changed schema, unseen target classes,
+    drift beyond the thresholds, one-hot categories the pipeline has never
+    seen (the refit grows the category sets), or a model without an
+    incremental path.
+    """
+
+    def __init__(
+        self,
+        task_type="regression",
+        deployment_dir=None,
+        drift_threshold=0.5,
+        max_new_category_ratio=0.0,
+        n_new_estimators=25,
+        xgb_rounds=50,
+        cleaning_agent=None,
+    ):
+        print(f"🔁 IncrementalTrainingAgent initialized ({task_type})")
+        self.task_type = task_type
+        # Batches go through the training-time cleaning rules of this agent
+        # (outlier capping), fitted on the stored training rows.
+        self.cleaning_agent = cleaning_agent or CleaningAgent()
+        # None follows the registry's live version at run time.
+        self.deployment_dir = deployment_dir
+
+        # Full refit when a numeric mean moves more than drift_threshold
+        # training standard deviations, or when more than
+        # max_new_category_ratio of the rows carry a category one-hot
+        # encoding has never seen (by default, any such row).
+        self.drift_threshold = drift_threshold
+        self.max_new_category_ratio = max_new_category_ratio
+
+        # Growth per batch for warm-started ensembles and XGBoost.
+        self.n_new_estimators = n_new_estimators
+        self.xgb_rounds = xgb_rounds
+
+    # -----------------------------
+    # Loading
+    # -----------------------------
+    def _load_bundle(self):
+        deployment_dir = self.deployment_dir or ModelRegistry().current_dir()
+        paths = {
+            "model": os.path.join(deployment_dir, "model.pkl"),
+            "pipeline": os.path.join(deployment_dir, "pipeline.pkl"),
+            "metadata": os.path.join(deployment_dir, "metadata.json"),
+        }
+        if not all(os.path.exists(p) for p in paths.values()):
+            return None
+
+        with open(paths["metadata"]) as f:
+            metadata = json.load(f)
+
+        encoder_path = os.path.join(deployment_dir, "target_encoder.pkl")
+        training_data = glob.glob(os.path.join(deployment_dir, "training_data.*"))
+
+        return {
+            "model": joblib.load(paths["model"]),
+            "pipeline": joblib.load(paths["pipeline"]),
+            "metadata": metadata,
+            "target_encoder": joblib.load(encoder_path) if os.path.exists(encoder_path) else None,
+            "training_data_path": training_data[0] if training_data else None,
+        }
+
+    # -----------------------------
+    # Batch preparation
+    # -----------------------------
+    def _prepare_batch(self, df, metadata, reference):
+        """Apply the training-time cleaning to the batch, or return a reason
+        why its schema does not fit the bundle.
+
+        Fill values and outlier bounds come from ``reference`` (the stored,
+        already cleaned training rows): capping does not move the quartiles,
+        so the bounds are the ones cleaning used.
+        """
+        numerical_cols = metadata["numerical_columns"]
+        categorical_cols = metadata["categorical_columns"]
+        target_column = metadata["target_column"]
+
+        missing = [c for c in numerical_cols + categorical_cols + [target_column] if c not in df.columns]
+        if missing:
+            return None, f"missing_columns: {missing}"
+
+        df = df[numerical_cols + categorical_cols + [target_column]].drop_duplicates()
+        df = df.dropna(subset=[target_column])
+        if df.empty:
+            return None, "empty_batch"
+
+        for col in numerical_cols:
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                return None, f"non_numeric_column: {col}"
+
+        # Fill values come from the rows the bundle was trained on.
+        fill_values = {}
+        for col in numerical_cols:
+            fill_values[col] = reference[col].median()
+        for col in categorical_cols:
+            fill_values[col] = reference[col].mode().iloc[0]
+        df = df.fillna(fill_values)
+
+        lower, upper = self.cleaning_agent.outlier_bounds(reference, numerical_cols)
+        self.cleaning_agent.cap_outliers(df, lower, upper)
+
+        for col in categorical_cols:
+            df[col] = df[col].astype(str).str.strip().str.lower()
+        if not pd.api.types.is_numeric_dtype(df[target_column]):
+            df[target_column] = df[target_column].astype(str).str.strip().str.lower()
+
+        return df, None
+
+    def _check_drift(self, batch, pipeline, metadata):
+        """Reason for a full refit if the batch moved too far, else None."""
+        numerical_cols = metadata["numerical_columns"]
+        transformers = pipeline.named_transformers_
+
+        scaler = transformers.get("num")
+        if isinstance(scaler, StandardScaler) and numerical_cols:
+            shift = np.abs(batch[numerical_cols].mean().to_numpy() - scaler.mean_) / scaler.scale_
+            if shift.max() > self.drift_threshold:
+                col = numerical_cols[int(shift.argmax())]
+                return f"numeric_drift: {col} moved {shift.max():.2f} std"
+
+        onehot = transformers.get("cat")
+        if onehot is not None and hasattr(onehot, "categories_"):
+            for col, categories in zip(onehot.feature_names_in_, onehot.categories_):
+                unseen = ~batch[col].astype(str).isin(categories.astype(str))
+                if unseen.mean() > self.max_new_category_ratio:
+                    return f"new_categories: {col} ({unseen.mean():.1%} of rows)"
+
+        return None
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def _score(self, model, X, y):
+        preds = model.predict(X)
+        if self.task_type == "regression":
+            return float(root_mean_squared_error(y, preds))
+        return float(accuracy_score(y, preds))
+
+    def _continue_training(self, model, X, y):
+        """Train ``model`` further on the batch; returns (model, method) or
+        (None, reason) when it has no incremental path."""
+        classes = getattr(model, "classes_", None)
+        params = model.get_params()
+
+        # New trees/stages/rounds are fit on the batch alone, so for a
+        # classifier it has to show every class or they would disagree on
+        # the class layout.
+        covers_classes = classes is None or np.array_equal(np.unique(y), classes)
+
+        if isinstance(model, XGBModel):
+            if not covers_classes:
+                return None, "batch_missing_classes"
+            params.update(n_estimators=self.xgb_rounds, early_stopping_rounds=None)
+            continued = type(model)(**params)
+            continued.fit(X, y, xgb_model=model.get_booster())
+            return continued, f"xgb_model (+{self.xgb_rounds} rounds)"
+
+        if hasattr(model, "partial_fit"):
+            if classes is not None:
+                model.partial_fit(X, y, classes=classes)
+            else:
+                model.partial_fit(X, y)
+            return model, "partial_fit"
+
+        # Forests and GradientBoosting; warm_start on linear models would
+        # only restart the solver on the batch and forget the old rows.
+        if "warm_start" in params and "n_estimators" in params:
+            if not covers_classes:
+                return None, "batch_missing_classes"
+            model.set_params(
+                warm_start=True, n_estimators=model.n_estimators + self.n_new_estimators
+            )
+            model.fit(X, y)
+            return model, f"warm_start (+{self.n_new_estimators} estimators)"
+
+        return None, f"model_not_incremental: {type(model).__name__}"
+
+    # -----------------------------
+    # Main entry
+    # -----------------------------
+    @instrumented("incremental.run")
+    def run(self, data_path, target_column):
+        print("🔁 Starting incremental training...")
+
+        bundle = self._load_bundle()
+        if bundle is None:
+            return {"action": "full_refit", "reason": "no_deployed_model", "training_data_path": None}
+
+        def full_refit(reason):
+            # The old training rows travel along so the refit can use them.
+            return {
+                "action": "full_refit",
+                "reason": reason,
+                "training_data_path": bundle["training_data_path"],
+            }
+
+        if bundle["training_data_path"] is None:
+            return full_refit("no_training_data")
+
+        metadata = bundle["metadata"]
+        if metadata["target_column"] != target_column:
+            # A different prediction problem: the old rows do not belong in it.
+            return {"action": "full_refit", "reason": "target_changed", "training_data_path": None}
+
+        reference = read_frame(bundle["training_data_path"])
+        batch, reason = self._prepare_batch(read_frame(data_path), metadata, reference)
+        if reason is not None:
+            return full_refit(reason)
+
+        pipeline = bundle["pipeline"]
+        reason = self._check_drift(batch, pipeline, metadata)
+        if reason is not None:
+            return full_refit(reason)
+
+        X = batch.drop(columns=[target_column])
+        y = batch[target_column]
+
+        target_encoder = bundle["target_encoder"]
+        if self.task_type == "classification":
+            unseen = ~y.isin(target_encoder.classes_)
+            if unseen.any():
+                return full_refit(f"new_classes: {sorted(y[unseen].unique())}")
+            y = target_encoder.transform(y)
+        y = np.asarray(y)
+
+        model = bundle["model"]
+        X_transformed = pipeline.transform(X)
+        # Test-then-train: the score before the update is an honest
+        # estimate on rows the model has never seen.
+        score_before = self._score(model, X_transformed, y)
+
+        model, method = self._continue_training(model, X_transformed, y)
+        if model is None:
+            return full_refit(method)
+
+        score_after = self._score(model, X_transformed, y)
+
+        # Persist through the usual artifact paths, DeploymentAgent publishes
+        # them as a new model version.
+        os.makedirs("artifacts/model", exist_ok=True)
+        os.makedirs("artifacts/feature_engineering", exist_ok=True)
+        joblib.dump(model, "artifacts/model/model.pkl")
+        joblib.dump(pipeline, "artifacts/feature_engineering/pipeline.pkl")
+
+        metadata["output_shape"] = [int(len(reference) + len(batch)), int(X_transformed.shape[1])]
+        metadata["incremental_updates"] = metadata.get("incremental_updates", 0) + 1
+        with open("artifacts/feature_engineering/metadata.json", "w") as f:
+            json.dump(metadata, f, indent=4)
+
+        if target_encoder is not None:
+            joblib.dump(target_encoder, "artifacts/feature_engineering/target_encoder.pkl")
+
+        # Keep the cleaned batch with the training data for a later full refit.
+        training_data_path = "data/processed/training_data" + os.path.splitext(bundle["training_data_path"])[1]
+        # The stored rows carry cleaning's compacted dtypes; the batch is cast
+        # to them so the concat does not widen them again.
+        batch, reference = match_dtypes(batch, reference)
+        write_frame(pd.concat([reference, batch], ignore_index=True), training_data_path)
+
+        metric = "rmse" if self.task_type == "regression" else "accuracy"
+        report = {
+            "action": "incremental",
+            "rows": int(len(batch)),
+            "total_rows": int(len(reference) + len(batch)),
+            "model": type(model).__name__,
+            "method": method,
+            "metric": metric,
+            f"batch_{metric}_before_update": score_before,
+            f"batch_{metric}_after_update": score_after,
+            "training_data_path": training_data_path,
+        }
+
+        with open("artifacts/model/incremental_report.json", "w") as f:
+            json.dump(report, f, indent=4)
+
+        print(f"✅ Incremental update completed ({method})")
+        return report
@@ -0,0 +1,292 @@
+"""Lightweight drift monitoring on live traffic.
+
+At training time ``ReferenceProfile`` summarises every feature column of the
+training data in one streaming pass:
+
+* numeric columns:     quantile bin edges with the reference share of each
+                       bin (for PSI) and the reference CDF on a finer
+                       quantile grid (for Kolmogorov-Smirnov)
+* categorical columns: the most frequent categories with their shares, the
+                       rest pooled into one "other" bucket (PSI, chi-square)
+
+The profile is a small JSON file shipped with the model version.
+``DriftMonitor`` then only counts incoming rows into those fixed bins, so
+its memory does not grow with traffic, and computes PSI / KS / chi-square
+from the counts whenever a summary is asked for.
+"""
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import special, stats
+
+from mlops.sketches import FrequencySketch, QuantileSketch
+
+# Shares are clipped to this before taking logs / dividing, so an empty
+# bin on either side does not make PSI or chi-square infinite.
+EPSILON = 1e-4
+
+
+def _is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _quantile_points(sketch, n_points):
+    """Distinct interior quantiles at 1/n .. (n-1)/n."""
+    if sketch.n == 0:
+        return np.empty(0)
+    qs = np.arange(1, n_points) / n_points
+    return np.unique(sketch.quantile(qs))
+
+
+def psi(expected, actual):
+    expected = np.clip(np.asarray(expected, dtype=float), EPSILON, None)
+    actual = np.clip(np.asarray(actual, dtype=float), EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class ReferenceProfile:
+    def __init__(self, columns, n_rows):
+        self.columns = columns
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_chunks(cls, chunks, exclude=(), n_bins=10, n_ks_points=100, max_categories=50):
+        """Build the profile from an iterable of DataFrames (one pass)."""
+        sketches = {}
+        nulls = {}
+        n_rows = 0
+
+        for chunk in chunks:
+            n_rows += len(chunk)
+            for column in chunk.columns:
+                if column in exclude:
+                    continue
+                series = chunk[column]
+                if column not in sketches:
+                    # The first chunk decides the type, like the cleaning stage.
+                    sketches[column] = QuantileSketch() if _is_numeric(series) else FrequencySketch()
+                    nulls[column] = 0
+
+                nulls[column] += int(series.isna().sum())
+                values = series.dropna()
+                if isinstance(sketches[column], QuantileSketch):
+                    sketches[column].update(pd.to_numeric(values, errors="coerce").to_numpy(dtype=float))
+                else:
+                    sketches[column].update(values.astype(str))
+
+        columns = {}
+        for column, sketch in sketches.items():
+            entry = {"null_rate": nulls[column] / n_rows if n_rows else 0.0}
+
+            if isinstance(sketch, QuantileSketch):
+                edges = _quantile_points(sketch, n_bins)
+                ks_points = _quantile_points(sketch, n_ks_points)
+                # Share of each bin (-inf, e1], (e1, e2], ..., (ek, inf).
+                cdf = np.concatenate([[0.0], sketch.cdf(edges), [1.0]]) if sketch.n else np.zeros(2)
+                entry.update({
+                    "type": "numeric",
+                    "n": int(sketch.n),
+                    "edges": edges.tolist(),
+                    "expected": np.diff(cdf).tolist(),
+                    "ks_points": ks_points.tolist(),
+                    "ks_cdf": sketch.cdf(ks_points).tolist() if sketch.n else [],
+                })
+            else:
+                shares = sorted(sketch.frequencies().items(), key=lambda item: -item[1])
+                top = shares[:max_categories]
+                entry.update({
+                    "type": "categorical",
+                    "n": int(sum(sketch.counts.values())),
+                    "categories": [category for category, _ in top],
+                    "expected": [share for _, share in top] + [max(0.0, 1.0 - sum(s for _, s in top))],
+                })
+            columns[column] = entry
+
+        return cls(columns, n_rows)
+
+    @classmethod
+    def from_frame(cls, df, **kwargs):
+        return cls.from_chunks([df], **kwargs)
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"n_rows": self.n_rows, "columns": self.columns}, f, indent=4)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            profile = json.load(f)
+        return cls(profile["columns"], profile["n_rows"])
+
+
+class DriftMonitor:
+    """Running drift statistics of live traffic against a ``ReferenceProfile``.
+
+    ``update`` counts a DataFrame of incoming rows into the profile's bins;
+    ``observe`` queues single records and counts them ``flush_rows`` at a
+    time, so /predict does not build a DataFrame per call. Safe to call
+    from several threads.
+    """
+
+    def __init__(self, profile, min_rows=100, psi_threshold=0.2, p_value_threshold=0.05,
+                 drift_share=0.5, flush_rows=256):
+        self.profile = profile
+        self.min_rows = min_rows
+        self.psi_threshold = psi_threshold
+        self.p_value_threshold = p_value_threshold
+        self.drift_share = drift_share
+        self.flush_rows = flush_rows
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._pending = []
+            self.n_rows = 0
+            self._state = {}
+            for column, ref in self.profile.columns.items():
+                if ref["type"] == "numeric":
+                    self._state[column] = {
+                        "nulls": 0,
+                        "bins": np.zeros(len(ref["edges"]) + 1, dtype=np.int64),
+                        "ks": np.zeros(len(ref["ks_points"]) + 1, dtype=np.int64),
+                    }
+                else:
+                    self._state[column] = {
+                        "nulls": 0,
+                        "bins": np.zeros(len(ref["categories"]) + 1, dtype=np.int64),
+                    }
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def observe(self, records):
+        """Queue JSON records (list of dicts); counted once enough are waiting."""
+        with self._lock:
+            self._pending.extend(records)
+            if len(self._pending) < self.flush_rows:
+                return
+            records, self._pending = self._pending, []
+        self.update(pd.DataFrame(records))
+
+    def flush(self):
+        with self._lock:
+            records, self._pending = self._pending, []
+        if records:
+            self.update(pd.DataFrame(records))
+
+    def update(self, df):
+        counts = {}
+        for column, ref in self.profile.columns.items():
+            if column not in df.columns:
+                counts[column] = (len(df), None, None)
+                continue
+
+            series = df[column]
+            if ref["type"] == "numeric":
+                values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+                values = values[~np.isnan(values)]
+                bins = np.bincount(
+                    np.searchsorted(ref["edges"], values, side="left"), minlength=len(ref["edges"]) + 1
+                )
+                ks = np.bincount(
+                    np.searchsorted(ref["ks_points"], values, side="left"), minlength=len(ref["ks_points"]) + 1
+                )
+                counts[column] = (len(df) - values.size, bins, ks)
+            else:
+                values = series.dropna().astype(str)
+                index = pd.Index(ref["categories"]).get_indexer(values)
+                # Unseen categories (-1) go to the "other" bucket at the end.
+                index[index < 0] = len(ref["categories"])
+                bins = np.bincount(index, minlength=len(ref["categories"]) + 1)
+                counts[column] = (len(df) - values.size, bins, None)
+
+        with self._lock:
+            self.n_rows += len(df)
+            for column, (n_null, bins, ks) in counts.items():
+                state = self._state[column]
+                state["nulls"] += n_null
+                if bins is not None:
+                    state["bins"] += bins
+                if ks is not None:
+                    state["ks"] += ks
+
+    # -----------------------------
+    # Statistics
+    # -----------------------------
+    def _numeric_stats(self, ref, state):
+        n = int(state["bins"].sum())
+        result = {"psi": psi(ref["expected"], state["bins"] / n), "test": "ks"}
+
+        # KS on the quantile grid: the largest CDF gap at the grid points.
+        current_cdf = np.cumsum(state["ks"])[:-1] / n
+        statistic = float(np.max(np.abs(current_cdf - ref["ks_cdf"]))) if len(ref["ks_cdf"]) else 0.0
+        n_eff = ref["n"] * n / (ref["n"] + n)
+        result["statistic"] = statistic
+        result["p_value"] = float(special.kolmogorov(np.sqrt(n_eff) * statistic))
+        return result
+
+    def _categorical_stats(self, ref, state):
+        n = int(state["bins"].sum())
+        observed = state["bins"] / n
+        result = {"psi": psi(ref["expected"], observed), "test": "chi2"}
+
+        expected = np.clip(np.asarray(ref["expected"]), EPSILON, None)
+        expected = expected / expected.sum() * n
+        statistic = float(np.sum((state["bins"] - expected) ** 2 / expected))
+        result["statistic"] = statistic
+        result["p_value"] = float(stats.chi2.sf(statistic, max(1, len(expected) - 1)))
+        return result
+
+    def summary(self):
+        self.flush()
+        with self._lock:
+            n_rows = self.n_rows
+            state = {
+                column: {key: value.copy() if isinstance(value, np.ndarray) else value
+                         for key, value in s.items()}
+                for column, s in self._state.items()
+            }
+
+        columns = {}
+        for column, ref in self.profile.columns.items():
+            s = state[column]
+            entry = {
+                "type": ref["type"],
+                "rows": n_rows - s["nulls"],
+                "reference_null_rate": ref["null_rate"],
+                "current_null_rate": s["nulls"] / n_rows if n_rows else None,
+            }
+            if entry["rows"] >= self.min_rows:
+                if ref["type"] == "numeric":
+                    entry.update(self._numeric_stats(ref, s))
+                else:
+                    entry.update(self._categorical_stats(ref, s))
+                # PSI decides: with thousands of rows the test p-values flag
+                # shifts far too small to matter.
+                entry["drifted"] = entry["psi"] >= self.psi_threshold
+                entry["test_drifted"] = entry["p_value"] < self.p_value_threshold
+            else:
+                entry["drifted"] = None
+                entry["test_drifted"] = None
+            columns[column] = entry
+
+        judged = [entry["drifted"] for entry in columns.values() if entry["drifted"] is not None]
+        drifted = sum(judged)
+        return {
+            "rows": n_rows,
+            "reference_rows": self.profile.n_rows,
+            "min_rows": self.min_rows,
+            "psi_threshold": self.psi_threshold,
+            "p_value_threshold": self.p_value_threshold,
+            "n_columns": len(columns),
+            "n_drifted_columns": drifted,
+            "share_drifted_columns": drifted / len(judged) if judged else None,
+            "dataset_drift": drifted / len(judged) >= self.drift_share if judged else None,
+            "columns": columns,
+        }
@@ -1,37 +1,221 @@
 import os
+import json
+import shutil
+import tempfile
+import time
+import numpy as np
 import pandas as pd
 from evidently.report import Report
 from evidently.metric_preset import DataDriftPreset
 
+from agents.monitoring.drift_engine import DriftMonitor, ReferenceProfile
+from mlops.cache import StageCache, hash_path
+from mlops.instrumentation import annotate, instrumented
+from mlops.storage import iter_frames, read_frame, write_frame
+
+
+def sample_rows(df, max_rows, stratify_column=None, random_state=42):
+    """At most ``max_rows`` random rows of ``df``, in their original order.
+
+    With ``stratify_column`` every value of that column keeps its share of
+    the rows (and at least one row), so rare classes survive the cap.
+    """
+    if max_rows is None or len(df) <= max_rows:
+        return df
+
+    keys = pd.Series(np.random.RandomState(random_state).random_sample(len(df)))
+    if stratify_column is not None and stratify_column in df.columns:
+        groups = keys.groupby(df[stratify_column].to_numpy(), dropna=False)
+        quota = (groups.transform("size") * max_rows / len(df)).round().clip(lower=1)
+        keep = groups.rank(method="first") <= quota
+        positions = np.flatnonzero(keep.to_numpy())
+    else:
+        positions = np.sort(np.argsort(keys.to_numpy())[:max_rows])
+    return df.iloc[positions]
+
+
+def _plain(frame):
+    # Parquet/Arrow restore categoricals as pandas categories, which
+    # Evidently cannot compare with the plain strings of a CSV upload.
+    categories = [c for c in frame.columns if isinstance(frame[c].dtype, pd.CategoricalDtype)]
+    return frame.astype({c: object for c in categories}) if categories else frame
+
+
 class MonitoringAgent:
-    def __init__(self):
+    def __init__(self, max_rows=50000, stratify_column=None, random_state=42,
+                 cache_dir="artifacts/monitoring/cache", cache_max_bytes=512 * 1024 ** 2):
         print("🕵️ MonitoringAgent initialized")
         self.reports_dir = "reports"
+        self.profile_dir = "artifacts/monitoring"
+        self.chunksize = 100000
+
+        # Rows per side handed to Evidently (None = all of them).
+        self.max_rows = max_rows
+        self.stratify_column = stratify_column
+        self.random_state = random_state
+        self.reference_cache = StageCache(cache_dir, cache_max_bytes)
+
+    @instrumented("monitoring.reference_profile")
+    def build_reference_profile(self, data_path, target_column=None, output_filename="drift_profile.json"):
+        """Summarise the training features for the API's drift monitor.
+
+        Reads ``data_path`` in chunks, so it stays cheap on large datasets; the
+        result is a small JSON file deployed with the model.
+        """
+        print("Building drift reference profile...")
+
+        profile = ReferenceProfile.from_chunks(
+            iter_frames(data_path, self.chunksize),
+            exclude=[target_column] if target_column else (),
+        )
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profile_path = profile.save(os.path.join(self.profile_dir, output_filename))
+        annotate(rows=profile.n_rows, columns=len(profile.columns))
+
+        print(f"✅ Drift reference profile saved at {profile_path} ({len(profile.columns)} columns)")
+        return profile_path
+
+    def _reference_side(self, reference_data_path, reference_hash):
+        """Sampled reference rows and their drift profile, cached on the file hash.
 
+        Returns (sample, profile, n_rows, cache_status); a repeated report
+        against the same baseline only reads the two small cached files.
+        """
+        key = StageCache.make_key(
+            "drift_reference", reference_hash, self.max_rows, self.stratify_column, self.random_state
+        )
+        # The files only carry the sample in and out of the cache; each call
+        # gets its own directory so concurrent reports never share them.
+        os.makedirs(self.profile_dir, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix="reference_", dir=self.profile_dir)
+        outputs = {
+            "reference_sample.parquet": os.path.join(work_dir, "reference_sample.parquet"),
+            "reference_profile.json": os.path.join(work_dir, "reference_profile.json"),
+        }
+
+        try:
+            hit, n_rows = self.reference_cache.get("drift_reference", key, outputs)
+            if hit:
+                return (
+                    read_frame(outputs["reference_sample.parquet"]),
+                    ReferenceProfile.load(outputs["reference_profile.json"]),
+                    n_rows,
+                    "hit",
+                )
+
+            reference_data = read_frame(reference_data_path)
+            n_rows = len(reference_data)
+            sample = sample_rows(reference_data, self.max_rows, self.stratify_column, self.random_state)
+            profile = ReferenceProfile.from_frame(reference_data)
+            del reference_data
+
+            write_frame(_plain(sample), outputs["reference_sample.parquet"])
+            profile.save(outputs["reference_profile.json"])
+            self.reference_cache.put("drift_reference", key, outputs, payload=n_rows)
+            return sample, profile, n_rows, "miss"
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @instrumented("monitoring.drift_report")
     def generate_drift_report(self, reference_data_path, current_data_path, output_filename="data_drift_report.html"):
+        """Evidently report of ``current_data_path`` against ``reference_data_path``.
+
+        Either path may be a directory of Parquet/Arrow segments, such as
+        the API's inference log. Both sides are capped at ``max_rows``
+        sampled rows. Timings, row
+        counts and PSI / KS / chi-square per column go into a JSON file next
+        to the report. Returns the report path, or None when there is
+        nothing to compare.
+        """
         print("Generating data drift report...")
         
         if not os.path.exists(reference_data_path) or not os.path.exists(current_data_path):
             print("Warning: Missing data files for monitoring. Skipping report generation.")
             return None
 
-        # Load datasets
-        reference_data = pd.read_csv(reference_data_path)
-        current_data = pd.read_csv(current_data_path)
+        started = time.perf_counter()
+        os.makedirs(self.reports_dir, exist_ok=True)
+        sidecar_path = os.path.join(self.reports_dir, os.path.splitext(output_filename)[0] + ".json")
+        run = {
+            "reference_data_path": reference_data_path,
+            "current_data_path": current_data_path,
+            "reference_hash": hash_path(reference_data_path),
+            "current_hash": hash_path(current_data_path),
+            "max_rows": self.max_rows,
+            "stratify_column": self.stratify_column,
+            "report_path": None,
+            "skipped": None,
+        }
+
+        # Same bytes on both sides: nothing can have drifted.
+        if run["reference_hash"] == run["current_hash"]:
+            print("Reference and current data are identical. Skipping report generation.")
+            run["skipped"] = "identical_data"
+            run["seconds"] = {"total": time.perf_counter() - started}
+            self._write_sidecar(sidecar_path, run)
+            return None
+
+        t = time.perf_counter()
+        reference_data, profile, n_reference, run["reference_cache"] = self._reference_side(
+            reference_data_path, run["reference_hash"]
+        )
+        reference_seconds = time.perf_counter() - t
+
+        # The current side is the only new data: counted in full against the
+        # cached profile, sampled for Evidently.
+        t = time.perf_counter()
+        current_data = read_frame(current_data_path)
+        n_current = len(current_data)
+        monitor = DriftMonitor(profile)
+        monitor.update(current_data)
+        current_data = sample_rows(current_data, self.max_rows, self.stratify_column, self.random_state)
+        current_seconds = time.perf_counter() - t
+
+        # Compare the columns both sides have (the target is usually only
+        # in the training data).
+        common = [c for c in reference_data.columns if c in current_data.columns]
+        reference_data, current_data = _plain(reference_data[common]), _plain(current_data[common])
 
         # Create report
+        t = time.perf_counter()
         report = Report(metrics=[DataDriftPreset()])
         report.run(reference_data=reference_data, current_data=current_data)
         
         # Save report
-        os.makedirs(self.reports_dir, exist_ok=True)
         report_path = os.path.join(self.reports_dir, output_filename)
         report.save_html(report_path)
+        report_seconds = time.perf_counter() - t
+
+        summary = monitor.summary()
+        annotate(rows=n_current, columns=len(common))
+        run.update({
+            "report_path": report_path,
+            "rows": {
+                "reference": n_reference,
+                "reference_sampled": len(reference_data),
+                "current": n_current,
+                "current_sampled": len(current_data),
+            },
+            "seconds": {
+                "reference": reference_seconds,
+                "current": current_seconds,
+                "report": report_seconds,
+                "total": time.perf_counter() - started,
+            },
+            "dataset_drift": summary["dataset_drift"],
+            "columns": {c: summary["columns"][c] for c in common if c in summary["columns"]},
+        })
+        self._write_sidecar(sidecar_path, run)
         
         print(f"✅ Data drift report generated at {report_path}")
         return report_path
 
+    def _write_sidecar(self, path, run):
+        with open(path, "w") as f:
+            json.dump(run, f, indent=4)
+
 if __name__ == "__main__":
     agent = MonitoringAgent()
     # Example usage (requires existing data):
-    # agent.generate_drift_report("data/processed/cleaned.csv", "data/processed/cleaned.csv")
+    # agent.generate_drift_report("data/processed/cleaned.parquet", "data/uploads/new_batch.csv")
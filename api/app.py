@@ -1,14 +1,28 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import joblib
 import pandas as pd
 import os
+import uuid
+import json
 import shutil
+import asyncio
+import threading
+import glob
+import time
 
-from orchestrator.orchestrator import Orchestrator
+from api.batching import MicroBatcher
+from api.model_bundle import ModelBundle
+from api.prediction_cache import PredictionCache, row_key
+from api.inference_log import InferenceLogger
+from api.streaming import iter_prediction_chunks
+from api.jobs import JobManager, QueueFullError
+from mlops.instrumentation import MetricsRegistry
+from mlops.registry import ModelRegistry
+from agents.monitoring.drift_engine import DriftMonitor, ReferenceProfile
+from agents.monitoring.monitoring_agent import MonitoringAgent
 
 app = FastAPI(title="Auto Data Scientist API", description="API for Auto ML Platform")
 
@@ -21,96 +35,325 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variables for model and pipeline
-model = None
-pipeline = None
-target_encoder = None
+# Prometheus metrics served at GET /metrics: request latency per route here,
+# the rest (cache, inference log, batcher, last training run) collected when
+# scraped.
+metrics = MetricsRegistry()
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # The route template, not the raw path, so /jobs/<id> is one series.
+        route = request.scope.get("route")
+        metrics.observe(
+            "http_request_duration_seconds",
+            time.perf_counter() - started,
+            labels={
+                "method": request.method,
+                "route": route.path if route is not None else "unmatched",
+                "status": str(status),
+            },
+            help="Time to produce the response headers, by route and status.",
+        )
+
+# The live model version. A request reads this reference once and uses that
+# bundle throughout; a reload builds a whole new bundle and swaps the reference.
+bundle = None
+drift_monitor = None
+registry = ModelRegistry()
+reload_lock = threading.Lock()
 
 class PredictRequest(BaseModel):
     data: list[dict]
 
+
+def predict_frame(input_data, current=None):
+    """transform + predict (+ label decoding) for one DataFrame of rows."""
+    if current is None:
+        current = bundle
+
+    transformed_data = current.pipeline.transform(input_data)
+    predictions = current.model.predict(transformed_data)
+
+    if current.target_encoder is not None:
+        predictions = current.target_encoder.inverse_transform(predictions)
+
+    return predictions.tolist()
+
+
+def predict_record(record, current):
+    """Single-record predict through the compiled pipeline; anything it
+    cannot reproduce exactly goes through the pandas path instead."""
+    try:
+        features = current.compiled_pipeline.transform_record(record)
+    except Exception:
+        return predict_frame(pd.DataFrame([record]), current)
+
+    predictions = current.model.predict(features)
+
+    if current.target_encoder is not None:
+        predictions = current.target_encoder.inverse_transform(predictions)
+
+    return predictions.tolist()
+
+
+# Concurrent /predict calls are coalesced into one predict_frame call
+# (PREDICT_MAX_BATCH_SIZE rows / PREDICT_MAX_WAIT_MS; PREDICT_BATCHING=0 disables).
+batcher = MicroBatcher.from_env(predict_frame)
+batching_enabled = os.getenv("PREDICT_BATCHING", "1") != "0"
+
+# One-record calls skip DataFrame construction (PREDICT_FAST_PATH=0 disables).
+fast_path_enabled = os.getenv("PREDICT_FAST_PATH", "1") != "0"
+
+# Per-row /predict results are cached for PREDICT_CACHE_TTL seconds, at most
+# PREDICT_CACHE_SIZE rows; PREDICT_CACHE_PATH (a SQLite file) shares them
+# between workers. PREDICT_CACHE=0 disables.
+cache = PredictionCache.from_env()
+cache_enabled = os.getenv("PREDICT_CACHE", "1") != "0"
+
+# Live traffic is compared with the model's training data profile
+# (DRIFT_MONITORING=0 disables); each worker keeps its own counts.
+drift_enabled = os.getenv("DRIFT_MONITORING", "1") != "0"
+# Served rows, predictions, model version and latency are appended to
+# Parquet segments under INFERENCE_LOG_DIR by a background thread
+# (INFERENCE_LOG=0 disables).
+inference_log = InferenceLogger.from_env()
+logging_enabled = os.getenv("INFERENCE_LOG", "1") != "0"
+
+# Rows per side sampled into the on-demand Evidently report.
+drift_report_max_rows = int(os.getenv("DRIFT_REPORT_MAX_ROWS", "50000"))
+
+# Model arrays are memory-mapped so uvicorn workers share them (MODEL_MMAP=0
+# loads private copies).
+mmap_enabled = os.getenv("MODEL_MMAP", "1") != "0"
+
+# /batch-predict?stream=true reads, predicts and returns the file in chunks
+# of BATCH_PREDICT_CHUNKSIZE rows, BATCH_PREDICT_WORKERS chunks at a time.
+batch_chunksize = int(os.getenv("BATCH_PREDICT_CHUNKSIZE", "10000"))
+batch_workers = int(os.getenv("BATCH_PREDICT_WORKERS", "1"))
+
+# The registry pointer is checked every MODEL_RELOAD_INTERVAL seconds, so
+# deploys and rollbacks from other processes are picked up too.
+reload_interval = float(os.getenv("MODEL_RELOAD_INTERVAL", "5"))
+reload_task = None
+
 @app.on_event("startup")
 def load_artifacts():
-    global model, pipeline, target_encoder
-    
-    model_path = "models/latest/model.pkl"
-    pipeline_path = "models/latest/pipeline.pkl"
-    encoder_path = "models/latest/target_encoder.pkl"
-    
-    if os.path.exists(model_path) and os.path.exists(pipeline_path):
-        model = joblib.load(model_path)
-        pipeline = joblib.load(pipeline_path)
-        
-        if os.path.exists(encoder_path):
-            target_encoder = joblib.load(encoder_path)
-        else:
-            target_encoder = None
-            
-        print("✅ Successfully loaded model and pipeline artifacts.")
-    else:
-        print("⚠️ Warning: Model or pipeline artifacts not found. Please run the training pipeline first.")
+    """Load the live model version and swap it in; requests keep being served
+    from the previous bundle while this runs."""
+    global bundle, drift_monitor
+
+    with reload_lock:
+        version = registry.current()
+        path = registry.current_dir()
+        if bundle is not None and bundle.version == version and bundle.path == path:
+            return bundle
+
+        new_bundle = ModelBundle.load(
+            path, version=version, compile_fast_path=fast_path_enabled, mmap=mmap_enabled
+        )
+        if new_bundle is None:
+            print("⚠️ Warning: Model or pipeline artifacts not found. Please run the training pipeline first.")
+            return bundle
+
+        profile_path = os.path.join(path, "drift_profile.json")
+        new_monitor = None
+        if drift_enabled and os.path.exists(profile_path):
+            new_monitor = DriftMonitor(ReferenceProfile.load(profile_path))
+
+        bundle = new_bundle
+        drift_monitor = new_monitor
+        cache.invalidate(model_version(bundle))
+        print(f"✅ Successfully loaded model version {version or path}.")
+        return bundle
+
+async def watch_registry():
+    while True:
+        await asyncio.sleep(reload_interval)
+        loaded = bundle.version if bundle is not None else None
+        if registry.current() != loaded:
+            try:
+                await asyncio.to_thread(load_artifacts)
+            except Exception as e:
+                print(f"⚠️ Model reload failed, still serving {loaded}: {e}")
+
+@app.on_event("startup")
+async def start_registry_watch():
+    global reload_task
+    reload_task = asyncio.create_task(watch_registry())
+
+@app.on_event("shutdown")
+async def stop_registry_watch():
+    if reload_task is not None:
+        reload_task.cancel()
+
+# Training runs in separate processes (TRAINING_MAX_CONCURRENT_JOBS at a
+# time, TRAINING_MAX_QUEUED_JOBS waiting); the API reloads the new model
+# when a job succeeds.
+last_pipeline = {"events": [], "finished_at": None}
+
+def on_training_success(job):
+    # Stage timings travel back from the job process in the result.
+    instrumentation = (job.get("result") or {}).get("instrumentation") or {}
+    last_pipeline["events"] = instrumentation.get("events", [])
+    last_pipeline["finished_at"] = time.time()
+    load_artifacts()
+
+jobs = JobManager.from_env(on_success=on_training_success)
+
+@app.on_event("startup")
+def start_jobs():
+    jobs.start()
+
+@app.on_event("shutdown")
+def stop_jobs():
+    jobs.shutdown()
+
+@app.on_event("startup")
+async def start_batcher():
+    if batching_enabled:
+        batcher.start()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await batcher.stop()
+
+@app.on_event("shutdown")
+def close_cache():
+    cache.close()
+
+@app.on_event("startup")
+def start_inference_log():
+    if logging_enabled:
+        inference_log.start()
+
+@app.on_event("shutdown")
+def stop_inference_log():
+    if logging_enabled:
+        inference_log.stop()
+
+def save_upload(file, prefix=""):
+    os.makedirs("data/uploads", exist_ok=True)
+    file_path = f"data/uploads/{prefix}{file.filename}"
+
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+    return file_path
+
+def submit_training_job(file, target_column, task_type, mode):
+    print(f"📥 Received file: {file.filename} with target: {target_column} ({task_type})")
+
+    # Each job keeps its own copy of the upload; the job manager deletes it
+    # once the job is over.
+    job_id = uuid.uuid4().hex
+    file_path = save_upload(file, prefix=f"{job_id}_")
+    try:
+        return jobs.submit(file_path, target_column, task_type, mode=mode, job_id=job_id)
+    except QueueFullError as e:
+        os.remove(file_path)
+        raise HTTPException(status_code=429, detail=f"Training queue is full ({e}).")
+
+@app.post("/jobs", status_code=202)
+def create_job(
+    file: UploadFile = File(...),
+    target_column: str = Form(...),
+    task_type: str = Form(...),
+    mode: str = Form("full")
+):
+    job_id = submit_training_job(file, target_column, task_type, mode)
+    return jobs.get(job_id)
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": jobs.list_jobs(), **jobs.stats()}
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = jobs.get(job_id, include_result=True)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}.")
+
+    return {
+        "status": "success",
+        "message": "Pipeline completed successfully",
+        "data": job["result"]
+    }
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if not jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job already finished.")
+    return jobs.get(job_id)
 
 @app.post("/upload-and-train")
 async def upload_and_train(
     file: UploadFile = File(...), 
     target_column: str = Form(...),
-    task_type: str = Form(...)
+    task_type: str = Form(...),
+    mode: str = Form("full")
 ):
-    print(f"📥 Received file: {file.filename} with target: {target_column} ({task_type})")
-    
-    # Save the uploaded file temporarily
-    os.makedirs("data/uploads", exist_ok=True)
-    file_path = f"data/uploads/{file.filename}"
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
+    # Same response as before, but training runs as a job and this only
+    # waits for it, so the event loop keeps serving other requests.
+    job_id = await asyncio.to_thread(submit_training_job, file, target_column, task_type, mode)
+
+    while jobs.get(job_id)["status"] not in ("succeeded", "failed", "cancelled"):
+        await asyncio.sleep(1)
+
+    return job_result(job_id)
+
+def registry_state():
+    return {
+        "current": registry.current(),
+        "loaded": bundle.version if bundle is not None else None,
+        "versions": registry.list_versions(),
+    }
+
+@app.get("/models")
+def list_models():
+    return registry_state()
+
+@app.post("/models/{version}/activate")
+async def activate_model(version: str):
+    # Also how to roll back to any earlier version.
     try:
-        # Initialize Orchestrator and run pipeline
-        orchestrator = Orchestrator(task_type=task_type)
-        result = orchestrator.run_training_pipeline(
-            raw_data_path=file_path,
-            target_column=target_column
-        )
-        
-        # Reload artifacts to memory to generate predictions
-        load_artifacts()
-        
-        # Generate predictions for the uploaded dataset
-        df = pd.read_csv(file_path)
-        
-        # If the target column is in the dataframe, drop it before prediction, or keep it depending on pipeline logic.
-        # The pipeline was trained on data without the target column.
-        if target_column in df.columns:
-            X_pred = df.drop(columns=[target_column])
-        else:
-            X_pred = df
+        registry.activate(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
-        transformed_data = pipeline.transform(X_pred)
-        predictions = model.predict(transformed_data)
-        
-        # Inverse transform predictions if it's classification and we have an encoder
-        if target_encoder is not None and task_type == "classification":
-            predictions = target_encoder.inverse_transform(predictions)
-        
-        # Append predictions
-        df[f"Predicted_{target_column}"] = predictions
-        
-        # Save predictions CSV
-        os.makedirs("data/processed", exist_ok=True)
-        predictions_path = "data/processed/predictions.csv"
-        df.to_csv(predictions_path, index=False)
-        
-        # Prepare response
-        return {
-            "status": "success",
-            "message": "Pipeline completed successfully",
-            "data": result
-        }
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+    await asyncio.to_thread(load_artifacts)
+    return registry_state()
+
+@app.post("/models/rollback")
+async def rollback_model():
+    """Make the previous version (parent of the live one) live again."""
+    try:
+        registry.rollback()
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=409, detail=e.args[0])
+
+    await asyncio.to_thread(load_artifacts)
+    return registry_state()
 
 @app.get("/download-predictions")
 def download_predictions():
@@ -120,42 +363,289 @@ def download_predictions():
     else:
         raise HTTPException(status_code=404, detail="Predictions file not found.")
 
+def model_version(current):
+    # Before the first registry deploy the legacy directory is the version.
+    return current.version or current.path
+
+async def predict_rows(rows, current, fast_path=True):
+    if fast_path and current.compiled_pipeline is not None and len(rows) == 1:
+        return await asyncio.to_thread(predict_record, rows[0], current)
+    if batching_enabled:
+        return await batcher.submit(rows, current)
+    return await asyncio.to_thread(predict_frame, pd.DataFrame(rows), current)
+
+async def predict_cached(rows, current):
+    """Predict only the rows that are not cached, then put their results in."""
+    # A field some rows leave out is NaN in the request's DataFrame; filling
+    # it in explicitly lets every row be keyed and predicted on its own.
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    complete = all(len(row) == len(columns) for row in rows)
+    rows = [{column: row.get(column, float("nan")) for column in columns} for row in rows]
+
+    version = model_version(current)
+    keys = [row_key(row, version) for row in rows]
+    # SQLite lookups block, so they stay off the event loop like inference.
+    results = await asyncio.to_thread(cache.get_many, keys)
+
+    missing = {}
+    for key, row in zip(keys, rows):
+        if key not in results:
+            missing.setdefault(key, row)
+
+    if missing:
+        predictions = await predict_rows(list(missing.values()), current, fast_path=complete)
+        computed = dict(zip(missing, predictions))
+        await asyncio.to_thread(cache.put_many, computed, version)
+        results.update(computed)
+
+    return [results[key] for key in keys]
+
 @app.post("/predict")
-def predict(request: PredictRequest):
-    if model is None or pipeline is None:
+async def predict(request: PredictRequest):
+    started = time.perf_counter()
+    current = bundle
+    if current is None:
         raise HTTPException(status_code=503, detail="Model artifacts not loaded.")
-        
+    if not request.data:
+        return {"predictions": []}
+
     try:
-        input_data = pd.DataFrame(request.data)
-        transformed_data = pipeline.transform(input_data)
-        predictions = model.predict(transformed_data)
-        
-        if target_encoder is not None:
-             predictions = target_encoder.inverse_transform(predictions)
-             
-        return {"predictions": predictions.tolist()}
+        if cache_enabled:
+            predictions = await predict_cached(request.data, current)
+        else:
+            predictions = await predict_rows(request.data, current)
+
+        if drift_monitor is not None:
+            drift_monitor.observe(request.data)
+        if logging_enabled:
+            inference_log.log(
+                request.data, predictions, model_version(current),
+                (time.perf_counter() - started) * 1000, source="predict",
+            )
+        return {"predictions": predictions}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/predict/metrics")
+def predict_metrics():
+    return {**batcher.metrics(), "cache": cache.metrics() if cache_enabled else None}
+
+def collect_metrics():
+    """Values owned by other components, read at scrape time."""
+    families = []
+
+    current = bundle
+    families.append((
+        "model_info", "gauge", "The loaded model version.",
+        [({"version": str(model_version(current))}, 1)] if current is not None else [],
+    ))
+
+    batch = batcher.metrics()
+    families += [
+        ("predict_batcher_requests_total", "counter", "Requests through the micro-batcher.",
+         [({}, batch["requests"])]),
+        ("predict_batcher_batches_total", "counter", "Batches predicted by the micro-batcher.",
+         [({}, batch["batches"])]),
+        ("predict_batcher_queue_depth", "gauge", "Requests waiting for a batch.",
+         [({}, batch["queue_depth"])]),
+    ]
+
+    if cache_enabled:
+        stats = cache.metrics()
+        families += [
+            ("predict_cache_lookups_total", "counter", "Per-row prediction cache lookups.",
+             [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])]),
+            ("predict_cache_entries", "gauge", "Rows held in the in-process prediction cache.",
+             [({}, stats["entries"])]),
+            ("predict_cache_evictions_total", "counter", "Rows evicted from the prediction cache.",
+             [({}, stats["evictions"])]),
+        ]
+
+    if logging_enabled:
+        stats = inference_log.metrics()
+        families += [
+            ("inference_log_rows_total", "counter", "Served rows by what happened to them.",
+             [({"state": state}, stats[f"{state}_rows"]) for state in ("logged", "written", "dropped")]),
+            ("inference_log_buffered_rows", "gauge", "Rows waiting to be written.",
+             [({}, stats["buffered_rows"])]),
+            ("inference_log_errors_total", "counter", "Failed inference log writes.",
+             [({}, stats["errors"])]),
+        ]
+
+    # Summed per stage (and per model for AutoML fits) over the last
+    # successful training job.
+    stages = {}
+    for event in last_pipeline["events"]:
+        labels = (event["event"], event.get("model", ""))
+        stage = stages.setdefault(labels, {"seconds": 0.0, "cpu": 0.0, "peak": None})
+        stage["seconds"] += event.get(
+            "wall_seconds", event.get("fit_seconds", 0.0) + event.get("predict_seconds", 0.0)
+        )
+        stage["cpu"] += event.get("cpu_seconds") or 0.0
+        if event.get("peak_rss_mb") is not None:
+            stage["peak"] = max(stage["peak"] or 0.0, event["peak_rss_mb"])
+
+    def samples(field):
+        return [
+            ({"stage": stage, "model": model}, values[field])
+            for (stage, model), values in stages.items() if values[field] is not None
+        ]
+
+    families += [
+        ("pipeline_stage_seconds", "gauge", "Wall time per stage of the last training run.",
+         samples("seconds")),
+        ("pipeline_stage_cpu_seconds", "gauge", "CPU time per stage of the last training run.",
+         samples("cpu")),
+        ("pipeline_stage_peak_rss_megabytes", "gauge", "Peak process RSS during each stage of the last training run.",
+         samples("peak")),
+        ("pipeline_last_success_timestamp_seconds", "gauge", "When the last training job succeeded.",
+         [({}, last_pipeline["finished_at"])] if last_pipeline["finished_at"] else []),
+    ]
+    return families
+
+metrics.add_collector(collect_metrics)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/drift/summary")
+def drift_summary():
+    """PSI / KS / chi-square of the traffic seen since the model was loaded."""
+    monitor = drift_monitor
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="No drift profile for the live model.")
+    return {"version": bundle.version, **monitor.summary()}
+
+@app.post("/drift/reset")
+def drift_reset():
+    monitor = drift_monitor
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="No drift profile for the live model.")
+    monitor.reset()
+    return {"version": bundle.version, **monitor.summary()}
+
+@app.post("/drift/report")
+async def drift_report(file: UploadFile = File(None)):
+    """Full Evidently report of an uploaded dataset, or of the inference log
+    when no file is sent, against the training data."""
+    current = bundle
+    if current is None:
+        raise HTTPException(status_code=503, detail="Model artifacts not loaded.")
+    training_data = glob.glob(os.path.join(current.path, "training_data.*"))
+    if not training_data:
+        raise HTTPException(status_code=404, detail="The live model has no training data to compare with.")
+
+    # Training rows are sampled per target class; the reference side is
+    # cached, so repeated reports against one version only process the upload.
+    target_column = (current.metadata or {}).get("target_column")
+    agent = MonitoringAgent(max_rows=drift_report_max_rows, stratify_column=target_column)
+
+    if file is not None:
+        file_path = save_upload(file, prefix="drift_")
+    else:
+        # Close the open segment so the rows served so far are included.
+        await asyncio.to_thread(inference_log.rotate)
+        if not inference_log.segment_paths():
+            raise HTTPException(status_code=404, detail="The inference log is empty.")
+        file_path = inference_log.log_dir
+
+    try:
+        report_path = await asyncio.to_thread(
+            agent.generate_drift_report, training_data[0], file_path
+        )
+        with open(os.path.join(agent.reports_dir, "data_drift_report.json")) as f:
+            run = json.load(f)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if file is not None:
+            os.remove(file_path)
+
+    return {
+        "report_url": "/reports/" + os.path.basename(report_path) if report_path else None,
+        "run": run,
+    }
+
+@app.get("/inference-log")
+def inference_log_status():
+    return {**inference_log.metrics(), "enabled": logging_enabled}
+
+@app.post("/inference-log/rotate")
+async def rotate_inference_log():
+    """Write out the buffered rows and close the open segment."""
+    await asyncio.to_thread(inference_log.rotate)
+    return {**inference_log.metrics(), "enabled": logging_enabled}
+
+async def stream_batch_predictions(file_path, current, monitor):
+    def predict_chunk(chunk):
+        started = time.perf_counter()
+        predictions = predict_frame(chunk, current)
+        if monitor is not None:
+            monitor.update(chunk)
+        if logging_enabled:
+            inference_log.log(
+                chunk, predictions, model_version(current),
+                (time.perf_counter() - started) * 1000, source="batch",
+            )
+        return predictions
+
+    # Text features are read as text in every chunk, whatever its values.
+    metadata = current.metadata or {}
+    dtype = {col: str for col in metadata.get("categorical_columns", [])}
+
+    # Every chunk uses the same bundle, even if a new version goes live mid-file.
+    chunks = iter_prediction_chunks(
+        file_path,
+        predict_chunk,
+        chunksize=batch_chunksize,
+        n_workers=batch_workers,
+        dtype=dtype,
+    )
+
+    # Run the first chunk before answering, so a file that does not fit the
+    # model still gets a 400 instead of a 200 with a truncated body.
+    try:
+        first = await asyncio.to_thread(next, chunks, "")
+    except Exception as e:
+        os.remove(file_path)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def body():
+        try:
+            yield first
+            yield from chunks
+        finally:
+            os.remove(file_path)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="batch_predictions.csv"'},
+    )
+
 @app.post("/batch-predict")
-async def batch_predict(file: UploadFile = File(...)):
-    if model is None or pipeline is None:
+async def batch_predict(file: UploadFile = File(...), stream: bool = False):
+    current, monitor = bundle, drift_monitor
+    if current is None:
         raise HTTPException(status_code=503, detail="Model artifacts not loaded.")
         
-    os.makedirs("data/uploads", exist_ok=True)
-    file_path = f"data/uploads/batch_{file.filename}"
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    file_path = save_upload(file, prefix="batch_")
+
+    if stream:
+        return await stream_batch_predictions(file_path, current, monitor)
         
     try:
         df = pd.read_csv(file_path)
-        transformed_data = pipeline.transform(df)
-        predictions = model.predict(transformed_data)
-        
-        if target_encoder is not None:
-             predictions = target_encoder.inverse_transform(predictions)
-             
+        started = time.perf_counter()
+        predictions = predict_frame(df, current)
+        if monitor is not None:
+            monitor.update(df)
+        if logging_enabled:
+            inference_log.log(
+                df, predictions, model_version(current),
+                (time.perf_counter() - started) * 1000, source="batch",
+            )
         df["AI_Prediction"] = predictions
         
         os.makedirs("data/processed", exist_ok=True)
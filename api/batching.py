@@ -0,0 +1,181 @@
+import os
+import time
+import asyncio
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class MicroBatcher:
+    """Coalesces concurrent /predict calls into one vectorised predict.
+
+    Requests wait in a queue for at most ``max_wait_ms`` (or until
+    ``max_batch_size`` rows are waiting); the batch then goes through a
+    single ``predict_fn(DataFrame, context)`` call in a worker thread and
+    each caller gets its own slice of the result back.
+
+    Requests are only batched with others that send the same columns, so a
+    missing field cannot be silently filled by a neighbour, and the same
+    ``context`` (the API passes the model bundle the request captured, so a
+    hot swap cannot answer it with another model). If a batch
+    fails, its requests are retried one by one so a single bad payload only
+    fails its own caller.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5.0, history=1000):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue = None
+        self._worker = None
+
+        # Rolling windows for the metrics endpoint.
+        self._batch_sizes = deque(maxlen=history)
+        self._queue_delays_ms = deque(maxlen=history)
+        self.n_requests = 0
+        self.n_batches = 0
+        self.n_fallbacks = 0
+
+    @classmethod
+    def from_env(cls, predict_fn):
+        return cls(
+            predict_fn,
+            max_batch_size=int(os.getenv("PREDICT_MAX_BATCH_SIZE", "64")),
+            max_wait_ms=float(os.getenv("PREDICT_MAX_WAIT_MS", "5")),
+        )
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    async def submit(self, rows, context=None):
+        """Predictions for ``rows`` (a list of dicts), computed in a shared
+        batch by ``predict_fn(frame, context)``."""
+        if self._worker is None:
+            raise RuntimeError("MicroBatcher is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((rows, context, future, time.perf_counter()))
+        return await future
+
+    def metrics(self):
+        sizes = np.asarray(self._batch_sizes, dtype=float)
+        delays = np.asarray(self._queue_delays_ms, dtype=float)
+
+        def summary(values):
+            if values.size == 0:
+                return None
+            return {
+                "mean": float(values.mean()),
+                "p50": float(np.percentile(values, 50)),
+                "p99": float(np.percentile(values, 99)),
+                "max": float(values.max()),
+            }
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "requests": self.n_requests,
+            "batches": self.n_batches,
+            "fallbacks": self.n_fallbacks,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size_rows": summary(sizes),
+            "queue_delay_ms": summary(delays),
+        }
+
+    # -----------------------------
+    # Worker
+    # -----------------------------
+    async def _collect(self):
+        """Wait for one request, then keep taking more until the batch is
+        full or max_wait_ms has passed since the first one arrived."""
+        batch = [await self._queue.get()]
+        n_rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+
+            started = time.perf_counter()
+            for _, _, _, enqueued in batch:
+                self._queue_delays_ms.append((started - enqueued) * 1000)
+
+            # Requests with the same fields and context share one DataFrame.
+            groups = {}
+            for item in batch:
+                columns = tuple(sorted({key for row in item[0] for key in row}))
+                groups.setdefault((id(item[1]), columns), []).append(item)
+
+            for items in groups.values():
+                await self._predict_group(items)
+
+    async def _predict_group(self, items):
+        rows = [row for request_rows, _, _, _ in items for row in request_rows]
+        context = items[0][1]
+        self.n_requests += len(items)
+        self.n_batches += 1
+        self._batch_sizes.append(len(rows))
+
+        try:
+            predictions = await asyncio.to_thread(self.predict_fn, pd.DataFrame(rows), context)
+        except Exception as exc:
+            if len(items) == 1:
+                self._resolve(items[0][2], error=exc)
+                return
+            # Find the offending request(s) instead of failing everyone.
+            self.n_fallbacks += 1
+            for request_rows, _, future, _ in items:
+                try:
+                    result = await asyncio.to_thread(
+                        self.predict_fn, pd.DataFrame(request_rows), context
+                    )
+                    self._resolve(future, result=list(result))
+                except Exception as exc:
+                    self._resolve(future, error=exc)
+            return
+
+        offset = 0
+        for request_rows, _, future, _ in items:
+            self._resolve(future, result=list(predictions[offset:offset + len(request_rows)]))
+            offset += len(request_rows)
+
+    @staticmethod
+    def _resolve(future, result=None, error=None):
+        # The caller may have gone away (client disconnect cancels the future).
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
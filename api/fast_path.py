@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from sklearn.preprocessing import OneHotEncoder, StandardScaler, TargetEncoder
+
+from agents.feature_engineering.encoders import FrequencyEncoder, HashingEncoder
+
+
+class CompiledPipeline:
+    """The fitted ColumnTransformer flattened into arrays and dicts.
+
+    ``transform_record`` turns one JSON record straight into the feature
+    row ``pipeline.transform`` would produce for it, without building a
+    DataFrame. The arithmetic is the same as sklearn's (subtract the mean,
+    then divide by the scale, in float64), so the row is bit-identical.
+
+    Anything it is not sure to reproduce exactly (a missing field, a
+    non-string category, an encoder it does not know) raises, and the
+    caller falls back to the pandas path.
+    """
+
+    def __init__(self, steps, n_features, sparse_output, columns):
+        self.steps = steps
+        self.n_features = n_features
+        self.sparse_output = sparse_output
+        self.columns = columns
+
+    # -----------------------------
+    # Building
+    # -----------------------------
+    @classmethod
+    def build(cls, pipeline, metadata):
+        """(CompiledPipeline, None), or (None, reason) when the pipeline
+        holds a step with no compiled equivalent."""
+        steps = []
+        offset = 0
+
+        for name, transformer, columns in pipeline.transformers_:
+            if isinstance(transformer, str):
+                if transformer == "drop":
+                    continue
+                return None, f"unsupported_step: {name}={transformer}"
+            if len(columns) == 0:
+                # ColumnTransformer skips empty selections (never fitted).
+                continue
+
+            columns = list(columns)
+            if isinstance(transformer, StandardScaler):
+                step, width = _compile_scaler(transformer, columns, offset)
+            elif isinstance(transformer, OneHotEncoder):
+                step, width = _compile_onehot(transformer, columns, offset)
+            elif isinstance(transformer, FrequencyEncoder):
+                step, width = _compile_frequency(transformer, columns, offset)
+            elif isinstance(transformer, HashingEncoder):
+                step, width = _compile_hashing(transformer, columns, offset)
+            elif isinstance(transformer, TargetEncoder):
+                step, width = _compile_target(transformer, columns, offset)
+            else:
+                step, width = None, None
+
+            if step is None:
+                return None, f"unsupported_step: {name}={type(transformer).__name__}"
+
+            steps.append(step)
+            offset += width
+
+        if offset != metadata["output_shape"][1]:
+            return None, f"width_mismatch: {offset} != {metadata['output_shape'][1]}"
+
+        columns = metadata["numerical_columns"] + metadata["categorical_columns"]
+        return cls(steps, offset, bool(pipeline.sparse_output_), columns), None
+
+    # -----------------------------
+    # Inference
+    # -----------------------------
+    def transform_record(self, record):
+        """Feature row (1, n_features) for one record, dense or CSR like
+        the fitted pipeline's output."""
+        row = np.zeros(self.n_features)
+        for step in self.steps:
+            step(record, row)
+
+        row = row.reshape(1, -1)
+        if self.sparse_output:
+            return sp.csr_matrix(row)
+        return row
+
+
+# -----------------------------
+# Step compilers
+# -----------------------------
+# Each returns (step, width); step(record, row) writes its slice of row.
+
+def _categories_are_strings(categories):
+    return all(isinstance(value, str) for value in categories)
+
+
+def _string_value(record, col):
+    # sklearn refuses to compare a number with string categories, so only
+    # strings can take the compiled path.
+    value = record[col]
+    if not isinstance(value, str):
+        raise TypeError(f"{col}: non-string category {value!r}")
+    return value
+
+
+def _compile_scaler(scaler, columns, offset):
+    mean = scaler.mean_ if scaler.with_mean else None
+    scale = scaler.scale_ if scaler.with_std else None
+    end = offset + len(columns)
+
+    def step(record, row):
+        x = np.array([float(record[col]) for col in columns])
+        if mean is not None:
+            x -= mean
+        if scale is not None:
+            x /= scale
+        row[offset:end] = x
+
+    return step, len(columns)
+
+
+def _compile_onehot(encoder, columns, offset):
+    if encoder.drop is not None:
+        return None, None
+
+    infrequent = getattr(encoder, "infrequent_categories_", None)
+    handle_unknown = encoder.handle_unknown
+
+    lookups = []
+    position = offset
+    for i, categories in enumerate(encoder.categories_):
+        if not _categories_are_strings(categories):
+            return None, None
+
+        rare = set() if infrequent is None or infrequent[i] is None else set(infrequent[i])
+        frequent = [value for value in categories if value not in rare]
+
+        lookup = {value: position + j for j, value in enumerate(frequent)}
+        position += len(frequent)
+
+        unknown = None
+        if rare:
+            # The infrequent column comes after the frequent ones.
+            for value in rare:
+                lookup[value] = position
+            if handle_unknown == "infrequent_if_exist":
+                unknown = position
+            position += 1
+
+        lookups.append((lookup, unknown))
+
+    if position - offset != len(encoder.get_feature_names_out()):
+        return None, None
+
+    def step(record, row):
+        for col, (lookup, unknown) in zip(columns, lookups):
+            index = lookup.get(_string_value(record, col), unknown)
+            if index is None:
+                if handle_unknown == "error":
+                    raise ValueError(f"{col}: unknown category")
+                continue
+            row[index] = 1.0
+
+    return step, position - offset
+
+
+def _compile_frequency(encoder, columns, offset):
+    tables = [(encoder.frequencies_[col], encoder.rare_frequency_[col]) for col in columns]
+
+    def step(record, row):
+        for i, (col, (frequencies, rare)) in enumerate(zip(columns, tables)):
+            row[offset + i] = frequencies.get(str(record[col]), rare)
+
+    return step, len(columns)
+
+
+def _compile_hashing(encoder, columns, offset):
+    n_buckets = np.uint64(encoder.n_buckets)
+
+    def step(record, row):
+        keys = np.array([f"{col}={record[col]}" for col in columns], dtype=object)
+        for bucket in pd.util.hash_array(keys) % n_buckets:
+            row[offset + int(bucket)] += 1.0
+
+    return step, encoder.n_buckets
+
+
+def _compile_target(encoder, columns, offset):
+    # Multiclass targets widen every column to n_classes outputs.
+    if encoder.target_type_ == "multiclass":
+        return None, None
+    if not all(_categories_are_strings(c) for c in encoder.categories_):
+        return None, None
+
+    lookups = [
+        dict(zip(categories, encodings))
+        for categories, encodings in zip(encoder.categories_, encoder.encodings_)
+    ]
+    target_mean = encoder.target_mean_
+
+    def step(record, row):
+        for i, (col, lookup) in enumerate(zip(columns, lookups)):
+            row[offset + i] = lookup.get(_string_value(record, col), target_mean)
+
+    return step, len(columns)
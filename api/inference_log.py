@@ -0,0 +1,273 @@
+import os
+import time
+import threading
+from collections import deque
+
+import pandas as pd
+
+from mlops.storage import FrameWriter
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _stable_types(df):
+    """Numbers as float64, everything else (but timestamps) as strings, so
+    segments written from differently typed requests share one schema."""
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            columns[column] = series
+        elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            columns[column] = series.astype("float64")
+        else:
+            columns[column] = series.astype(str).where(series.notna(), None)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def _meta_columns(meta):
+    # The underscore keeps these apart from feature names, and
+    # MonitoringAgent only compares columns the training data also has, so
+    # the log directory works as its current data as is.
+    predictions, versions, latencies, sources, logged_at = zip(*meta)
+    return {
+        "_prediction": list(predictions),
+        "_model_version": [None if v is None else str(v) for v in versions],
+        "_latency_ms": list(latencies),
+        "_source": list(sources),
+        "_logged_at": pd.to_datetime(list(logged_at), unit="s"),
+    }
+
+
+class InferenceLogger:
+    """Records what the API served: feature rows, prediction, model version
+    and latency.
+
+    ``log`` only appends a reference to an in-memory ring buffer of at most
+    ``capacity`` rows (the oldest entries are dropped, and counted, if the
+    writer falls behind), so serving never waits on disk. A background
+    thread drains the buffer every ``flush_interval`` seconds and appends
+    the rows to a segment file under ``log_dir``; a segment is closed and
+    becomes visible once it holds ``segment_rows`` rows or is
+    ``segment_seconds`` old. Open segments live in ``log_dir/_open``, which
+    Parquet/Arrow dataset readers skip, so ``read_frame(log_dir)`` only ever
+    sees complete files.
+    """
+
+    def __init__(self, log_dir="data/inference_log", capacity=100000, flush_interval=2.0,
+                 segment_rows=100000, segment_seconds=300.0, format="parquet"):
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {sorted(FORMATS)}")
+        self.log_dir = log_dir
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.segment_rows = segment_rows
+        self.segment_seconds = segment_seconds
+        self.format = format
+
+        self._buffer = deque()
+        self._buffered_rows = 0
+        self._lock = threading.Lock()
+        # Serialises flush/rotate between the background thread and callers.
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._writer = None
+        self._segment_started = None
+        self._segment_seq = 0
+
+        self.logged_rows = 0
+        self.written_rows = 0
+        self.dropped_rows = 0
+        self.segments = 0
+        self.errors = 0
+        self.last_flush_ms = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            log_dir=os.getenv("INFERENCE_LOG_DIR", "data/inference_log"),
+            capacity=int(os.getenv("INFERENCE_LOG_CAPACITY", "100000")),
+            flush_interval=float(os.getenv("INFERENCE_LOG_FLUSH_SECONDS", "2")),
+            segment_rows=int(os.getenv("INFERENCE_LOG_SEGMENT_ROWS", "100000")),
+            segment_seconds=float(os.getenv("INFERENCE_LOG_SEGMENT_SECONDS", "300")),
+            format=os.getenv("INFERENCE_LOG_FORMAT", "parquet"),
+        )
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="inference-log", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write out everything still buffered and close the open segment."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.rotate()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def log(self, rows, predictions, model_version, latency_ms, source="predict"):
+        """Queue served rows: a list of dicts or a DataFrame (whose current
+        columns are kept; columns added to it later are not logged)."""
+        columns = list(rows.columns) if isinstance(rows, pd.DataFrame) else None
+        entry = (rows, columns, list(predictions), model_version, latency_ms, source, time.time())
+
+        with self._lock:
+            self._buffer.append(entry)
+            self._buffered_rows += len(rows)
+            self.logged_rows += len(rows)
+            while self._buffered_rows > self.capacity and len(self._buffer) > 1:
+                dropped = self._buffer.popleft()
+                self._buffered_rows -= len(dropped[0])
+                self.dropped_rows += len(dropped[0])
+            full = self._buffered_rows >= self.segment_rows
+
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Append the buffered rows to the open segment."""
+        with self._lock:
+            entries, self._buffer = self._buffer, deque()
+            self._buffered_rows = 0
+        if not entries:
+            return 0
+
+        started = time.perf_counter()
+        frames = []
+        # Consecutive /predict entries are small; they become one DataFrame
+        # together instead of one each.
+        records, meta = [], []
+
+        def add_records():
+            if records:
+                frames.append(pd.DataFrame(records).assign(**_meta_columns(meta)))
+                records.clear()
+                meta.clear()
+
+        for rows, columns, predictions, version, latency_ms, source, logged_at in entries:
+            if columns is None:
+                records.extend(rows)
+                meta.extend((p, version, latency_ms, source, logged_at) for p in predictions)
+                continue
+            add_records()
+            frames.append(rows[columns].reset_index(drop=True).assign(
+                _prediction=predictions,
+                _model_version=None if version is None else str(version),
+                _latency_ms=latency_ms,
+                _source=source,
+                _logged_at=pd.Timestamp(logged_at, unit="s"),
+            ))
+        add_records()
+
+        df = _stable_types(pd.concat(frames, ignore_index=True))
+
+        with self._write_lock:
+            try:
+                self._write(df)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Inference log write failed, {len(df)} rows lost: {e}")
+                return 0
+
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        return len(df)
+
+    def rotate(self):
+        """Flush, then close the open segment so readers can see it."""
+        self.flush()
+        with self._write_lock:
+            self._close_segment()
+
+    def segment_paths(self):
+        if not os.path.isdir(self.log_dir):
+            return []
+        return sorted(
+            os.path.join(self.log_dir, name) for name in os.listdir(self.log_dir)
+            if name.endswith(FORMATS[self.format])
+        )
+
+    def metrics(self):
+        return {
+            "log_dir": self.log_dir,
+            "format": self.format,
+            "capacity": self.capacity,
+            "buffered_rows": self._buffered_rows,
+            "logged_rows": self.logged_rows,
+            "written_rows": self.written_rows,
+            "dropped_rows": self.dropped_rows,
+            "segments": self.segments,
+            "open_segment_rows": self._writer.rows if self._writer is not None else 0,
+            "errors": self.errors,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+    # -----------------------------
+    # Writer
+    # -----------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            with self._write_lock:
+                if (
+                    self._writer is not None
+                    and time.time() - self._segment_started >= self.segment_seconds
+                ):
+                    self._close_segment()
+
+    def _open_segment(self):
+        self._segment_seq += 1
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._segment_seq:04d}{FORMATS[self.format]}"
+        self._writer = FrameWriter(os.path.join(self.log_dir, "_open", name))
+        self._segment_started = time.time()
+
+    def _close_segment(self):
+        if self._writer is None:
+            return
+        writer, self._writer = self._writer, None
+        writer.close()
+        if writer.rows:
+            os.replace(writer.path, os.path.join(self.log_dir, os.path.basename(writer.path)))
+            self.segments += 1
+        elif os.path.exists(writer.path):
+            os.remove(writer.path)
+
+    def _write(self, df):
+        start = 0
+        while start < len(df):
+            if self._writer is None:
+                self._open_segment()
+            elif self._writer.schema is not None and list(df.columns) != self._writer.schema.names:
+                # Requests with other fields start a new segment, so every
+                # file has one schema.
+                self._close_segment()
+                self._open_segment()
+
+            part = df.iloc[start:start + self.segment_rows - self._writer.rows]
+            try:
+                self._writer.write(part)
+            except Exception:
+                if self._writer.rows == 0:
+                    raise
+                # Same fields, other types (e.g. a column that was all
+                # nulls so far): also a new segment.
+                self._close_segment()
+                self._open_segment()
+                self._writer.write(part)
+            self.written_rows += len(part)
+            start += len(part)
+
+            if self._writer.rows >= self.segment_rows:
+                self._close_segment()
@@ -0,0 +1,358 @@
+import os
+import time
+import uuid
+import queue
+import threading
+import traceback
+import multiprocessing as mp
+from collections import OrderedDict
+
+import joblib
+import pandas as pd
+
+from mlops.registry import ModelRegistry
+
+
+# Stages a job reports progress for, in the order they usually finish.
+TRAINING_STAGES = [
+    "cleaning", "feature_engineering", "monitoring", "automl",
+    "evaluation", "deployment", "predictions",
+]
+INCREMENTAL_STAGES = ["incremental", "deployment", "predictions"]
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+# -----------------------------
+# Work done in the job process
+# -----------------------------
+def write_predictions(file_path, target_column, task_type, deployment_dir=None):
+    """Predict the uploaded file with the freshly deployed model, for the
+    output dashboard (data/processed/predictions.csv)."""
+    deployment_dir = deployment_dir or ModelRegistry().current_dir()
+    model = joblib.load(os.path.join(deployment_dir, "model.pkl"))
+    pipeline = joblib.load(os.path.join(deployment_dir, "pipeline.pkl"))
+    encoder_path = os.path.join(deployment_dir, "target_encoder.pkl")
+
+    df = pd.read_csv(file_path)
+
+    # The pipeline was trained on data without the target column.
+    X_pred = df.drop(columns=[target_column]) if target_column in df.columns else df
+    predictions = model.predict(pipeline.transform(X_pred))
+
+    if task_type == "classification" and os.path.exists(encoder_path):
+        predictions = joblib.load(encoder_path).inverse_transform(predictions)
+
+    df[f"Predicted_{target_column}"] = predictions
+
+    os.makedirs("data/processed", exist_ok=True)
+    predictions_path = "data/processed/predictions.csv"
+    df.to_csv(predictions_path, index=False)
+    return predictions_path
+
+
+def run_training(raw_data_path, target_column, task_type, mode="full", on_event=None):
+    """Training (or an incremental update) plus predictions for the upload."""
+    from orchestrator.orchestrator import Orchestrator
+
+    def notify(stage, status):
+        if on_event is not None:
+            on_event(stage, status)
+
+    orchestrator = Orchestrator(task_type=task_type)
+    if mode == "incremental":
+        # Update the live model with these rows; refits from scratch on
+        # old + new data when the batch cannot be absorbed.
+        result = orchestrator.run_incremental_pipeline(
+            raw_data_path=raw_data_path, target_column=target_column, on_event=on_event
+        )
+    else:
+        result = orchestrator.run_training_pipeline(
+            raw_data_path=raw_data_path, target_column=target_column, on_event=on_event
+        )
+
+    notify("predictions", "started")
+    write_predictions(raw_data_path, target_column, task_type)
+    notify("predictions", "completed")
+    return result
+
+
+def _remove_input(raw_data_path):
+    try:
+        os.remove(raw_data_path)
+    except FileNotFoundError:
+        pass
+
+
+def _job_process(job_id, events, kwargs):
+    def on_event(stage, status):
+        events.put((job_id, "stage", (stage, status)))
+
+    try:
+        result = run_training(on_event=on_event, **kwargs)
+        events.put((job_id, "result", result))
+    except Exception as e:
+        # The full traceback goes to the job's log, the message to the API.
+        traceback.print_exc()
+        events.put((job_id, "error", str(e)))
+    finally:
+        _remove_input(kwargs["raw_data_path"])
+
+
+# -----------------------------
+# Job manager (API process)
+# -----------------------------
+class JobManager:
+    """Runs training jobs in child processes so the API event loop stays free.
+
+    At most ``max_concurrent`` jobs run at once (each in its own spawned
+    process) and at most ``max_queued`` wait behind them; ``submit`` raises
+    QueueFullError beyond that. Stages report progress back over a per-job
+    multiprocessing queue. Cancelling a queued job drops it, cancelling a
+    running one terminates its process.
+
+    All jobs write to the same artifacts/ paths, so ``max_concurrent``
+    should stay at 1 unless they run in separate working directories.
+
+    A job owns its ``raw_data_path``: the file is deleted when the job
+    finishes, is cancelled or its process dies.
+    """
+
+    def __init__(self, max_concurrent=1, max_queued=8, history=100, on_success=None,
+                 poll_interval=0.2):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.history = history
+        # Called with the job record in the API process when a job succeeds
+        # (the app reloads its model artifacts here).
+        self.on_success = on_success
+        self.poll_interval = poll_interval
+
+        self._ctx = mp.get_context("spawn")
+        self._jobs = OrderedDict()
+        self._queued = []
+        # job_id -> (process, its event queue); a queue is never shared, so
+        # terminating one job cannot corrupt another's messages.
+        self._processes = {}
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._stopping = threading.Event()
+
+    @classmethod
+    def from_env(cls, on_success=None):
+        return cls(
+            max_concurrent=int(os.getenv("TRAINING_MAX_CONCURRENT_JOBS", "1")),
+            max_queued=int(os.getenv("TRAINING_MAX_QUEUED_JOBS", "8")),
+            on_success=on_success,
+        )
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    def start(self):
+        self._stopping.clear()
+        self._monitor = threading.Thread(target=self._run, name="job-monitor", daemon=True)
+        self._monitor.start()
+
+    def shutdown(self):
+        self._stopping.set()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+        with self._lock:
+            for job_id, (process, _) in list(self._processes.items()):
+                process.terminate()
+                process.join()
+                self._finish(job_id, "cancelled", error="server shutdown")
+            self._processes.clear()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def submit(self, raw_data_path, target_column, task_type, mode="full", job_id=None):
+        with self._lock:
+            if len(self._queued) >= self.max_queued:
+                raise QueueFullError(f"{len(self._queued)} jobs already queued")
+
+            job_id = job_id or uuid.uuid4().hex
+            stages = INCREMENTAL_STAGES if mode == "incremental" else TRAINING_STAGES
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": "queued",
+                "mode": mode,
+                "task_type": task_type,
+                "target_column": target_column,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "stages": {stage: "pending" for stage in stages},
+                "result": None,
+                "error": None,
+                "_kwargs": {
+                    "raw_data_path": raw_data_path,
+                    "target_column": target_column,
+                    "task_type": task_type,
+                    "mode": mode,
+                },
+            }
+            self._queued.append(job_id)
+            self._trim_history()
+            self._dispatch()
+            return job_id
+
+    def cancel(self, job_id):
+        """True if the job was queued or running and is now cancelled."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return False
+
+            if job_id in self._queued:
+                self._queued.remove(job_id)
+            else:
+                process, _ = self._processes.pop(job_id)
+                process.terminate()
+                process.join()
+
+            self._finish(job_id, "cancelled")
+            self._dispatch()
+            return True
+
+    def get(self, job_id, include_result=False):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else self._public(job, include_result)
+
+    def list_jobs(self):
+        with self._lock:
+            return [self._public(job) for job in reversed(self._jobs.values())]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queued": self.max_queued,
+                "running": len(self._processes),
+                "queued": len(self._queued),
+            }
+
+    # -----------------------------
+    # Internals (called with the lock held)
+    # -----------------------------
+    def _public(self, job, include_result=False):
+        stages = job["stages"]
+        done = sum(status == "completed" for status in stages.values())
+        public = {k: v for k, v in job.items() if not k.startswith("_") and k != "result"}
+        public["progress"] = {
+            "completed": done,
+            "total": len(stages),
+            "fraction": done / len(stages) if stages else 0.0,
+            "running": [stage for stage, status in stages.items() if status == "started"],
+        }
+        if job["status"] == "queued":
+            public["queue_position"] = self._queued.index(job["job_id"]) + 1
+        if include_result:
+            public["result"] = job["result"]
+        return public
+
+    def _dispatch(self):
+        while self._queued and len(self._processes) < self.max_concurrent:
+            job_id = self._queued.pop(0)
+            job = self._jobs[job_id]
+            events = self._ctx.Queue()
+            process = self._ctx.Process(
+                target=_job_process,
+                args=(job_id, events, job["_kwargs"]),
+                name=f"training-{job_id[:8]}",
+                daemon=True,
+            )
+            process.start()
+            self._processes[job_id] = (process, events)
+            job["status"] = "running"
+            job["started_at"] = time.time()
+
+    def _finish(self, job_id, status, result=None, error=None):
+        job = self._jobs[job_id]
+        job["status"] = status
+        job["finished_at"] = time.time()
+        job["result"] = result
+        job["error"] = error
+        # A cancelled or killed process never reaches its own cleanup.
+        _remove_input(job["_kwargs"]["raw_data_path"])
+        for stage, stage_status in job["stages"].items():
+            if stage_status == "started":
+                job["stages"][stage] = "failed" if status == "failed" else status
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED]
+        for job_id in finished[: max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def _handle(self, job_id, kind, payload):
+        job = self._jobs.get(job_id)
+        # Late messages from a cancelled job are ignored.
+        if job is None or job["status"] != "running":
+            return []
+
+        if kind == "stage":
+            stage, status = payload
+            job["stages"][stage] = status
+            return []
+
+        process, _ = self._processes.pop(job_id)
+        process.join()
+
+        if kind == "result":
+            self._finish(job_id, "succeeded", result=payload)
+            return [dict(job)]
+        self._finish(job_id, "failed", error=payload)
+        return []
+
+    # -----------------------------
+    # Monitor thread
+    # -----------------------------
+    def _drain(self):
+        """Apply every message waiting from the running jobs."""
+        with self._lock:
+            channels = [(job_id, events) for job_id, (_, events) in self._processes.items()]
+
+        succeeded = []
+        for job_id, events in channels:
+            while True:
+                try:
+                    message = events.get_nowait()
+                except queue.Empty:
+                    break
+                with self._lock:
+                    succeeded += self._handle(*message)
+        return succeeded
+
+    def _run(self):
+        while not self._stopping.wait(self.poll_interval):
+            with self._lock:
+                exited = [
+                    job_id for job_id, (process, _) in self._processes.items()
+                    if process.exitcode is not None
+                ]
+
+            # Messages sent just before an exit are still read first.
+            succeeded = self._drain()
+
+            with self._lock:
+                for job_id in exited:
+                    # Exited without reporting a result (killed, crashed).
+                    if job_id in self._processes:
+                        process, _ = self._processes.pop(job_id)
+                        self._finish(
+                            job_id, "failed",
+                            error=f"job process exited with code {process.exitcode}",
+                        )
+                self._dispatch()
+
+            for job in succeeded:
+                if self.on_success is not None:
+                    self.on_success(job)
@@ -0,0 +1,72 @@
+import os
+import json
+import joblib
+
+from api.fast_path import CompiledPipeline
+from mlops.flat_forest import FlatForest
+
+
+class ModelBundle:
+    """Everything one model version needs to serve predictions.
+
+    A bundle is built completely before it is published and never changed
+    afterwards, so a request that took a reference to it keeps using one
+    consistent model/pipeline/encoder set even if a new version goes live
+    while it runs.
+    """
+
+    __slots__ = ("version", "path", "model", "pipeline", "target_encoder",
+                 "metadata", "compiled_pipeline")
+
+    def __init__(self, version, path, model, pipeline, target_encoder=None,
+                 metadata=None, compiled_pipeline=None):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.pipeline = pipeline
+        self.target_encoder = target_encoder
+        self.metadata = metadata
+        self.compiled_pipeline = compiled_pipeline
+
+    @classmethod
+    def load(cls, path, version=None, compile_fast_path=True, mmap=True):
+        """Load the bundle in ``path``, or None if it has no model/pipeline.
+
+        With ``mmap`` the model's arrays are memory-mapped read-only from
+        the (immutable) version files, so API workers share their pages:
+        the flat forest export when there is one, otherwise joblib's
+        ``mmap_mode`` for numpy attributes (linear coefficients, MLP
+        weights, KNN training data).
+        """
+        model_path = os.path.join(path, "model.pkl")
+        pipeline_path = os.path.join(path, "pipeline.pkl")
+        encoder_path = os.path.join(path, "target_encoder.pkl")
+        metadata_path = os.path.join(path, "metadata.json")
+
+        if not (os.path.exists(model_path) and os.path.exists(pipeline_path)):
+            return None
+
+        if mmap and os.path.exists(os.path.join(path, "forest.json")):
+            model = FlatForest.load(path)
+        else:
+            model = joblib.load(model_path, mmap_mode="r" if mmap else None)
+        pipeline = joblib.load(pipeline_path)
+        target_encoder = joblib.load(encoder_path) if os.path.exists(encoder_path) else None
+
+        metadata = None
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+
+        compiled_pipeline = None
+        if compile_fast_path and metadata is not None:
+            compiled_pipeline, reason = CompiledPipeline.build(pipeline, metadata)
+            if compiled_pipeline is None:
+                print(f"⚠️ Fast path disabled ({reason}), using the pandas path.")
+
+        return cls(version, path, model, pipeline, target_encoder, metadata, compiled_pipeline)
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("ModelBundle is immutable")
+        object.__setattr__(self, name, value)
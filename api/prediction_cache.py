@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def canonical_row(row):
+    """A stable text form of one input row: keys sorted, no whitespace, and
+    floats written with repr (round-trips exactly), so equal rows always
+    produce the same string whatever order their fields arrived in."""
+    return json.dumps(row, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def row_key(row, model_version):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(model_version).encode())
+    digest.update(b"\0")
+    digest.update(canonical_row(row).encode())
+    return digest.hexdigest()
+
+
+class _SqliteStore:
+    """Prediction entries in a local SQLite file, shared by every API worker
+    on the machine. Entries carry the model version so a deploy can drop the
+    old ones, and an expiry time so stale rows are never returned."""
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, version TEXT, value TEXT, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys, now):
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            # SQLite caps the number of bound parameters per statement.
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM predictions WHERE expires_at > ? "
+                    f"AND key IN ({','.join('?' * len(part))})",
+                    [now, *part],
+                ).fetchall()
+                found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def put_many(self, entries, version, expires_at):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                [(key, str(version), json.dumps(value), expires_at) for key, value in entries.items()],
+            )
+            self._writes += len(entries)
+            if self._writes >= max(1, self.max_entries // 10):
+                self._writes = 0
+                self._trim()
+            self._conn.commit()
+
+    def _trim(self):
+        self._conn.execute("DELETE FROM predictions WHERE expires_at <= ?", (time.time(),))
+        # Over the size limit: drop the entries closest to expiry.
+        self._conn.execute(
+            "DELETE FROM predictions WHERE key IN (SELECT key FROM predictions "
+            "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def drop_other_versions(self, version):
+        with self._lock:
+            self._conn.execute("DELETE FROM predictions WHERE version != ?", (str(version),))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PredictionCache:
+    """Per-row /predict results, keyed on the canonical row and the model version.
+
+    Dashboards resend the same records every few seconds; each row is looked
+    up on its own, so a request where only some rows changed predicts just
+    those. Entries live in a bounded LRU dict for at most ``ttl_seconds``.
+    With ``store_path`` they are also written to a SQLite file, so workers
+    started with the same path reuse each other's results.
+
+    The model version is part of every key, so a hot-reloaded model never
+    sees an older model's predictions; ``invalidate`` also frees them.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=300.0, store_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.store = _SqliteStore(store_path, max_entries * 10) if store_path else None
+
+        self.version = None
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.getenv("PREDICT_CACHE_SIZE", "10000")),
+            ttl_seconds=float(os.getenv("PREDICT_CACHE_TTL", "300")),
+            store_path=os.getenv("PREDICT_CACHE_PATH") or None,
+        )
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def get_many(self, keys):
+        """{key: prediction} for every key of ``keys`` that is cached."""
+        now = time.time()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                value, expires_at = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+
+        missing = [key for key in keys if key not in found]
+        if self.store is not None and missing:
+            shared = self.store.get_many(set(missing), now)
+            if shared:
+                self._put_local(shared, now + self.ttl_seconds)
+                found.update(shared)
+                self.store_hits += len(shared)
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries, version):
+        """Store {key: prediction}; ``version`` is the model that made them."""
+        if not entries:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        self._put_local(entries, expires_at)
+        if self.store is not None:
+            self.store.put_many(entries, version, expires_at)
+
+    def invalidate(self, version):
+        """Drop everything predicted by a model other than ``version``."""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self._entries.clear()
+            self.invalidations += 1
+        if self.store is not None:
+            self.store.drop_other_versions(version)
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "shared_store": self.store.path if self.store is not None else None,
+            "model_version": self.version,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+    def _put_local(self, entries, expires_at):
+        with self._lock:
+            for key, value in entries.items():
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
@@ -0,0 +1,46 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+
+def _predict_chunk(chunk, predict_fn, output_column):
+    chunk[output_column] = predict_fn(chunk)
+    return chunk
+
+
+def iter_prediction_chunks(file_path, predict_fn, chunksize=10000, n_workers=1,
+                           output_column="AI_Prediction", dtype=None):
+    """Yield the CSV at ``file_path`` back as CSV text, one chunk at a time,
+    with ``output_column`` holding ``predict_fn(chunk)``.
+
+    With ``n_workers > 1`` chunks are predicted on a thread pool, but at
+    most ``n_workers`` are in flight and they are yielded in input order,
+    so memory is bounded by ``n_workers`` chunks whatever the file size.
+
+    ``dtype`` is passed to ``read_csv``: each chunk infers its own dtypes,
+    so a text column that is blank throughout one chunk would otherwise
+    arrive as float there.
+    """
+    reader = pd.read_csv(file_path, chunksize=chunksize, dtype=dtype)
+    header = True
+
+    if n_workers <= 1:
+        for chunk in reader:
+            chunk = _predict_chunk(chunk, predict_fn, output_column)
+            yield chunk.to_csv(index=False, header=header)
+            header = False
+        return
+
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        pending = deque()
+        for chunk in reader:
+            pending.append(pool.submit(_predict_chunk, chunk, predict_fn, output_column))
+            if len(pending) < n_workers:
+                continue
+            yield pending.popleft().result().to_csv(index=False, header=header)
+            header = False
+
+        while pending:
+            yield pending.popleft().result().to_csv(index=False, header=header)
+            header = False
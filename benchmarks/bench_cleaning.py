@@ -0,0 +1,113 @@
+"""Benchmark CleaningAgent.run on wide frames.
+
+Times the whole cleaning stage (read, profile, fill, write) on a frame from
+``benchmarks.datagen``, for the working tree and, with ``--baseline REV``,
+for the agent as it is at that git revision (checked out into a temporary
+worktree). Every run happens in its own process, so the two agents never
+share imports or caches.
+
+    python -m benchmarks.bench_cleaning --rows 20000 --cols 200 400 --baseline fcba29c^
+    python -m benchmarks.bench_cleaning --rows 200000 --cols 50 --chunksize 20000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.datagen import make_dataset
+from mlops.storage import write_frame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the agent's source tree; prints the best wall time in seconds.
+TIMER = """
+import json, sys, time
+from agents.cleaning.cleaning_agent import CleaningAgent
+
+raw_data_path, output_path, repeats, options = sys.argv[1:]
+agent = CleaningAgent(**json.loads(options))
+timings = []
+for _ in range(int(repeats)):
+    start = time.perf_counter()
+    agent.run(raw_data_path, output_path)
+    timings.append(time.perf_counter() - start)
+print(min(timings))
+"""
+
+
+def time_agent(source_dir, raw_data_path, work_dir, repeats, options):
+    """Best-of-``repeats`` seconds for CleaningAgent.run from ``source_dir``."""
+    env = {**os.environ, "PYTHONPATH": source_dir}
+    # The agent writes its report under reports/, relative to the cwd.
+    result = subprocess.run(
+        [sys.executable, "-c", TIMER, raw_data_path,
+         os.path.join(work_dir, "cleaned.csv"), str(repeats), json.dumps(options)],
+        cwd=work_dir, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"CleaningAgent.run failed in {source_dir}:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def add_worktree(revision, path):
+    subprocess.run(
+        ["git", "-C", ROOT, "worktree", "add", "--detach", path, revision],
+        check=True, capture_output=True,
+    )
+
+
+def remove_worktree(path):
+    subprocess.run(["git", "-C", ROOT, "worktree", "remove", "--force", path], capture_output=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--cols", type=int, nargs="+", default=[50, 200, 400])
+    parser.add_argument("--missing", type=float, default=0.05, help="share of blank cells")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="run the agents in chunked mode")
+    parser.add_argument("--baseline", default=None,
+                        help="git revision to compare the working tree against")
+    args = parser.parse_args()
+
+    options = {"chunksize": args.chunksize} if args.chunksize else {}
+    work_dir = tempfile.mkdtemp(prefix="bench_cleaning_")
+    baseline_dir = None
+    try:
+        if args.baseline:
+            baseline_dir = os.path.join(work_dir, "baseline")
+            add_worktree(args.baseline, baseline_dir)
+
+        header = f"{'cols':>6} {'head (s)':>10}"
+        if baseline_dir:
+            header += f" {'baseline (s)':>13} {'speedup':>8}"
+        print(header)
+
+        for n_cols in args.cols:
+            # A quarter of the columns are text, as in make_dataset's usual mix.
+            n_categorical = n_cols // 4
+            df = make_dataset(
+                args.rows, n_numeric=n_cols - n_categorical, n_categorical=n_categorical,
+                cardinality=5, missing_ratio=args.missing,
+            )
+            raw_data_path = write_frame(df, os.path.join(work_dir, f"raw_{n_cols}.csv"))
+
+            head = time_agent(ROOT, raw_data_path, work_dir, args.repeats, options)
+            line = f"{n_cols:>6} {head:>10.3f}"
+            if baseline_dir:
+                baseline = time_agent(baseline_dir, raw_data_path, work_dir, args.repeats, options)
+                line += f" {baseline:>13.3f} {baseline / head:>7.1f}x"
+            print(line)
+    finally:
+        if baseline_dir:
+            remove_worktree(baseline_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
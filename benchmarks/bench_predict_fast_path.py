@@ -0,0 +1,91 @@
+"""Parity check and latency benchmark for the compiled single-record path.
+
+Loads the live model version, pushes every row of a dataset through
+both ``pipeline.transform`` on a one-row DataFrame and
+``CompiledPipeline.transform_record``, checks the feature rows and the
+predictions are identical, and reports per-record p50/p99 latency.
+
+    python -m benchmarks.bench_predict_fast_path data/employee_attrition.csv --target Will_Quit
+"""
+import argparse
+import json
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from api.fast_path import CompiledPipeline
+from mlops.registry import ModelRegistry
+
+
+def to_dense(X):
+    return X.toarray() if sp.issparse(X) else np.asarray(X)
+
+
+def percentiles_ms(timings):
+    timings = np.asarray(timings) * 1000
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("data_path")
+    parser.add_argument("--target", default=None, help="column to drop before predicting")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--deployment-dir", default=None, help="defaults to the live version")
+    args = parser.parse_args()
+    deployment_dir = args.deployment_dir or ModelRegistry().current_dir()
+
+    model = joblib.load(f"{deployment_dir}/model.pkl")
+    pipeline = joblib.load(f"{deployment_dir}/pipeline.pkl")
+    with open(f"{deployment_dir}/metadata.json") as f:
+        metadata = json.load(f)
+
+    compiled, reason = CompiledPipeline.build(pipeline, metadata)
+    if compiled is None:
+        print(f"❌ Pipeline cannot be compiled: {reason}")
+        sys.exit(1)
+
+    df = pd.read_csv(args.data_path).head(args.rows)
+    if args.target in df.columns:
+        df = df.drop(columns=[args.target])
+    # JSON-like records, as /predict receives them.
+    records = json.loads(df.to_json(orient="records"))
+
+    mismatches = 0
+    pandas_timings, compiled_timings = [], []
+    for record in records:
+        start = time.perf_counter()
+        expected = model.predict(pipeline.transform(pd.DataFrame([record])))
+        pandas_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        features = compiled.transform_record(record)
+        got = model.predict(features)
+        compiled_timings.append(time.perf_counter() - start)
+
+        same_row = np.array_equal(
+            to_dense(features), to_dense(pipeline.transform(pd.DataFrame([record]))), equal_nan=True
+        )
+        if not same_row or not np.array_equal(got, expected):
+            mismatches += 1
+
+    pandas_p50, pandas_p99 = percentiles_ms(pandas_timings)
+    compiled_p50, compiled_p99 = percentiles_ms(compiled_timings)
+
+    print(f"{'path':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    print(f"{'pandas':>10} {pandas_p50:>9.3f} {pandas_p99:>9.3f}")
+    print(f"{'compiled':>10} {compiled_p50:>9.3f} {compiled_p99:>9.3f}")
+    print(f"p50 speedup: {pandas_p50 / compiled_p50:.1f}x")
+
+    if mismatches:
+        print(f"❌ {mismatches}/{len(records)} records differ from the pandas path")
+        sys.exit(1)
+    print(f"✅ {len(records)} records identical to the pandas path")
+
+
+if __name__ == "__main__":
+    main()
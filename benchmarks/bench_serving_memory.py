@@ -0,0 +1,133 @@
+"""Startup time and resident memory of N API workers loading one model version.
+
+Each worker is a separate (spawned) process that loads the bundle through
+``ModelBundle.load`` - with private unpickled copies (``--no-mmap``
+behaviour) and with memory-mapped artifacts - then serves a few small
+batches so the pages it needs are resident, and with ``--batch-rows`` one
+/batch-predict sized batch as well. Memory is read while every
+worker is still alive: PSS splits shared pages between the processes that
+map them, so the PSS total is what the workers really cost together.
+
+By default a synthetic RandomForest bundle is built in a temporary
+directory; ``--version-dir`` measures an existing model version instead.
+
+    python -m benchmarks.bench_serving_memory --workers 1 2 4 --trees 300 --batch-rows 0 10000
+"""
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import psutil
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from mlops.flat_forest import FlatForest
+
+
+def build_bundle(directory, n_trees, n_rows, n_features, seed=42):
+    rng = np.random.RandomState(seed)
+    X = rng.normal(size=(n_rows, n_features))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(size=n_rows) > 0).astype(int)
+
+    model = RandomForestClassifier(n_estimators=n_trees, random_state=seed, n_jobs=-1).fit(X, y)
+    joblib.dump(model, os.path.join(directory, "model.pkl"))
+    joblib.dump(StandardScaler().fit(X), os.path.join(directory, "pipeline.pkl"))
+    FlatForest.from_estimator(model).save(directory)
+
+
+def worker(directory, mmap, n_features, batch_rows, ready, done):
+    from api.model_bundle import ModelBundle
+
+    start = time.perf_counter()
+    bundle = ModelBundle.load(directory, compile_fast_path=False, mmap=mmap)
+    load_seconds = time.perf_counter() - start
+
+    # Requests the size /predict sees, enough of them to touch most trees.
+    rng = np.random.RandomState(os.getpid() % 1000)
+    for _ in range(20):
+        bundle.model.predict(rng.normal(size=(16, n_features)))
+    if batch_rows:
+        bundle.model.predict(rng.normal(size=(batch_rows, n_features)))
+
+    ready.put(load_seconds)
+    done.wait()
+
+
+def memory_mb(pid):
+    info = psutil.Process(pid).memory_full_info()
+    # PSS is Linux-only; elsewhere RSS (which counts shared pages in full).
+    pss = getattr(info, "pss", info.rss)
+    return info.uss / 2 ** 20, pss / 2 ** 20
+
+
+def measure(directory, mmap, n_workers, n_features, batch_rows):
+    ctx = mp.get_context("spawn")
+    ready = ctx.Queue()
+    done = ctx.Event()
+
+    processes = [
+        ctx.Process(target=worker, args=(directory, mmap, n_features, batch_rows, ready, done))
+        for _ in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+
+    load_seconds = [ready.get() for _ in processes]
+    usage = [memory_mb(process.pid) for process in processes]
+
+    done.set()
+    for process in processes:
+        process.join()
+
+    return {
+        "load_seconds": float(np.mean(load_seconds)),
+        "uss_mb": float(np.mean([uss for uss, _ in usage])),
+        "total_pss_mb": float(sum(pss for _, pss in usage)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--features", type=int, default=20)
+    parser.add_argument("--batch-rows", type=int, nargs="+", default=[0, 10000],
+                        help="rows of the extra large batch per worker (0: small batches only)")
+    parser.add_argument("--version-dir", default=None, help="existing model version to load")
+    args = parser.parse_args()
+
+    directory = args.version_dir
+    cleanup = directory is None
+    if cleanup:
+        directory = tempfile.mkdtemp(prefix="serving_bench_")
+        print(f"Building a {args.trees}-tree RandomForest bundle in {directory} ...")
+        build_bundle(directory, args.trees, args.rows, args.features)
+
+    n_features = joblib.load(os.path.join(directory, "pipeline.pkl")).n_features_in_
+    model_mb = os.path.getsize(os.path.join(directory, "model.pkl")) / 2 ** 20
+    print(f"model.pkl: {model_mb:.1f} MiB")
+
+    try:
+        print(f"{'mode':>8} {'batch':>6} {'workers':>8} {'load (s)':>9} "
+              f"{'USS/worker (MiB)':>17} {'total PSS (MiB)':>16}")
+        for batch_rows in args.batch_rows:
+            for mmap in (False, True):
+                for n_workers in args.workers:
+                    stats = measure(directory, mmap, n_workers, n_features, batch_rows)
+                    print(
+                        f"{'mmap' if mmap else 'pickle':>8} {batch_rows:>6} {n_workers:>8} "
+                        f"{stats['load_seconds']:>9.3f} {stats['uss_mb']:>17.1f} {stats['total_pss_mb']:>16.1f}"
+                    )
+    finally:
+        if cleanup:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""End-to-end benchmark of the training pipeline and the serving API.
+
+``run`` generates a synthetic dataset (see benchmarks.datagen), trains it
+with ``Orchestrator.run_training_pipeline`` and load-tests ``/predict``
+and ``/batch-predict`` through an in-process ASGI client. It reports stage
+timings, throughput, p50/p99 latency and peak RSS as JSON. Everything the
+pipeline writes (artifacts, model registry, reports) goes to a scratch
+directory, so the checkout's own models are left alone. The API runs with
+whatever PREDICT_* / INFERENCE_LOG* settings the environment holds.
+
+``compare`` flags metrics that got worse than a stored baseline by more
+than ``--threshold`` (relative), and exits with status 1 if any did. Only
+compare runs from the same machine; on shared machines run-to-run noise
+can reach 20-25%, so raise the threshold there.
+
+    python -m benchmarks.run run --rows 50000 --cardinality 500 --output reports/benchmarks/new.json
+    python -m benchmarks.run compare reports/benchmarks/new.json reports/benchmarks/baseline.json
+    python -m benchmarks.run run --baseline reports/benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.datagen import TARGET, make_dataset
+from mlops.instrumentation import recorder
+from mlops.storage import write_frame
+from orchestrator.orchestrator import Orchestrator
+
+# Metrics ``compare`` checks, by key, with their unit.
+COMPARED = {
+    "seconds": "seconds",
+    "cpu_seconds": "seconds",
+    "fit_seconds": "seconds",
+    "peak_rss_mb": "mb",
+    "p50_ms": "ms",
+    "p99_ms": "ms",
+    "rows_per_second": "per_second",
+}
+# Changes smaller than these are noise, however large relative to the baseline.
+NOISE_FLOOR = {"seconds": 0.05, "ms": 1.0, "mb": 5.0, "per_second": 0.0}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latency_summary(latencies, n_rows, seconds):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "rows": n_rows,
+        "total_seconds": seconds,
+        "requests_per_second": len(latencies) / seconds,
+        "rows_per_second": n_rows / seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+    }
+
+
+def measured(event, fn, *args):
+    """Run ``fn`` in an instrumentation span; return (result, span event)."""
+    mark = recorder.mark()
+    with recorder.span(event):
+        result = fn(*args)
+    return result, recorder.events_since(mark)[-1]
+
+
+# -----------------------------
+# Training
+# -----------------------------
+def bench_pipeline(data_path, task_type):
+    orchestrator = Orchestrator(task_type=task_type, use_cache=False)
+    result, span = measured(
+        "benchmark.pipeline", orchestrator.run_training_pipeline, data_path, TARGET
+    )
+
+    # Wall time per DAG stage, CPU / memory / shapes from the agent's event.
+    agent_events = {
+        event["event"].split(".")[0]: event
+        for event in result["instrumentation"]["events"] if "wall_seconds" in event
+    }
+    stages = {}
+    for name, timing in result["timeline"]["stages"].items():
+        event = agent_events.get(name, {})
+        stages[name] = {
+            "seconds": timing["duration"],
+            "cpu_seconds": event.get("cpu_seconds"),
+            "peak_rss_mb": event.get("peak_rss_mb"),
+            "rows": event.get("rows"),
+            "columns": event.get("columns"),
+        }
+
+    fits = {}
+    for event in result["instrumentation"]["events"]:
+        if event["event"] == "automl.fit":
+            fit = fits.setdefault(event["model"], {"fit_seconds": 0.0, "predict_seconds": 0.0})
+            fit["fit_seconds"] += event["fit_seconds"]
+            fit["predict_seconds"] += event["predict_seconds"]
+
+    # CPU time is per stage: the stages run on the DAG's threads.
+    return {
+        "seconds": span["wall_seconds"],
+        "peak_rss_mb": span["peak_rss_mb"],
+        "critical_path": result["timeline"]["critical_path"],
+        "best_model": result["automl_report"]["best_model"],
+        "stages": stages,
+        "models": fits,
+    }
+
+
+# -----------------------------
+# Serving
+# -----------------------------
+async def load_predict(client, records, batch_size, n_requests, concurrency):
+    payloads = iter(
+        {"data": [records[(i * batch_size + j) % len(records)] for j in range(batch_size)]}
+        for i in range(n_requests)
+    )
+    latencies = []
+
+    async def worker():
+        # Workers share one iterator, so each payload is sent once.
+        for payload in payloads:
+            started = time.perf_counter()
+            response = await client.post("/predict", json=payload)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latency_summary(latencies, n_requests * batch_size, time.perf_counter() - started)
+
+
+async def load_batch_predict(client, csv_bytes, n_rows, n_requests, stream):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(n_requests):
+        t = time.perf_counter()
+        response = await client.post(
+            "/batch-predict",
+            params={"stream": str(stream).lower()},
+            files={"file": ("benchmark.csv", csv_bytes, "text/csv")},
+        )
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - t)
+    return latency_summary(latencies, n_requests * n_rows, time.perf_counter() - started)
+
+
+async def bench_serving(app, features, args):
+    records = json.loads(features.head(args.predict_rows).to_json(orient="records"))
+    csv_bytes = features.head(args.batch_rows).to_csv(index=False).encode()
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            # Warm-up: lazy imports, first dense copies, compiled fast path.
+            await load_predict(client, records, 1, 20, 1)
+
+            for batch_size in args.batch_sizes:
+                mark = recorder.mark()
+                with recorder.span("benchmark.predict"):
+                    summary = await load_predict(
+                        client, records, batch_size, args.requests, args.concurrency
+                    )
+                summary["peak_rss_mb"] = recorder.events_since(mark)[-1]["peak_rss_mb"]
+                results[f"predict_batch_{batch_size}"] = summary
+
+            for stream in (False, True):
+                mark = recorder.mark()
+                with recorder.span("benchmark.batch_predict"):
+                    summary = await load_batch_predict(
+                        client, csv_bytes, len(features.head(args.batch_rows)),
+                        args.batch_requests, stream,
+                    )
+                summary["peak_rss_mb"] = recorder.events_since(mark)[-1]["peak_rss_mb"]
+                results["batch_predict_stream" if stream else "batch_predict"] = summary
+    return results
+
+
+def run(args):
+    config = {
+        "task": args.task,
+        "rows": args.rows,
+        "numeric": args.numeric,
+        "categorical": args.categorical,
+        "cardinality": args.cardinality,
+        "missing": args.missing,
+        "seed": args.seed,
+        "predict_rows": args.predict_rows,
+        "batch_sizes": args.batch_sizes,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "batch_rows": args.batch_rows,
+        "batch_requests": args.batch_requests,
+    }
+    print(f"📏 Benchmark config: {config}")
+
+    df = make_dataset(
+        args.rows, args.numeric, args.categorical, args.cardinality, args.missing,
+        args.task, seed=args.seed,
+    )
+    # Missing values are only imputed by the cleaning stage, so the API is
+    # sent complete rows.
+    features = df.drop(columns=[TARGET]).dropna()
+
+    # Imported here so ``compare`` does not load the API; before the chdir
+    # below, as it mounts the checkout's reports/ and frontend/ directories.
+    from api.app import app
+
+    output_path = os.path.abspath(args.output)
+    repo_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="benchmark_")
+    try:
+        # The pipeline and the API use paths relative to the working directory.
+        os.chdir(workdir)
+        os.makedirs("reports", exist_ok=True)
+        write_frame(df, "data/benchmark.csv")
+
+        pipeline = bench_pipeline("data/benchmark.csv", args.task)
+        serving = asyncio.run(bench_serving(app, features, args))
+    finally:
+        os.chdir(repo_dir)
+        if args.keep_workdir:
+            print(f"Scratch directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+        "pipeline": pipeline,
+        "serving": serving,
+    }
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=4)
+
+    print_results(results)
+    print(f"✅ Benchmark results saved at {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        return report_comparison(results, baseline, args.threshold, args.verbose)
+    return 0
+
+
+def _fmt(value, spec):
+    # Peak RSS and CPU time are missing where they cannot be measured.
+    return "-" if value is None else format(value, spec)
+
+
+def print_results(results):
+    pipeline = results["pipeline"]
+    print(f"\nPipeline: {pipeline['seconds']:.2f} s, peak RSS {_fmt(pipeline['peak_rss_mb'], '.0f')} MiB "
+          f"(best model {pipeline['best_model']})")
+    print(f"{'stage':>20} {'wall (s)':>9} {'cpu (s)':>8} {'peak RSS (MiB)':>15}")
+    for name, stage in pipeline["stages"].items():
+        print(f"{name:>20} {stage['seconds']:>9.2f} {_fmt(stage['cpu_seconds'], '.2f'):>8} "
+              f"{_fmt(stage['peak_rss_mb'], '.0f'):>15}")
+
+    print(f"\n{'endpoint':>24} {'req/s':>8} {'rows/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'peak RSS':>9}")
+    for name, summary in results["serving"].items():
+        print(f"{name:>24} {summary['requests_per_second']:>8.1f} {summary['rows_per_second']:>10.0f} "
+              f"{summary['p50_ms']:>9.2f} {summary['p99_ms']:>9.2f} {_fmt(summary['peak_rss_mb'], '.0f'):>9}")
+
+
+# -----------------------------
+# Compare
+# -----------------------------
+def flatten_metrics(results):
+    """{"pipeline.stages.automl.seconds": value, ...} for every comparable number."""
+    metrics = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                walk(f"{prefix}.{key}" if prefix else key, child)
+        elif prefix.rsplit(".", 1)[-1] in COMPARED and value is not None:
+            metrics[prefix] = float(value)
+
+    walk("", {"pipeline": results["pipeline"], "serving": results["serving"]})
+    return metrics
+
+
+def compare(current, baseline, threshold=0.2):
+    """Rows of (metric, baseline, current, relative change, status)."""
+    current_metrics, baseline_metrics = flatten_metrics(current), flatten_metrics(baseline)
+    rows = []
+    for name in sorted(set(current_metrics) & set(baseline_metrics)):
+        old, new = baseline_metrics[name], current_metrics[name]
+        unit = COMPARED[name.rsplit(".", 1)[-1]]
+        change = (new - old) / old if old else 0.0
+        # Throughput should go up; times and memory should go down.
+        worse = -change if unit == "per_second" else change
+
+        status = "ok"
+        if abs(new - old) >= NOISE_FLOOR[unit]:
+            if worse > threshold:
+                status = "regression"
+            elif worse < -threshold:
+                status = "improvement"
+        rows.append((name, old, new, change, status))
+    return rows
+
+
+def report_comparison(current, baseline, threshold, verbose=False):
+    if current["config"] != baseline["config"]:
+        print("⚠️ The runs used different configs; differences may not be regressions.")
+    if current.get("cpu_count") != baseline.get("cpu_count"):
+        print("⚠️ The runs were on machines with different CPU counts.")
+
+    rows = compare(current, baseline, threshold)
+    print(f"\nAgainst baseline {baseline.get('commit')} ({baseline.get('created_at')}), "
+          f"threshold {threshold:.0%}, {len(rows)} metrics:")
+    print(f"{'metric':>60} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, old, new, change, status in rows:
+        if status == "ok" and not verbose:
+            continue
+        flag = {"regression": " ❌", "improvement": " ✅"}.get(status, "")
+        print(f"{name:>60} {old:>10.3f} {new:>10.3f} {change:>+8.1%}{flag}")
+
+    regressions = [row for row in rows if row[4] == "regression"]
+    if regressions:
+        print(f"❌ {len(regressions)} metrics regressed by more than {threshold:.0%}")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark and save the results")
+    run_parser.add_argument("--task", choices=["classification", "regression"], default="classification")
+    run_parser.add_argument("--rows", type=int, default=20000)
+    run_parser.add_argument("--numeric", type=int, default=8)
+    run_parser.add_argument("--categorical", type=int, default=2)
+    run_parser.add_argument("--cardinality", type=int, default=20)
+    run_parser.add_argument("--missing", type=float, default=0.02)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--predict-rows", type=int, default=1000,
+                            help="distinct rows the /predict requests cycle through")
+    run_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100],
+                            help="rows per /predict request")
+    run_parser.add_argument("--requests", type=int, default=500, help="/predict requests per batch size")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--batch-rows", type=int, default=20000, help="rows per /batch-predict upload")
+    run_parser.add_argument("--batch-requests", type=int, default=3)
+    run_parser.add_argument("--output", default="reports/benchmarks/latest.json")
+    run_parser.add_argument("--baseline", default=None, help="compare with this results file")
+    run_parser.add_argument("--threshold", type=float, default=0.2)
+    run_parser.add_argument("--verbose", action="store_true", help="list unchanged metrics too")
+    run_parser.add_argument("--keep-workdir", action="store_true")
+
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    compare_parser.add_argument("--verbose", action="store_true", help="list unchanged metrics too")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        sys.exit(run(args))
+
+    with open(args.current) as f:
+        current = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    sys.exit(report_comparison(current, baseline, args.threshold, args.verbose))
+
+
+if __name__ == "__main__":
+    main()
@@ -223,10 +223,10 @@ document.addEventListener("DOMContentLoaded", () => {
 
         // Switch to loading view
         switchView(uploadView, loadingView);
-        animateLoadingText();
+        loadingText.textContent = "Uploading data...";
 
         try {
-            const response = await fetch("/upload-and-train", {
+            const response = await fetch("/jobs", {
                 method: "POST",
                 body: formData
             });
@@ -236,7 +236,8 @@ document.addEventListener("DOMContentLoaded", () => {
                 throw new Error(err.detail || "Pipeline failed");
             }
 
-            const data = await response.json();
+            const job = await response.json();
+            const data = await waitForJob(job.job_id);
             populateDashboard(data.data, taskType);
             
             // Fetch predictions to draw output dashboard
@@ -299,25 +300,42 @@ document.addEventListener("DOMContentLoaded", () => {
         }, 400); // Wait for fade out
     }
 
-    function animateLoadingText() {
-        const steps = [
-            "Cleaning data...",
-            "Engineering features...",
-            "Training AutoML models...",
-            "Evaluating models...",
-            "Generating predictions...",
-            "Generating reports..."
-        ];
-        let stepIndex = 0;
-        
-        const interval = setInterval(() => {
-            if (!loadingView.classList.contains("active")) {
-                clearInterval(interval);
-                return;
+    const stageLabels = {
+        cleaning: "Cleaning data...",
+        feature_engineering: "Engineering features...",
+        monitoring: "Generating reports...",
+        automl: "Training AutoML models...",
+        evaluation: "Evaluating models...",
+        deployment: "Deploying model...",
+        incremental: "Updating model...",
+        predictions: "Generating predictions..."
+    };
+
+    // Poll the training job until it finishes, showing the stage it is in.
+    async function waitForJob(jobId) {
+        while (true) {
+            const response = await fetch(`/jobs/${jobId}`);
+            if (!response.ok) throw new Error("Lost track of the training job");
+            const job = await response.json();
+
+            if (job.status === "succeeded") {
+                const result = await fetch(`/jobs/${jobId}/result`);
+                return await result.json();
+            }
+            if (job.status === "failed" || job.status === "cancelled") {
+                throw new Error(job.error || `Training ${job.status}`);
+            }
+
+            const { completed, total, running } = job.progress;
+            if (job.status === "queued") {
+                loadingText.textContent = `Waiting in queue (position ${job.queue_position})...`;
+            } else {
+                const label = stageLabels[running[0]] || "Starting training...";
+                loadingText.textContent = `${label} (${completed}/${total})`;
             }
-            stepIndex = (stepIndex + 1) % steps.length;
-            loadingText.textContent = steps[stepIndex];
-        }, 3000);
+
+            await new Promise((resolve) => setTimeout(resolve, 1000));
+        }
     }
 
     function populateDashboard(resultData, taskType) {
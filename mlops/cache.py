@@ -0,0 +1,232 @@
+import os
+import ast
+import sys
+import json
+import glob
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+
+import joblib
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """sha256 of a file's bytes, read in chunks so large CSVs stay cheap."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_path(path):
+    """sha256 of a file, or of every data file in a directory (names and
+    bytes), so a directory of segments changes hash when any segment does."""
+    if not os.path.isdir(path):
+        return hash_file(path)
+
+    digest = hashlib.sha256()
+    for root, dirs, names in os.walk(path):
+        # Same files a dataset reader sees: nothing starting with "." or "_".
+        dirs[:] = sorted(d for d in dirs if not d.startswith((".", "_")))
+        for name in sorted(names):
+            if name.startswith((".", "_")):
+                continue
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode())
+            digest.update(hash_file(file_path).encode())
+    return digest.hexdigest()
+
+
+def _project_imports(path, root):
+    """Files under ``root`` that the module at ``path`` imports (absolute
+    imports only, the style used throughout this project)."""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            # "from pkg import name" may name a submodule or an attribute.
+            names.append(node.module)
+            names += [f"{node.module}.{alias.name}" for alias in node.names]
+
+    files = []
+    for name in names:
+        base = os.path.join(root, *name.split("."))
+        for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+            if os.path.isfile(candidate):
+                files.append(os.path.abspath(candidate))
+    return files
+
+
+def code_version(obj):
+    """Hash of the code that defines ``obj``'s class: every .py file in its
+    package plus, transitively, the project modules those files import.
+
+    Editing an agent, a helper next to it or a shared module it relies on
+    (mlops.sketches, mlops.storage, the encoders, ...) changes its version
+    and so invalidates every cache entry built with the old code. Third-party
+    packages are not followed.
+    """
+    module = sys.modules[type(obj).__module__]
+    package_dir = os.path.dirname(os.path.abspath(module.__file__))
+    # The directory the top-level package is imported from.
+    root = package_dir
+    for _ in range(module.__name__.count(".")):
+        root = os.path.dirname(root)
+
+    pending = sorted(glob.glob(os.path.join(package_dir, "*.py")))
+    seen = set()
+    while pending:
+        path = os.path.abspath(pending.pop())
+        if path in seen:
+            continue
+        seen.add(path)
+        pending += _project_imports(path, root)
+
+    digest = hashlib.sha256()
+    for path in sorted(seen):
+        digest.update(os.path.relpath(path, root).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def agent_config(agent):
+    """The scalar settings of an agent (thresholds, task_type, ...)."""
+    return {
+        k: v for k, v in sorted(vars(agent).items())
+        if isinstance(v, (str, int, float, bool, type(None)))
+    }
+
+
+class StageCache:
+    """Content-addressed cache of pipeline stage outputs with LRU eviction.
+
+    Each entry is a directory named after the stage key holding copies of the
+    files the stage wrote plus an optional pickled payload (the stage's return
+    value). ``index.json`` tracks entry sizes and last access so the cache can
+    be trimmed back under ``max_bytes``, least recently used first.
+    """
+
+    def __init__(self, cache_dir="artifacts/cache", max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Stages may run concurrently, so index updates are serialised.
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(stage, *parts):
+        blob = json.dumps([stage, *parts], sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    # -----------------------------
+    # Index bookkeeping
+    # -----------------------------
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def _save_index(self, index):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=4)
+        os.replace(tmp_path, self.index_path)
+
+    def _evict(self, index):
+        total = sum(entry["size"] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= index[key]["size"]
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            del index[key]
+            self.evictions += 1
+            print(f"🗑️ Evicted cache entry {key[:12]}")
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def get(self, stage, key, outputs):
+        """Restore a cached stage.
+
+        ``outputs`` maps file names to the paths the stage normally writes;
+        on a hit the cached copies are put back there (and paths the entry
+        does not hold are removed) and ``(True, payload)`` is returned.
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+
+        with self._lock:
+            index = self._load_index()
+            if key not in index or not os.path.isdir(entry_dir):
+                self.misses += 1
+                return False, None
+
+            for name, dest in outputs.items():
+                src = os.path.join(entry_dir, name)
+                if os.path.exists(src):
+                    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+                    shutil.copy2(src, dest)
+                elif os.path.exists(dest):
+                    # e.g. a target encoder left over from another run
+                    os.remove(dest)
+
+            payload_path = os.path.join(entry_dir, "payload.pkl")
+            payload = joblib.load(payload_path) if os.path.exists(payload_path) else None
+
+            index[key]["last_access"] = time.time()
+            self._save_index(index)
+            self.hits += 1
+
+        print(f"♻️ Cache hit for {stage} ({key[:12]})")
+        return True, payload
+
+    def put(self, stage, key, outputs, payload=None):
+        """Store the files in ``outputs`` (name -> path) and ``payload`` under ``key``."""
+        entry_dir = os.path.join(self.cache_dir, key)
+        # Unique per call, so two runs storing the same key do not collide.
+        tmp_dir = tempfile.mkdtemp(prefix=key + ".", suffix=".tmp", dir=self.cache_dir)
+
+        for name, src in outputs.items():
+            if os.path.exists(src):
+                shutil.copy2(src, os.path.join(tmp_dir, name))
+        if payload is not None:
+            joblib.dump(payload, os.path.join(tmp_dir, "payload.pkl"))
+
+        size = sum(
+            os.path.getsize(os.path.join(tmp_dir, name)) for name in os.listdir(tmp_dir)
+        )
+
+        with self._lock:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+
+            index = self._load_index()
+            now = time.time()
+            index[key] = {"stage": stage, "size": size, "created": now, "last_access": now}
+            self._evict(index)
+            self._save_index(index)
+
+    def stats(self):
+        index = self._load_index()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(index),
+            "size_bytes": sum(entry["size"] for entry in index.values()),
+            "max_bytes": self.max_bytes,
+        }
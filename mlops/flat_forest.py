@@ -0,0 +1,253 @@
+"""Flat, memory-mappable export of RandomForest / ExtraTrees models.
+
+Unpickling a forest copies every tree into freshly allocated memory (the
+Cython ``Tree`` copies its node buffer in ``__setstate__``), so N API
+workers hold N private copies. ``FlatForest`` keeps all trees in two plain
+``.npy`` arrays instead:
+
+* ``forest_nodes.npy``   one record per node of every tree (children as
+                         global indices, split feature and threshold)
+* ``forest_values.npy``  the leaf predictions (class probabilities for
+                         classifiers, the mean target for regressors)
+
+plus ``forest.json`` for the tree roots, depth and classes. Loaded with
+``np.load(mmap_mode="r")`` the arrays stay in the page cache and every
+worker on the machine shares them.
+
+Predictions follow sklearn step by step (float32 inputs, ``<=`` splits,
+missing values sent the learned way, trees summed in order), so they are
+identical to the estimator's own.
+"""
+import os
+import json
+
+import numpy as np
+import scipy.sparse as sp
+
+from sklearn.ensemble import (
+    ExtraTreesClassifier,
+    ExtraTreesRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+
+FOREST_FILES = ("forest.json", "forest_nodes.npy", "forest_values.npy")
+
+NODE_DTYPE = np.dtype([
+    ("left", np.int64),
+    ("right", np.int64),
+    ("feature", np.int64),
+    ("threshold", np.float64),
+    ("missing_left", np.uint8),
+])
+
+CLASSIFIERS = (RandomForestClassifier, ExtraTreesClassifier)
+REGRESSORS = (RandomForestRegressor, ExtraTreesRegressor)
+
+
+def supports(model):
+    """True for single-output RandomForest / ExtraTrees models."""
+    return (
+        isinstance(model, CLASSIFIERS + REGRESSORS)
+        and getattr(model, "n_outputs_", 1) == 1
+    )
+
+
+class FlatForest:
+    """All trees of a forest as flat arrays, with the forest's predict API.
+
+    Leaves point to themselves, so a batch walks every tree one level per
+    step with plain numpy gathers, dropping the (row, tree) entries that
+    have reached a leaf. Every batch size is
+    served from these arrays, never from the pickled estimator (which would
+    give each worker its own copy again); big batches are walked
+    ``chunk_rows`` rows at a time so the (rows x trees) index arrays stay
+    small.
+    """
+
+    def __init__(self, nodes, values, roots, max_depth, kind, classes=None,
+                 n_features_in=None, allow_nan=True, chunk_rows=1024):
+        self.nodes = nodes
+        self.values = values
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.max_depth = max_depth
+        self.kind = kind
+        self.classes_ = None if classes is None else np.asarray(classes)
+        self.n_features_in_ = n_features_in
+        # ExtraTrees rejects NaN inputs instead of routing them.
+        self.allow_nan = allow_nan
+        self.chunk_rows = chunk_rows
+
+    # -----------------------------
+    # Export / load
+    # -----------------------------
+    @classmethod
+    def from_estimator(cls, model):
+        if not supports(model):
+            raise ValueError(f"Cannot flatten {type(model).__name__}")
+
+        classifier = isinstance(model, CLASSIFIERS)
+        nodes, values, roots = [], [], []
+        offset = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            index = np.arange(n_nodes) + offset
+            leaf = tree.children_left == -1
+
+            flat = np.empty(n_nodes, dtype=NODE_DTYPE)
+            # Children become indices into the concatenated node array, and
+            # leaves loop back to themselves.
+            flat["left"] = np.where(leaf, index, tree.children_left + offset)
+            flat["right"] = np.where(leaf, index, tree.children_right + offset)
+            flat["feature"] = np.where(leaf, 0, tree.feature)
+            flat["threshold"] = tree.threshold
+            flat["missing_left"] = tree.missing_go_to_left
+            nodes.append(flat)
+
+            value = tree.value[:, 0, :]
+            if classifier:
+                # DecisionTreeClassifier.predict_proba normalises the leaf
+                # values; done once here with the same arithmetic.
+                normalizer = value.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+            else:
+                value = value[:, :1]
+            values.append(value)
+
+            roots.append(offset)
+            offset += n_nodes
+
+        return cls(
+            np.concatenate(nodes),
+            np.concatenate(values),
+            roots,
+            max_depth=max(int(e.tree_.max_depth) for e in model.estimators_),
+            kind="classifier" if classifier else "regressor",
+            classes=model.classes_ if classifier else None,
+            n_features_in=int(model.n_features_in_),
+            allow_nan=bool(model._get_tags()["allow_nan"]),
+        )
+
+    def save(self, directory):
+        np.save(os.path.join(directory, "forest_nodes.npy"), self.nodes)
+        np.save(os.path.join(directory, "forest_values.npy"), self.values)
+        meta = {
+            "kind": self.kind,
+            "roots": self.roots.tolist(),
+            "max_depth": self.max_depth,
+            "classes": None if self.classes_ is None else self.classes_.tolist(),
+            "n_features_in": self.n_features_in_,
+            "allow_nan": self.allow_nan,
+        }
+        with open(os.path.join(directory, "forest.json"), "w") as f:
+            json.dump(meta, f, indent=4)
+        return [os.path.join(directory, name) for name in FOREST_FILES]
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r", chunk_rows=1024):
+        """Map the arrays in ``directory`` (model.pkl is not read)."""
+        with open(os.path.join(directory, "forest.json")) as f:
+            meta = json.load(f)
+
+        # np.asarray drops the memmap subclass (slow to index) but keeps the
+        # mapped buffer.
+        return cls(
+            np.asarray(np.load(os.path.join(directory, "forest_nodes.npy"), mmap_mode=mmap_mode)),
+            np.asarray(np.load(os.path.join(directory, "forest_values.npy"), mmap_mode=mmap_mode)),
+            meta["roots"],
+            meta["max_depth"],
+            meta["kind"],
+            meta["classes"],
+            meta["n_features_in"],
+            meta["allow_nan"],
+            chunk_rows=chunk_rows,
+        )
+
+    # -----------------------------
+    # Inference
+    # -----------------------------
+    def _check(self, X):
+        if sp.issparse(X):
+            X = X.tocsr()
+        else:
+            # Trees split on float32 values, like sklearn's DTYPE.
+            X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[-1]} features, but the forest expects {self.n_features_in_}"
+            )
+        return X
+
+    def _chunks(self, X):
+        """Dense float32 blocks of at most ``chunk_rows`` rows."""
+        for start in range(0, X.shape[0], self.chunk_rows):
+            chunk = X[start:start + self.chunk_rows]
+            if sp.issparse(chunk):
+                chunk = chunk.toarray()
+            chunk = np.asarray(chunk, dtype=np.float32)
+            if not self.allow_nan and np.isnan(chunk).any():
+                raise ValueError("Input X contains NaN.")
+            yield chunk
+
+    def apply(self, X):
+        """Leaf index (into the flat arrays) of every row in every tree,
+        shape (n_samples, n_trees)."""
+        X = self._check(X)
+        return np.concatenate(
+            [self._apply_chunk(chunk) for chunk in self._chunks(X)]
+            or [np.empty((0, len(self.roots)), dtype=np.int64)]
+        )
+
+    def _apply_chunk(self, X):
+        left = self.nodes["left"]
+        right = self.nodes["right"]
+        feature = self.nodes["feature"]
+        threshold = self.nodes["threshold"]
+        missing_left = self.nodes["missing_left"]
+
+        n_rows, n_trees = X.shape[0], len(self.roots)
+        values = X.ravel()
+        # One entry per (row, tree), row-major like the result.
+        node = np.tile(self.roots, n_rows)
+        row_start = np.repeat(np.arange(n_rows) * X.shape[1], n_trees)
+
+        # One level of every tree per step, for the entries not yet in a leaf.
+        active = np.flatnonzero(left[node] != node)
+        for _ in range(self.max_depth):
+            if not active.size:
+                break
+            current = node[active]
+            x = values[row_start[active] + feature[current]]
+            go_left = np.where(np.isnan(x), missing_left[current] == 1, x <= threshold[current])
+            child = np.where(go_left, left[current], right[current])
+            node[active] = child
+            active = active[left[child] != child]
+
+        return node.reshape(n_rows, n_trees)
+
+    def _accumulate(self, X):
+        X = self._check(X)
+        total = np.zeros((X.shape[0], self.values.shape[1]))
+        start = 0
+        for chunk in self._chunks(X):
+            leaves = self._apply_chunk(chunk)
+            block = total[start:start + len(chunk)]
+            # Summed tree by tree in order, as the forest does.
+            for t in range(leaves.shape[1]):
+                block += self.values[leaves[:, t]]
+            start += len(chunk)
+        total /= len(self.roots)
+        return total
+
+    def predict_proba(self, X):
+        if self.kind != "classifier":
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._accumulate(X)
+
+    def predict(self, X):
+        if self.kind == "classifier":
+            return self.classes_.take(np.argmax(self._accumulate(X), axis=1), axis=0)
+        return self._accumulate(X)[:, 0]
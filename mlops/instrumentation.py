@@ -0,0 +1,342 @@
+"""Timings, memory and profiles for pipeline stages, plus Prometheus metrics.
+
+Agent entry points are wrapped with ``@instrumented("cleaning.run")``; every
+call becomes one structured event in the process-wide ``recorder``::
+
+    {"event": "cleaning.run", "status": "ok", "wall_seconds": 0.41,
+     "cpu_seconds": 0.39, "rss_start_mb": 180.2, "peak_rss_mb": 243.9,
+     "rows": 1000, "columns": 6, "timestamp": 1760000000.0}
+
+Code inside a span adds its own counts with ``annotate(rows=..., columns=...)``.
+CPU time is that of the thread running the span (work in joblib worker
+processes reports its own events); RSS is process-wide, sampled every
+``sample_interval`` seconds, so stages running side by side share peaks.
+
+``PIPELINE_PROFILE=1`` also runs every outermost span under cProfile (which
+sees the span's own thread) and writes a ``.prof`` dump (for snakeviz /
+pstats) and a top-functions ``.txt`` into ``PIPELINE_PROFILE_DIR`` (default
+``reports/profiles``).
+
+``MetricsRegistry`` holds counters, gauges and histograms and renders them
+in the Prometheus text exposition format for the API's /metrics endpoint.
+"""
+import io
+import os
+import re
+import time
+import pstats
+import cProfile
+import functools
+import threading
+from collections import deque
+
+try:
+    import psutil
+except ImportError:  # optional; /proc is read instead on Linux
+    psutil = None
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where it cannot be read."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _mb(n_bytes):
+    return None if n_bytes is None else n_bytes / 2 ** 20
+
+
+class _PeakSampler:
+    """Polls RSS on a daemon thread and keeps the highest value seen."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.start_rss = rss_bytes()
+        self.peak = self.start_rss
+        self._stop = threading.Event()
+        self._thread = None
+        if self.start_rss is not None and interval:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._update()
+
+    def _update(self):
+        current = rss_bytes()
+        if current is not None and current > self.peak:
+            self.peak = current
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        if self.start_rss is not None:
+            self._update()
+        return self.peak
+
+
+class Recorder:
+    """Bounded, thread-safe list of instrumentation events."""
+
+    def __init__(self, profile_dir=None, sample_interval=0.01, max_events=10000):
+        self.profile_dir = profile_dir
+        self.sample_interval = sample_interval
+        self._events = deque(maxlen=max_events)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls):
+        profile_dir = None
+        if os.getenv("PIPELINE_PROFILE", "0") != "0":
+            profile_dir = os.getenv("PIPELINE_PROFILE_DIR", "reports/profiles")
+        return cls(profile_dir=profile_dir)
+
+    # -----------------------------
+    # Events
+    # -----------------------------
+    def record(self, event, **fields):
+        entry = {"event": event, **fields, "timestamp": time.time()}
+        with self._lock:
+            self._events.append(entry)
+            self._count += 1
+        return entry
+
+    def mark(self):
+        """Position to pass to ``events_since`` later."""
+        with self._lock:
+            return self._count
+
+    def events_since(self, mark):
+        with self._lock:
+            n_new = min(self._count - mark, len(self._events))
+            return list(self._events)[len(self._events) - n_new:]
+
+    # -----------------------------
+    # Spans
+    # -----------------------------
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def annotate(self, **fields):
+        """Add fields (row/column counts, ...) to the innermost open span."""
+        stack = self._stack()
+        if stack:
+            stack[-1].update(fields)
+
+    def span(self, event, **fields):
+        return _Span(self, event, fields)
+
+    def _dump_profile(self, profiler, event):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(
+            self.profile_dir,
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{re.sub(r'[^A-Za-z0-9_.-]', '_', event)}",
+        )
+        profiler.dump_stats(base + ".prof")
+
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+        with open(base + ".txt", "w") as f:
+            f.write(summary.getvalue())
+        return base + ".prof"
+
+
+class _Span:
+    def __init__(self, recorder, event, fields):
+        self.recorder = recorder
+        self.event = event
+        self.fields = dict(fields)
+
+    def __enter__(self):
+        self.recorder._stack().append(self.fields)
+        self._sampler = _PeakSampler(self.recorder.sample_interval)
+        self._profiler = None
+        # Only the outermost span of a thread is profiled: a thread runs one
+        # profiler at a time (and Python 3.12+ one per process).
+        if self.recorder.profile_dir is not None and len(self.recorder._stack()) == 1:
+            try:
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            except ValueError:
+                self._profiler = None
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        return self.fields
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        if self._profiler is not None:
+            self._profiler.disable()
+        peak = self._sampler.stop()
+        self.recorder._stack().pop()
+
+        fields = {
+            "status": "ok" if exc_type is None else "error",
+            "wall_seconds": wall,
+            "cpu_seconds": cpu,
+            "rss_start_mb": _mb(self._sampler.start_rss),
+            "peak_rss_mb": _mb(peak),
+            **self.fields,
+        }
+        if self._profiler is not None:
+            fields["profile"] = self.recorder._dump_profile(self._profiler, self.event)
+        self.recorder.record(self.event, **fields)
+        return False
+
+
+recorder = Recorder.from_env()
+
+
+def annotate(**fields):
+    recorder.annotate(**fields)
+
+
+def instrumented(event):
+    """Record every call of the decorated function as a span named ``event``."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with recorder.span(event):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_fit(model, X_train, y_train, X_eval):
+    """Fit ``model`` and predict ``X_eval``, returning (predictions, timing).
+
+    Runs inside joblib workers too, so the timing travels back with the
+    result instead of going through the (per-process) recorder.
+    """
+    start, cpu_start = time.perf_counter(), time.process_time()
+    model.fit(X_train, y_train)
+    fitted = time.perf_counter()
+    preds = model.predict(X_eval)
+    end = time.perf_counter()
+    return preds, {
+        "fit_seconds": fitted - start,
+        "predict_seconds": end - fitted,
+        "cpu_seconds": time.process_time() - cpu_start,
+        "rows": int(X_train.shape[0]),
+        "columns": int(X_train.shape[1]),
+    }
+
+
+# -----------------------------
+# Prometheus metrics
+# -----------------------------
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms keyed by name and label set.
+
+    ``add_collector(fn)`` registers a callback run at render time that
+    returns ``[(name, type, help, [(labels, value), ...])]`` for values
+    owned elsewhere (cache hit counts, queue depths, ...).
+    """
+
+    def __init__(self):
+        self._families = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _family(self, name, kind, help, buckets=None):
+        family = self._families.get(name)
+        if family is None:
+            family = {"type": kind, "help": help, "buckets": buckets, "samples": {}}
+            self._families[name] = family
+        return family
+
+    def inc(self, name, value=1.0, labels=None, help=""):
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            samples = self._family(name, "counter", help)["samples"]
+            samples[key] = samples.get(key, 0.0) + value
+
+    def set(self, name, value, labels=None, help=""):
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            self._family(name, "gauge", help)["samples"][key] = float(value)
+
+    def observe(self, name, value, labels=None, help="", buckets=DEFAULT_BUCKETS):
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            family = self._family(name, "histogram", help, buckets)
+            state = family["samples"].get(key)
+            if state is None:
+                state = family["samples"][key] = {
+                    "buckets": [0] * len(family["buckets"]), "sum": 0.0, "count": 0,
+                }
+            for i, bound in enumerate(family["buckets"]):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def add_collector(self, fn):
+        self._collectors.append(fn)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            families = [
+                (name, family["type"], family["help"], family["buckets"], dict(family["samples"]))
+                for name, family in sorted(self._families.items())
+            ]
+            # Histogram states are mutated in place; copy them under the lock.
+            families = [
+                (name, kind, help, buckets, {
+                    key: dict(state, buckets=list(state["buckets"])) if kind == "histogram" else state
+                    for key, state in samples.items()
+                })
+                for name, kind, help, buckets, samples in families
+            ]
+
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                families.append((name, kind, help, None, {
+                    tuple(sorted(labels.items())): value for labels, value in samples
+                }))
+
+        for name, kind, help, buckets, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in samples.items():
+                if kind != "histogram":
+                    lines.append(f"{name}{_label_text(key)} {_number(value)}")
+                    continue
+                for bound, count in zip(buckets, value["buckets"]):
+                    lines.append(f"{name}_bucket{_label_text(key + (('le', _number(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_label_text(key + (('le', '+Inf'),))} {value['count']}")
+                lines.append(f"{name}_sum{_label_text(key)} {_number(value['sum'])}")
+                lines.append(f"{name}_count{_label_text(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,190 @@
+"""Versioned model registry.
+
+Every deploy becomes an immutable directory under ``models/versions``::
+
+    models/
+        CURRENT                 id of the live version (one line)
+        versions/
+            v0001/
+                manifest.json   files with sha256 + size, parent version
+                model.pkl
+                pipeline.pkl
+                ...
+
+A version is written to a temporary directory and renamed into place, and
+``CURRENT`` is swapped with ``os.replace``, so a reader sees either the old
+bundle or the new one, never a mix. Rolling back is pointing ``CURRENT`` at an
+earlier version. Before the first deploy (no ``CURRENT``) the bundle in the
+legacy ``models/latest`` directory is served.
+"""
+import os
+import json
+import stat
+import time
+import shutil
+
+from mlops.cache import hash_file
+
+MANIFEST = "manifest.json"
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _make_writable(func, path, exc_info):
+    # Version files are read-only; rmtree needs them writable on Windows.
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+class ModelRegistry:
+    def __init__(self, root="models", legacy_dir="models/latest"):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        self.pointer_path = os.path.join(root, "CURRENT")
+        self.legacy_dir = legacy_dir
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+    def path(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def current(self):
+        """Id of the live version, or None before the first deploy."""
+        if not os.path.exists(self.pointer_path):
+            return None
+        with open(self.pointer_path) as f:
+            return f.read().strip() or None
+
+    def current_dir(self):
+        """Directory of the live bundle (the legacy one before any deploy)."""
+        version = self.current()
+        return self.path(version) if version is not None else self.legacy_dir
+
+    def manifest(self, version):
+        manifest_path = os.path.join(self.path(version), MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise KeyError(f"Unknown model version: {version}")
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def list_versions(self):
+        """Manifests of every version, oldest first."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        versions = sorted(
+            name for name in os.listdir(self.versions_dir)
+            if os.path.exists(os.path.join(self.versions_dir, name, MANIFEST))
+        )
+        current = self.current()
+        return [
+            {**self.manifest(version), "current": version == current}
+            for version in versions
+        ]
+
+    def verify(self, version):
+        """Raise ValueError if a file of ``version`` no longer matches its checksum."""
+        directory = self.path(version)
+        for name, entry in self.manifest(version)["files"].items():
+            file_path = os.path.join(directory, name)
+            if not os.path.exists(file_path) or hash_file(file_path) != entry["sha256"]:
+                raise ValueError(f"Model version {version} is corrupted: {name}")
+
+    # -----------------------------
+    # Publishing
+    # -----------------------------
+    def _next_version(self):
+        numbers = [
+            int(name[1:]) for name in os.listdir(self.versions_dir)
+            if name.startswith("v") and name[1:].isdigit()
+        ]
+        return f"v{max(numbers, default=0) + 1:04d}"
+
+    def publish(self, files, info=None, activate=True):
+        """Copy ``files`` ({name: source path}) into a new version and make it live.
+
+        ``info`` is stored in the manifest as-is (task type, best model, ...).
+        If the files match the live version's checksums exactly, nothing is
+        copied and the live version id is returned.
+        """
+        current = self.current()
+        if current is not None:
+            live = {name: entry["sha256"] for name, entry in self.manifest(current)["files"].items()}
+            if live == {name: hash_file(source) for name, source in files.items()}:
+                print(f"Files unchanged, model version {current} stays live")
+                return current
+
+        os.makedirs(self.versions_dir, exist_ok=True)
+        version = self._next_version()
+        tmp_dir = os.path.join(self.versions_dir, f".tmp-{version}")
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir, onerror=_make_writable)
+        os.makedirs(tmp_dir)
+
+        entries = {}
+        for name, source in files.items():
+            target = os.path.join(tmp_dir, name)
+            shutil.copy2(source, target)
+            entries[name] = {"sha256": hash_file(target), "bytes": os.path.getsize(target)}
+
+        manifest = {
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "parent": current,
+            "files": entries,
+            "info": info or {},
+        }
+        _write_atomic(os.path.join(tmp_dir, MANIFEST), json.dumps(manifest, indent=4))
+
+        read_only = ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+        for name in list(entries) + [MANIFEST]:
+            file_path = os.path.join(tmp_dir, name)
+            os.chmod(file_path, os.stat(file_path).st_mode & read_only)
+
+        # Fails if another deploy claimed the same id meanwhile.
+        os.rename(tmp_dir, self.path(version))
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """Point CURRENT at ``version`` (checksums are verified first)."""
+        self.verify(version)
+        _write_atomic(self.pointer_path, version + "\n")
+        print(f"✅ Model version {version} is live")
+        return version
+
+    def rollback(self, version=None):
+        """Activate ``version``, or the parent of the live version."""
+        if version is None:
+            current = self.current()
+            if current is None:
+                raise ValueError("No deployed version to roll back from")
+            version = self.manifest(current)["parent"]
+            if version is None:
+                raise ValueError(f"Model version {current} has no earlier version")
+        return self.activate(version)
+
+    def prune(self, keep=10):
+        """Delete all but the ``keep`` newest versions (the live one and its
+        parent are always kept)."""
+        versions = [entry["version"] for entry in self.list_versions()]
+        current = self.current()
+        protected = {current}
+        if current is not None:
+            protected.add(self.manifest(current)["parent"])
+
+        removed = []
+        for version in versions[: max(0, len(versions) - keep)]:
+            if version not in protected:
+                shutil.rmtree(self.path(version), onerror=_make_writable)
+                removed.append(version)
+        return removed
@@ -0,0 +1,273 @@
+"""Mergeable, bounded-memory summaries for streaming over large datasets.
+
+Every sketch has ``update`` (feed one chunk) and ``merge`` (combine two
+sketches built on different chunks), so statistics can be collected chunk by
+chunk without holding the data in memory.
+"""
+import numpy as np
+import pandas as pd
+
+
+def hash_values(values):
+    """Stable uint64 hashes, with numbers hashed as float64 so 1 and 1.0 agree."""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        values = values.astype("float64")
+    else:
+        values = values.astype(str)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+class QuantileSketch:
+    """KLL-style quantile sketch.
+
+    Level ``h`` holds items that each stand for ``2**h`` original values.
+    When a level grows past ``k`` items it is sorted and every other item
+    (random offset) is promoted to the next level, so memory stays around
+    ``k * log2(n / k)`` floats and rank error around ``1 / k``. Until the first
+    compaction the sketch is exact and matches ``Series.quantile``.
+    """
+
+    def __init__(self, k=2048, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._weighted = []
+        self._rng = np.random.RandomState(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.n += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compact()
+
+    def add_weighted(self, value, weight):
+        """Count ``value`` ``weight`` times without storing it that often."""
+        if weight <= 0:
+            return
+        self._weighted.append((float(value), float(weight)))
+        self.n += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _compact(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if level.size > self.k:
+                level = np.sort(level)
+                rest = level[-1:] if level.size % 2 else level[:0]
+                paired = level[:-1] if level.size % 2 else level
+                promoted = paired[self._rng.randint(2)::2]
+
+                self.levels[h] = rest
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self._weighted.extend(other._weighted)
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compact()
+        return self
+
+    def _items(self):
+        values = [level for level in self.levels]
+        weights = [np.full(level.size, 2.0 ** h) for h, level in enumerate(self.levels)]
+        if self._weighted:
+            values.append(np.array([v for v, _ in self._weighted]))
+            weights.append(np.array([w for _, w in self._weighted]))
+        return np.concatenate(values), np.concatenate(weights)
+
+    def quantile(self, q):
+        """Quantile(s) ``q`` in [0, 1]; NaN when the sketch is empty."""
+        scalar = np.isscalar(q)
+        qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+
+        if self.n == 0:
+            result = np.full(qs.shape, np.nan)
+        else:
+            values, weights = self._items()
+            order = np.argsort(values, kind="mergesort")
+            values = values[order]
+            # Item i stands for the ranks [cum[i] - weights[i], cum[i]).
+            cum = np.cumsum(weights[order])
+
+            # pandas' linear interpolation between the two neighbouring ranks;
+            # exact while nothing has been compacted.
+            position = qs * (cum[-1] - 1)
+            lo = values[np.searchsorted(cum, np.floor(position), side="right")]
+            hi = values[np.searchsorted(cum, np.ceil(position), side="right")]
+            result = lo + (hi - lo) * (position - np.floor(position))
+
+        return float(result[0]) if scalar else result
+
+    def cdf(self, x):
+        """Approximate fraction of values <= each point in ``x``."""
+        x = np.asarray(x, dtype=np.float64)
+        if self.n == 0:
+            return np.full(x.shape, np.nan)
+        values, weights = self._items()
+        order = np.argsort(values, kind="mergesort")
+        cum = np.cumsum(weights[order])
+        idx = np.searchsorted(values[order], x, side="right")
+        return np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0.0) / cum[-1]
+
+
+class HyperLogLog:
+    """Distinct-count estimator with an exact small-cardinality mode.
+
+    Below ``exact_threshold`` distinct values the hashes are kept in a set,
+    so low-cardinality counts (constant columns, small categoricals) are
+    exact; above it only the ``2**p`` registers remain (~1.6% error at p=12).
+    """
+
+    def __init__(self, p=12, exact_threshold=1024):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+        self.exact_threshold = exact_threshold
+        self._exact = set()
+
+    def update_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if hashes.size == 0:
+            return
+
+        if self._exact is not None:
+            self._exact.update(np.unique(hashes).tolist())
+            if len(self._exact) > self.exact_threshold:
+                self._exact = None
+
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Position of the leftmost 1-bit in the remaining 64-p bits.
+        with np.errstate(divide="ignore"):
+            bit_length = np.where(rest > 0, np.floor(np.log2(rest.astype(np.float64))) + 1, 0)
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def update(self, values):
+        self.update_hashes(hash_values(values))
+
+    def contains(self, value):
+        """Exact membership while in small mode, else None (unknown)."""
+        if self._exact is None:
+            return None
+        return int(hash_values([value])[0]) in self._exact
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self._exact is not None and other._exact is not None:
+            self._exact |= other._exact
+            if len(self._exact) > self.exact_threshold:
+                self._exact = None
+        else:
+            self._exact = None
+        return self
+
+    def count(self):
+        if self._exact is not None:
+            return len(self._exact)
+
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * np.log(self.m / zeros)
+        return int(round(estimate))
+
+
+class FrequencySketch:
+    """Misra-Gries heavy hitters: exact counts while there are at most
+    ``capacity`` distinct values, approximate top values beyond that."""
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.counts = {}
+
+    def update(self, values):
+        counts = pd.Series(values).value_counts(dropna=True)
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        self._trim()
+
+    def _trim(self):
+        if len(self.counts) <= self.capacity:
+            return
+        cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = {v: c - cut for v, c in self.counts.items() if c > cut}
+
+    def merge(self, other):
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        self._trim()
+        return self
+
+    def mode(self):
+        """Most frequent value, ties broken by the smallest (like pandas)."""
+        if not self.counts:
+            return None
+        top = max(self.counts.values())
+        candidates = [v for v, c in self.counts.items() if c == top]
+        try:
+            return sorted(candidates)[0]
+        except TypeError:
+            return sorted(candidates, key=str)[0]
+
+    def frequencies(self):
+        total = sum(self.counts.values())
+        return {v: c / total for v, c in self.counts.items()} if total else {}
+
+
+class RowHashSet:
+    """Set of 64-bit row hashes kept as sorted numpy runs (8 bytes per row).
+
+    New chunks are checked with ``searchsorted`` against each run; runs are
+    merged once there are more than ``max_runs`` of them, LSM-style.
+
+    Unlike the other sketches here this is not bounded: it keeps every
+    distinct row's hash, so its size grows linearly with the input.
+    """
+
+    def __init__(self, max_runs=8):
+        self.max_runs = max_runs
+        self.runs = []
+
+    def __len__(self):
+        return sum(run.size for run in self.runs)
+
+    def _seen(self, hashes):
+        seen = np.zeros(hashes.size, dtype=bool)
+        for run in self.runs:
+            pos = np.searchsorted(run, hashes)
+            pos = np.minimum(pos, run.size - 1)
+            seen |= run[pos] == hashes
+        return seen
+
+    def add(self, hashes):
+        """Insert ``hashes``; return a mask of those already seen (in the set
+        or earlier in the same array), i.e. the duplicates."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        duplicate = pd.Series(hashes).duplicated().to_numpy() | self._seen(hashes)
+
+        new = np.unique(hashes[~duplicate])
+        if new.size:
+            self.runs.append(new)
+        if len(self.runs) > self.max_runs:
+            self.runs = [np.sort(np.concatenate(self.runs))]
+        return duplicate
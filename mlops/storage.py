@@ -0,0 +1,218 @@
+"""Intermediate storage for the datasets handed between pipeline stages.
+
+The format is picked from the file extension:
+
+* ``.parquet``                   typed, compressed columnar file (default)
+* ``.arrow`` / ``.feather``      Arrow IPC, uncompressed so readers can
+                                 memory-map it and skip the copy
+* ``.csv``                       plain text, kept for exports
+
+A directory of Parquet or Arrow files (e.g. the API's inference log
+segments) reads as one dataset.
+
+Parquet and Arrow store the schema, so the numeric/categorical split decided
+by the cleaning stage reaches every later stage without dtype re-inference.
+"""
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+PARQUET_EXTENSIONS = {".parquet", ".pq"}
+ARROW_EXTENSIONS = {".arrow", ".feather", ".ipc"}
+CSV_EXTENSIONS = {".csv"}
+
+PARQUET_COMPRESSION = "zstd"
+
+
+def storage_format(path):
+    """"parquet", "arrow" or "csv" for ``path``.
+
+    A directory is "arrow" if it holds Arrow files, else "parquet".
+    """
+    if os.path.isdir(path):
+        for _, _, names in os.walk(path):
+            if any(os.path.splitext(name)[1].lower() in ARROW_EXTENSIONS for name in names):
+                return "arrow"
+        return "parquet"
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PARQUET_EXTENSIONS:
+        return "parquet"
+    if ext in ARROW_EXTENSIONS:
+        return "arrow"
+    if ext in CSV_EXTENSIONS:
+        return "csv"
+    raise ValueError(f"❌ Unsupported data format '{ext}' for {path}")
+
+
+def _dataset(path, fmt):
+    """The files under directory ``path`` as one dataset.
+
+    Files starting with "." or "_" are skipped. Schemas are unified across
+    files (a column missing from some reads as nulls there), so segments
+    appended over time with slightly different fields still load together.
+    """
+    kind = "parquet" if fmt == "parquet" else "ipc"
+    dataset = ds.dataset(path, format=kind, partitioning="hive")
+    schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+    if len(schemas) > 1:
+        schema = pa.unify_schemas([dataset.schema, *schemas], promote_options="permissive")
+        dataset = ds.dataset(path, format=kind, partitioning="hive", schema=schema)
+    return dataset
+
+
+def _to_table(df, schema=None):
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def _to_pandas(table):
+    # split_blocks lets columns without nulls wrap the Arrow buffers instead
+    # of being consolidated into a copied 2-D block.
+    return table.to_pandas(split_blocks=True)
+
+
+def write_frame(df, path):
+    """Write ``df`` to ``path`` in the format given by its extension."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fmt = storage_format(path)
+
+    # Write next to the target and swap it in, so a reader never sees a
+    # half-written file.
+    tmp_path = path + ".tmp"
+    if fmt == "csv":
+        df.to_csv(tmp_path, index=False)
+    elif fmt == "parquet":
+        pq.write_table(_to_table(df), tmp_path, compression=PARQUET_COMPRESSION)
+    else:
+        table = _to_table(df)
+        with ipc.new_file(tmp_path, table.schema) as writer:
+            writer.write_table(table)
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_frame(path, columns=None):
+    """Load a dataset written by ``write_frame`` (or any CSV / Parquet file).
+
+    Arrow IPC files are memory-mapped, so numeric columns are backed by the
+    page cache rather than copied onto the heap.
+    """
+    fmt = storage_format(path)
+
+    if fmt == "csv":
+        return pd.read_csv(path, usecols=columns)
+
+    if os.path.isdir(path):
+        return _to_pandas(_dataset(path, fmt).to_table(columns=columns))
+
+    if fmt == "parquet":
+        return _to_pandas(pq.read_table(path, columns=columns, memory_map=True))
+
+    source = pa.memory_map(path, "r")
+    table = ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return _to_pandas(table)
+
+
+def iter_frames(path, chunksize, dtype=None):
+    """Yield ``path`` as DataFrames of at most ``chunksize`` rows.
+
+    ``dtype`` overrides only apply to CSV, the one format without a schema.
+    """
+    fmt = storage_format(path)
+
+    if fmt == "csv":
+        yield from pd.read_csv(path, chunksize=chunksize, dtype=dtype)
+    elif os.path.isdir(path):
+        for batch in _dataset(path, fmt).to_batches(batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+    elif fmt == "parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        reader = ipc.open_file(pa.memory_map(path, "r"))
+        for i in range(reader.num_record_batches):
+            table = pa.Table.from_batches([reader.get_batch(i)])
+            for start in range(0, table.num_rows, chunksize):
+                yield table.slice(start, chunksize).to_pandas()
+
+
+class FrameWriter:
+    """Append DataFrame chunks to one file, for stages that stream their output.
+
+    The schema (and the CSV header) comes from the first non-empty chunk;
+    later chunks are cast to it so every row group / record batch agrees.
+    Empty chunks carry no dtypes worth fixing, so they are skipped; if every
+    chunk is empty the last one is written on close, giving a file with
+    just the header / schema.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = storage_format(path)
+        self.tmp_path = path + ".tmp"
+        self.schema = None
+        self._writer = None
+        self._file = None
+        self._started = False
+        self._empty = None
+        self.rows = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, df):
+        if df.empty and not self._started:
+            self._empty = df
+            return
+        self._write(df)
+        self.rows += len(df)
+
+    def _write(self, df):
+        if self.format == "csv":
+            if self._file is None:
+                self._file = open(self.tmp_path, "w", newline="")
+            df.to_csv(self._file, header=not self._started, index=False)
+        else:
+            table = _to_table(df, schema=self.schema)
+            if self._writer is None:
+                self.schema = table.schema
+                if self.format == "parquet":
+                    self._writer = pq.ParquetWriter(
+                        self.tmp_path, self.schema, compression=PARQUET_COMPRESSION
+                    )
+                else:
+                    self._writer = ipc.new_file(self.tmp_path, self.schema)
+            self._writer.write_table(table)
+        self._started = True
+
+    def close(self):
+        if not self._started and self._empty is not None:
+            self._write(self._empty)
+        if self._file is not None:
+            self._file.close()
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            if self._file is not None:
+                self._file.close()
+            if self._writer is not None:
+                self._writer.close()
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+        return False
@@ -0,0 +1,119 @@
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class Stage:
+    """A pipeline step: ``fn(results)`` runs once every stage in ``deps`` is done.
+
+    ``results`` maps finished stage names to their return values.
+    """
+
+    def __init__(self, name, fn, deps=()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+class DAGExecutor:
+    """Runs a dependency graph of stages, independent ones concurrently.
+
+    Stages run on a thread pool: the heavy work inside them (numpy, sklearn,
+    joblib process pools) releases the GIL, and threads can share the
+    in-memory feature matrix without copying it. ``on_event(stage, status)``
+    is called with "started"/"completed"/"failed" for progress reporting.
+    """
+
+    def __init__(self, max_workers=3, on_event=None):
+        self.max_workers = max_workers
+        self.on_event = on_event
+
+    def _validate(self, stages):
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique")
+
+        known = set(names)
+        for stage in stages:
+            missing = set(stage.deps) - known
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages {sorted(missing)}")
+
+        # Kahn's algorithm, only to reject cycles up front.
+        indegree = {stage.name: len(stage.deps) for stage in stages}
+        ready = [name for name, degree in indegree.items() if degree == 0]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for stage in stages:
+                if name in stage.deps:
+                    indegree[stage.name] -= 1
+                    if indegree[stage.name] == 0:
+                        ready.append(stage.name)
+        if visited != len(stages):
+            raise ValueError("Stage graph contains a cycle")
+
+    def _notify(self, name, status):
+        if self.on_event is not None:
+            self.on_event(name, status)
+
+    def _critical_path(self, stages, timeline):
+        """Walk back from the last stage to finish through its latest-finishing dependency."""
+        by_name = {stage.name: stage for stage in stages}
+        current = max(timeline, key=lambda name: timeline[name]["end"])
+        path = [current]
+        while by_name[current].deps:
+            current = max(by_name[current].deps, key=lambda name: timeline[name]["end"])
+            path.append(current)
+        return path[::-1]
+
+    def run(self, stages):
+        self._validate(stages)
+
+        results = {}
+        timeline = {}
+        pending = {stage.name: stage for stage in stages}
+        running = {}
+        origin = time.perf_counter()
+
+        def execute(stage):
+            start = time.perf_counter()
+            self._notify(stage.name, "started")
+            output = stage.fn(results)
+            end = time.perf_counter()
+            timeline[stage.name] = {
+                "start": start - origin,
+                "end": end - origin,
+                "duration": end - start,
+                "deps": list(stage.deps),
+                "thread": threading.current_thread().name,
+            }
+            return output
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as pool:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dep in results for dep in stage.deps):
+                        running[pool.submit(execute, stage)] = name
+                        del pending[name]
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception:
+                        self._notify(name, "failed")
+                        # Let stages already running finish, start nothing new.
+                        for other in running:
+                            other.cancel()
+                        raise
+                    self._notify(name, "completed")
+
+        wall = time.perf_counter() - origin
+        return results, {
+            "wall_seconds": wall,
+            "stages": timeline,
+            "critical_path": self._critical_path(stages, timeline),
+        }
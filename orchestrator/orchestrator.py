@@ -1,60 +1,300 @@
+import os
+
+import pandas as pd
+
 from agents.feature_engineering.feature_agent import FeatureEngineeringAgent
 from agents.cleaning.cleaning_agent import CleaningAgent
 from agents.automl.automl_agent import AutoMLAgent
 from agents.evaluation.evaluation_agent import EvaluationAgent
 from agents.deployment.deployment_agent import DeploymentAgent
 from agents.monitoring.monitoring_agent import MonitoringAgent
+from agents.incremental.incremental_agent import IncrementalTrainingAgent
+from mlops.cache import StageCache, agent_config, code_version, hash_file
+from mlops.instrumentation import recorder
+from mlops.storage import read_frame, write_frame
+from orchestrator.dag import DAGExecutor, Stage
+
+# Agent settings that change how fast a stage runs, not what it produces.
+EXECUTION_SETTINGS = {"n_jobs", "backend"}
+
+# File extension of the cleaned dataset handed to the later stages.
+INTERMEDIATE_FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
 
 
 class Orchestrator:
-    def __init__(self, task_type="regression"):
+    def __init__(
+        self,
+        task_type="regression",
+        n_jobs=1,
+        automl_params=None,
+        feature_params=None,
+        use_cache=True,
+        cache_dir="artifacts/cache",
+        cache_max_bytes=2 * 1024 ** 3,
+        max_parallel_stages=3,
+        intermediate_format="parquet",
+        export_csv=False,
+    ):
         print("🧩 Orchestrator initialized")
         self.task_type = task_type
 
+        if intermediate_format not in INTERMEDIATE_FORMATS:
+            raise ValueError(
+                f"intermediate_format must be one of {sorted(INTERMEDIATE_FORMATS)}"
+            )
+        self.intermediate_format = intermediate_format
+        # Also write data/processed/cleaned.csv for people who want to open it.
+        self.export_csv = export_csv
+
         self.cleaning_agent = CleaningAgent()
-        self.feature_agent = FeatureEngineeringAgent(task_type=task_type)
-        self.automl_agent = AutoMLAgent(task_type=task_type)
-        self.evaluation_agent = EvaluationAgent(task_type=task_type)
+        self.feature_agent = FeatureEngineeringAgent(
+            task_type=task_type, **(feature_params or {})
+        )
+        self.automl_agent = AutoMLAgent(
+            task_type=task_type, n_jobs=n_jobs, **(automl_params or {})
+        )
+        self.evaluation_agent = EvaluationAgent(
+            task_type=task_type, n_jobs=None if n_jobs == 1 else n_jobs
+        )
         self.deployment_agent = DeploymentAgent()
         self.monitoring_agent = MonitoringAgent()
+        self.incremental_agent = IncrementalTrainingAgent(
+            task_type=task_type, cleaning_agent=self.cleaning_agent
+        )
 
-    def run_training_pipeline(self, raw_data_path, target_column):
+        self.cache = StageCache(cache_dir, cache_max_bytes) if use_cache else None
+        self.max_parallel_stages = max_parallel_stages
+
+    # -----------------------------
+    # Stage cache
+    # -----------------------------
+    def _stage_key(self, stage, agent, *parts):
+        config = {
+            k: v for k, v in agent_config(agent).items() if k not in EXECUTION_SETTINGS
+        }
+        return StageCache.make_key(stage, config, code_version(agent), *parts)
+
+    def _cached_stage(self, stage, key, outputs, compute, cache_status):
+        """Restore ``stage`` from the cache, or run ``compute`` and store its outputs."""
+        if self.cache is None:
+            return compute()
+
+        hit, payload = self.cache.get(stage, key, outputs)
+        if hit:
+            cache_status[stage] = "hit"
+            return payload
+
+        payload = compute()
+        self.cache.put(stage, key, outputs, payload)
+        cache_status[stage] = "miss"
+        return payload
+
+    def _instrumentation(self, mark):
+        """Agent events (timings, peak RSS, shapes) recorded since ``mark``."""
+        return {"events": recorder.events_since(mark), "profile_dir": recorder.profile_dir}
+
+    def run_training_pipeline(self, raw_data_path, target_column, on_event=None):
+        """``on_event(stage, status)`` is called as every stage starts,
+        completes or fails."""
         print("🚀 Starting full training pipeline")
 
-        # Step 1: Cleaning
-        cleaned_data_path = self.cleaning_agent.run(
-            raw_data_path=raw_data_path,
-            output_path="data/processed/cleaned.csv"
+        mark = recorder.mark()
+        cache_status = {}
+        # Every downstream key chains on the raw file contents.
+        input_hash = hash_file(raw_data_path) if self.cache is not None else None
+
+        cleaned_output_path = (
+            "data/processed/cleaned" + INTERMEDIATE_FORMATS[self.intermediate_format]
         )
+        export_csv_path = None
+        if self.export_csv and self.intermediate_format != "csv":
+            export_csv_path = "data/processed/cleaned.csv"
+        keys = {}
+
+        # Step 1: Cleaning
+        def cleaning(results):
+            keys["cleaning"] = self._stage_key(
+                "cleaning", self.cleaning_agent, input_hash, cleaned_output_path
+            )
+            outputs = {
+                os.path.basename(cleaned_output_path): cleaned_output_path,
+                "cleaning_report.json": "reports/cleaning/cleaning_report.json",
+            }
+            if export_csv_path:
+                outputs["export.csv"] = export_csv_path
+            return self._cached_stage(
+                "cleaning",
+                # The CSV export is an extra file, not a different result.
+                StageCache.make_key(keys["cleaning"], bool(export_csv_path)),
+                outputs,
+                lambda: self.cleaning_agent.run(
+                    raw_data_path=raw_data_path,
+                    output_path=cleaned_output_path,
+                    export_csv_path=export_csv_path,
+                ),
+                cache_status,
+            )
 
         # Step 2: Feature Engineering
-        X, y, fe_metadata = self.feature_agent.transform(
-            data_path=cleaned_data_path,
-            target_column=target_column
-        )
+        def feature_engineering(results):
+            keys["feature_engineering"] = self._stage_key(
+                "feature_engineering", self.feature_agent, keys["cleaning"], target_column
+            )
+            return self._cached_stage(
+                "feature_engineering",
+                keys["feature_engineering"],
+                {
+                    "pipeline.pkl": "artifacts/feature_engineering/pipeline.pkl",
+                    "metadata.json": "artifacts/feature_engineering/metadata.json",
+                    "target_encoder.pkl": "artifacts/feature_engineering/target_encoder.pkl",
+                },
+                lambda: self.feature_agent.transform(
+                    data_path=results["cleaning"],
+                    target_column=target_column
+                ),
+                cache_status,
+            )
 
         # Step 3: AutoML
-        model, automl_report = self.automl_agent.run(X, y)
+        def automl(results):
+            X, y, _ = results["feature_engineering"]
+            keys["automl"] = self._stage_key(
+                "automl", self.automl_agent, keys["feature_engineering"]
+            )
+            return self._cached_stage(
+                "automl",
+                keys["automl"],
+                {
+                    "model.pkl": "artifacts/model/model.pkl",
+                    "training_report.json": "artifacts/model/training_report.json",
+                    "cv_results.pkl": "artifacts/model/cv_results.pkl",
+                },
+                lambda: self.automl_agent.run(X, y)[1],
+                cache_status,
+            )
 
         # Step 4: Evaluation
-        eval_report = self.evaluation_agent.run(X, y)
-
-        # Step 5: Deployment
-        deployment_dir = self.deployment_agent.deploy()
-        
-        # Step 6: Monitoring (Initial profile generation)
-        drift_report_path = self.monitoring_agent.generate_drift_report(
-            reference_data_path=cleaned_data_path,
-            current_data_path=cleaned_data_path  # Simulating new data for demonstration
-        )
+        def evaluation(results):
+            X, y, _ = results["feature_engineering"]
+            key = self._stage_key("evaluation", self.evaluation_agent, keys["automl"])
+            return self._cached_stage(
+                "evaluation",
+                key,
+                {"evaluation_report.json": "artifacts/evaluation/evaluation_report.json"},
+                lambda: self.evaluation_agent.run(X, y),
+                cache_status,
+            )
+
+        # Step 5: Deployment (always runs, it only copies the artifacts above)
+        def deployment(results):
+            return self.deployment_agent.deploy(
+                training_data_path=results["cleaning"],
+                drift_profile_path=results["monitoring"],
+            )
+
+        # Step 6: Monitoring (reference profile for live drift checks), only
+        # needs cleaned data. The full Evidently report is generated on demand.
+        def monitoring(results):
+            key = self._stage_key(
+                "monitoring", self.monitoring_agent, keys["cleaning"], target_column
+            )
+            return self._cached_stage(
+                "monitoring",
+                key,
+                {"drift_profile.json": "artifacts/monitoring/drift_profile.json"},
+                lambda: self.monitoring_agent.build_reference_profile(
+                    results["cleaning"], target_column=target_column
+                ),
+                cache_status,
+            )
+
+        stages = [
+            Stage("cleaning", cleaning),
+            Stage("feature_engineering", feature_engineering, deps=["cleaning"]),
+            Stage("monitoring", monitoring, deps=["cleaning"]),
+            Stage("automl", automl, deps=["feature_engineering"]),
+            Stage("evaluation", evaluation, deps=["feature_engineering", "automl"]),
+            Stage("deployment", deployment, deps=["feature_engineering", "automl", "monitoring"]),
+        ]
+
+        executor = DAGExecutor(max_workers=self.max_parallel_stages, on_event=on_event)
+        outputs, timeline = executor.run(stages)
 
         print("✅ Training pipeline completed")
 
-        return {
-            "cleaned_data_path": cleaned_data_path,
-            "feature_metadata": fe_metadata,
-            "automl_report": automl_report,
-            "evaluation_report": eval_report,
-            "deployment_dir": deployment_dir,
-            "drift_report_path": drift_report_path
+        result = {
+            "cleaned_data_path": outputs["cleaning"],
+            "feature_metadata": outputs["feature_engineering"][2],
+            "automl_report": outputs["automl"],
+            "evaluation_report": outputs["evaluation"],
+            "deployment_dir": outputs["deployment"],
+            "drift_profile_path": outputs["monitoring"],
+            "timeline": timeline,
+            "instrumentation": self._instrumentation(mark),
         }
+        if self.cache is not None:
+            result["cache"] = {
+                "hits": sum(s == "hit" for s in cache_status.values()),
+                "misses": sum(s == "miss" for s in cache_status.values()),
+                "stages": cache_status,
+                **{f"total_{k}": v for k, v in self.cache.stats().items()},
+            }
+
+        return result
+
+    def run_incremental_pipeline(self, raw_data_path, target_column, on_event=None):
+        """Update the deployed model with a batch of new rows.
+
+        Falls back to ``run_training_pipeline`` on the previous training
+        rows plus the batch when the incremental agent cannot absorb it
+        (schema change, drift, new classes, non-incremental model).
+        """
+        print("🚀 Starting incremental training pipeline")
+        mark = recorder.mark()
+
+        def notify(stage, status):
+            if on_event is not None:
+                on_event(stage, status)
+
+        notify("incremental", "started")
+        report = self.incremental_agent.run(raw_data_path, target_column)
+        notify("incremental", "completed")
+
+        if report["action"] == "incremental":
+            notify("deployment", "started")
+            # Drift is measured against everything the model has now seen.
+            drift_profile_path = self.monitoring_agent.build_reference_profile(
+                report["training_data_path"], target_column=target_column
+            )
+            deployment_dir = self.deployment_agent.deploy(
+                training_data_path=report["training_data_path"],
+                drift_profile_path=drift_profile_path,
+            )
+            notify("deployment", "completed")
+            print("✅ Incremental pipeline completed")
+            return {
+                "mode": "incremental",
+                "incremental_report": report,
+                "deployment_dir": deployment_dir,
+                "instrumentation": self._instrumentation(mark),
+            }
+
+        print(f"⚠️ Incremental update not possible ({report['reason']}), refitting from scratch")
+
+        training_data_path = report["training_data_path"]
+        data_path = raw_data_path
+        if training_data_path is not None:
+            # Old cleaned rows + the raw batch; cleaning is idempotent on the
+            # former, so the full pipeline sees every row once.
+            combined = pd.concat(
+                [read_frame(training_data_path), read_frame(raw_data_path)], ignore_index=True
+            )
+            data_path = "data/processed/combined_training_data.csv"
+            write_frame(combined, data_path)
+
+        result = self.run_training_pipeline(data_path, target_column, on_event=on_event)
+        result["mode"] = "full_refit"
+        result["refit_reason"] = report["reason"]
+        # Include the incremental attempt that led to the refit.
+        result["instrumentation"] = self._instrumentation(mark)
+        return result
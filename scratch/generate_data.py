@@ -38,6 +38,6 @@ df = pd.DataFrame({
     'Will_Quit': will_quit
 })
 
-os.makedirs('d:/auto-data-scientist/data', exist_ok=True)
-df.to_csv('d:/auto-data-scientist/data/employee_attrition.csv', index=False)
+os.makedirs('data', exist_ok=True)
+df.to_csv('data/employee_attrition.csv', index=False)
 print("Dataset generated at data/employee_attrition.csv")
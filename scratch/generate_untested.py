@@ -21,6 +21,6 @@ df = pd.DataFrame({
     'Department': departments
 })
 
-os.makedirs('d:/auto-data-scientist/data', exist_ok=True)
-df.to_csv('d:/auto-data-scientist/data/new_employees_untested.csv', index=False)
+os.makedirs('data', exist_ok=True)
+df.to_csv('data/new_employees_untested.csv', index=False)
 print("Untested Dataset generated at data/new_employees_untested.csv")
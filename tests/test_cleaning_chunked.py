@@ -0,0 +1,55 @@
+"""Chunked cleaning must drop the same rows and write the same report as
+the in-memory path."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.cleaning.cleaning_agent import CleaningAgent
+from mlops.storage import read_frame
+
+
+def make_raw(n_rows=400, seed=0):
+    rng = np.random.RandomState(seed)
+    df = pd.DataFrame({
+        "age": rng.randint(18, 65, size=n_rows),
+        "income": rng.normal(50000, 12000, size=n_rows).round(2),
+        "team": rng.choice(["Sales", "Ops ", "eng"], size=n_rows),
+        "score": rng.randint(0, 5, size=n_rows),
+    })
+    df.loc[rng.choice(n_rows, 20, replace=False), "income"] = np.nan
+    df.loc[rng.choice(n_rows, 20, replace=False), "team"] = np.nan
+    df.loc[3, "income"] = 1e7
+    # Duplicates of early rows, spread over later chunks.
+    return pd.concat([df, df.iloc[[0, 5, 5, 50, 120]]], ignore_index=True)
+
+
+def clean(raw_path, output_path, chunksize):
+    CleaningAgent(chunksize=chunksize).run(str(raw_path), str(output_path))
+    with open("reports/cleaning/cleaning_report.json") as f:
+        return json.load(f)
+
+
+def key_order(report):
+    return {k: key_order(v) if isinstance(v, dict) else None for k, v in report.items()}
+
+
+@pytest.mark.parametrize("chunksize", [7, 64, 1000])
+def test_chunked_report_matches_in_memory(tmp_path, monkeypatch, chunksize):
+    monkeypatch.chdir(tmp_path)
+    raw_path = tmp_path / "raw.csv"
+    make_raw().to_csv(raw_path, index=False)
+
+    expected = clean(raw_path, tmp_path / "memory.parquet", None)
+    got = clean(raw_path, tmp_path / "chunked.parquet", chunksize)
+
+    assert json.dumps(key_order(got)) == json.dumps(key_order(expected))
+    for key in ("duplicates_removed", "rows_after", "final_columns", "missing_values_after"):
+        assert got[key] == expected[key]
+
+    memory = read_frame(str(tmp_path / "memory.parquet"))
+    chunked = read_frame(str(tmp_path / "chunked.parquet"))
+    pd.testing.assert_frame_equal(
+        chunked.astype(str).reset_index(drop=True), memory.astype(str).reset_index(drop=True)
+    )
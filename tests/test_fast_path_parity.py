@@ -0,0 +1,115 @@
+"""The compiled single-record path must give exactly what the fitted
+pipeline gives, for every encoder the feature stage can produce."""
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from agents.feature_engineering.encoders import make_categorical_transformers
+from api.fast_path import CompiledPipeline
+
+NUMERICAL = ["age", "income"]
+LOW = ["team"]
+HIGH = ["city"]
+
+
+def make_frame(n_rows=300, seed=0):
+    rng = np.random.RandomState(seed)
+    df = pd.DataFrame({
+        "age": rng.randint(18, 65, size=n_rows),
+        "income": rng.normal(50000, 12000, size=n_rows).round(2),
+        "team": rng.choice(["sales", "ops", "eng", "hr"], size=n_rows, p=[0.4, 0.3, 0.28, 0.02]),
+        "city": rng.choice([f"city_{k}" for k in range(40)], size=n_rows),
+    })
+    y = ((df["age"] > 40) ^ (df["team"] == "eng")).astype(int)
+    return df, y
+
+
+def fit(encoder):
+    """Fitted (pipeline, model, compiled pipeline); encoder "scaler" means
+    numeric columns only."""
+    X, y = make_frame()
+    categorical = [] if encoder == "scaler" else LOW + HIGH
+    if categorical:
+        categorical_transformers = make_categorical_transformers(
+            LOW, HIGH,
+            high_cardinality_encoder=encoder,
+            hash_buckets=16,
+            min_frequency=10,
+            max_onehot_categories=3,
+        )
+    else:
+        categorical_transformers = []
+
+    pipeline = ColumnTransformer(
+        transformers=[("num", StandardScaler(), NUMERICAL), *categorical_transformers],
+        sparse_threshold=0.3,
+    )
+    X_transformed = pipeline.fit_transform(X, y)
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X_transformed, y)
+
+    metadata = {
+        "numerical_columns": NUMERICAL,
+        "categorical_columns": categorical,
+        "output_shape": X_transformed.shape,
+    }
+    compiled, reason = CompiledPipeline.build(pipeline, metadata)
+    assert compiled is not None, reason
+    return pipeline, model, compiled
+
+
+def dense(X):
+    return X.toarray() if sp.issparse(X) else np.asarray(X)
+
+
+RECORDS = [
+    {"age": 30, "income": 41000.5, "team": "sales", "city": "city_3"},
+    {"age": 52, "income": 73210.0, "team": "eng", "city": "city_39"},
+    # Infrequent one-hot category.
+    {"age": 45, "income": 50000.0, "team": "hr", "city": "city_0"},
+    # Categories never seen in training.
+    {"age": 33, "income": 38000.0, "team": "legal", "city": "atlantis"},
+    # Missing numbers.
+    {"age": float("nan"), "income": float("nan"), "team": "ops", "city": "city_7"},
+]
+
+
+@pytest.mark.parametrize("encoder", ["scaler", "onehot", "target", "hashing", "frequency"])
+@pytest.mark.parametrize("record", RECORDS)
+def test_transform_record_matches_pipeline(encoder, record):
+    pipeline, model, compiled = fit(encoder)
+
+    expected = pipeline.transform(pd.DataFrame([record]))
+    got = compiled.transform_record(record)
+
+    assert sp.issparse(got) == sp.issparse(expected)
+    np.testing.assert_array_equal(dense(got), dense(expected))
+    # Dense, since forests reject NaN in sparse input.
+    np.testing.assert_array_equal(model.predict(dense(got)), model.predict(dense(expected)))
+
+
+@pytest.mark.parametrize("encoder", ["hashing", "frequency"])
+def test_missing_category_matches_pipeline(encoder):
+    # Both encoders read a missing category as the string "nan".
+    pipeline, model, compiled = fit(encoder)
+    record = {"age": 30, "income": 41000.5, "team": "sales", "city": float("nan")}
+
+    expected = pipeline.transform(pd.DataFrame([record]))
+    got = compiled.transform_record(record)
+
+    np.testing.assert_array_equal(dense(got), dense(expected))
+    np.testing.assert_array_equal(model.predict(dense(got)), model.predict(dense(expected)))
+
+
+@pytest.mark.parametrize("encoder", ["onehot", "target"])
+def test_missing_category_falls_back(encoder):
+    # A non-string category must raise so the API takes the pandas path.
+    _, _, compiled = fit(encoder)
+    record = {"age": 30, "income": 41000.5, "team": "sales", "city": float("nan")}
+
+    with pytest.raises(TypeError):
+        compiled.transform_record(record)